@@ -1,8 +1,21 @@
 import os
+import click
 from flask import Flask, redirect, url_for
-from flask_migrate import Migrate
 from extensions import db, socketio, login_manager, mail
-from project.models import User
+from project.identity import load_identity
+from routes.nav import compile_navigation
+from project.logging_setup import init_logging
+from project.compression import init_compression
+from project.db_routing import init_db_routing
+from project.sql_profiler import init_sql_profiler
+from project.request_profiler import init_request_profiler
+from project.metrics import init_metrics
+from project.tracing import init_tracing
+from project.startup import init_template_cache
+from project.fragment_cache import init_fragment_cache
+from project.menu_bundle import init_menu_bundle
+from project.bootstrap import init_bootstrap
+from project.assets import init_assets
 from config import config
 
 def create_app(config_name='default'):
@@ -13,17 +26,34 @@ def create_app(config_name='default'):
         static_url_path='/static'
     )
     app.config.from_object(config[config_name])
+    init_logging(app)
+    init_compression(app) # after_request hooks run in reverse, so registering early lets it see the final body
+    init_template_cache(app)
+    init_fragment_cache(app)
+    init_menu_bundle(app)
+    init_bootstrap(app)
+    init_assets(app)
 
     db.init_app(app)
+    init_db_routing(app)
+    init_sql_profiler(app)
+    init_request_profiler(app)
+    init_metrics(app)
+    init_tracing(app)
     socketio.init_app(app)
+    import project.realtime # Socket.IO handlers
     login_manager.init_app(app)
     mail.init_app(app)
     login_manager.login_view = 'auth.login'
-    Migrate(app, db)
+    login_manager.blueprint_login_views['api_v1'] = None # API clients get a 401, not the login page
+    if click.get_current_context(silent=True) is not None:
+        # Only the `flask` CLI needs the `db` command group; alembic adds ~0.3s to worker boot
+        from flask_migrate import Migrate
+        Migrate(app, db)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_identity(user_id)
 
     from routes.routes import admin_bp
     from routes.qrlink_routes import qrlink_bp
@@ -31,6 +61,7 @@ def create_app(config_name='default'):
     from routes.admin_analytics import analytics_bp
     from routes.auth_routes import auth_bp
     from routes.ui_routes import ui_bp
+    from routes.api_v1 import api_v1_bp
 
     app.register_blueprint(admin_bp)
     app.register_blueprint(qrlink_bp)
@@ -38,14 +69,65 @@ def create_app(config_name='default'):
     app.register_blueprint(analytics_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(ui_bp)
+    app.register_blueprint(api_v1_bp)
+    compile_navigation(app)
 
-    if app.config.get('SQLALCHEMY_DATABASE_URI', '').startswith('sqlite'):
-        with app.app_context():
-            db.create_all()
+    if app.config.get('SQLITE_PROFILE'):
+        from project.sqlite_profile import init_sqlite_profile
+        init_sqlite_profile(app)
+
+    if app.config.get('AUTO_CREATE_SCHEMA') and app.config.get('SQLALCHEMY_DATABASE_URI', '').startswith('sqlite'):
+        # Migrating rather than create_all() also adds new columns to an existing dev database
+        from project.startup import upgrade_schema
+        upgrade_schema(app)
+
+    @app.cli.command('upgrade-schema')
+    def upgrade_schema_command():
+        """Brings the database schema up to date (run once per deploy with AUTO_CREATE_SCHEMA=false)."""
+        from project.startup import upgrade_schema
+        click.echo(f"Schema {upgrade_schema(app)}.")
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Fingerprints and precompresses project/static into project/static/dist (run at build time)."""
+        from project.assets import build_assets, brotli, Image
+        manifest = build_assets(app.static_folder)
+        click.echo(f"Built {len(manifest)} assets into {app.static_folder}/dist.")
+        if brotli is None:
+            click.echo("brotli is not installed: only .gz siblings were written.")
+        if Image is None:
+            click.echo("Pillow is not installed: images were copied without recompression.")
+
+    @app.cli.command('compile-templates')
+    def compile_templates_command():
+        """Writes every template's bytecode to JINJA_BYTECODE_CACHE_DIR (run at build time)."""
+        from project.startup import compile_templates
+        if not app.config.get('JINJA_BYTECODE_CACHE_DIR'):
+            raise click.ClickException('JINJA_BYTECODE_CACHE_DIR is not set.')
+        click.echo(f"Compiled {compile_templates(app)} templates into {app.config['JINJA_BYTECODE_CACHE_DIR']}.")
+
+    @app.cli.command('sweep-orders')
+    def sweep_orders_command():
+        """Runs the stale-order sweeper once (for cron-style deployments)."""
+        from project.sweeper import sweep_stale_orders
+        for summary in sweep_stale_orders():
+            click.echo(summary)
+
+    @app.cli.command('send-outbox')
+    def send_outbox_command():
+        """Delivers all due outbox emails once (for cron-style deployments)."""
+        from project.outbox import deliver_due
+        click.echo(deliver_due(app))
 
     return app
 
 app = create_app(os.getenv('FLASK_CONFIG') or 'default')
 
 if __name__ == '__main__':
+    from project.outbox import start_outbox_sender
+    from project.startup import start_warmup
+    from project.sweeper import start_sweeper
+    start_warmup(app)
+    start_sweeper(app)
+    start_outbox_sender(app)
     socketio.run(app)
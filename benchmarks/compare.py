@@ -0,0 +1,74 @@
+"""
+Diffs two benchmark baselines written by benchmarks.run or benchmarks.micro.
+
+    python -m benchmarks.compare OLD.json NEW.json [--threshold 10]
+
+Exits with status 1 when any endpoint's p95 latency (benchmarks.run) or any micro-benchmark's
+normalized time (benchmarks.micro) grew by more than --threshold percent.
+"""
+import argparse
+import sys
+
+from benchmarks.report import load_baseline
+
+
+def _pct(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(old, new, threshold):
+    """Prints a per-endpoint diff and returns the labels whose p95 regressed beyond threshold."""
+    regressions = []
+    print(f"{old['meta'].get('git_revision')} -> {new['meta'].get('git_revision')}")
+    print(f"{'endpoint':<44}{'p95 old':>10}{'p95 new':>10}{'Δp95':>9}{'rps old':>10}{'rps new':>10}")
+    for label in sorted(set(old['endpoints']) | set(new['endpoints'])):
+        a, b = old['endpoints'].get(label), new['endpoints'].get(label)
+        if not a or not b:
+            print(f"{label:<44}{'(only in ' + ('new' if b else 'old') + ')':>20}")
+            continue
+        delta = _pct(a['p95_ms'], b['p95_ms'])
+        marker = ' !' if delta > threshold else ''
+        if marker:
+            regressions.append(label)
+        print(f"{label:<44}{a['p95_ms']:>10.2f}{b['p95_ms']:>10.2f}{delta:>8.1f}%"
+              f"{a.get('throughput_rps', 0):>10.1f}{b.get('throughput_rps', 0):>10.1f}{marker}")
+    return regressions
+
+
+def compare_micro(old, new, threshold):
+    """Same for benchmarks.micro baselines, on calibration-normalized time per call."""
+    regressions = []
+    print(f"calibration: {old['calibration_us']:.1f}us -> {new['calibration_us']:.1f}us")
+    print(f"{'benchmark':<24}{'norm old':>10}{'norm new':>10}{'change':>9}{'us old':>10}{'us new':>10}")
+    for name in sorted(set(old['results']) | set(new['results'])):
+        a, b = old['results'].get(name), new['results'].get(name)
+        if not a or not b:
+            print(f"{name:<24}{'(only in ' + ('new' if b else 'old') + ')':>20}")
+            continue
+        delta = _pct(a['normalized'], b['normalized'])
+        marker = ' !' if delta > threshold else ''
+        if marker:
+            regressions.append(name)
+        print(f"{name:<24}{a['normalized']:>10.3f}{b['normalized']:>10.3f}{delta:>8.1f}%"
+              f"{a['us']:>10.1f}{b['us']:>10.1f}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Allowed p95 regression in percent')
+    args = parser.parse_args()
+
+    old, new = load_baseline(args.old), load_baseline(args.new)
+    if ('results' in old) != ('results' in new):
+        parser.error('cannot compare a benchmarks.micro baseline with a benchmarks.run one')
+    regressions = (compare_micro if 'results' in old else compare)(old, new, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Bandwidth and time-to-first-byte of the heaviest pages per Accept-Encoding.
+
+Fetches the QR customer menu (anonymous), the storefront orders screen (staff) and the
+history CSV export (admin) of the first tenant in the seed manifest. Each page is
+fetched --repeat times per encoding. The report shows the median wire size, the time
+to first byte, the total time and the saving against identity.
+
+    python -m benchmarks.compression --manifest benchmarks/tenants.json --base-url http://127.0.0.1:5000
+    python -m benchmarks.compression --manifest benchmarks/tenants.json --in-process
+
+In-process runs go through the Flask test client, so "first byte" is when the response
+object is returned (before a streamed body is consumed). Use --base-url for real TTFB.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import time
+import urllib.parse
+
+ENCODINGS = ['identity', 'gzip', 'br']
+
+
+def pages(tenant):
+    table = tenant['table_numbers'][0]
+    return [
+        ('qrlink.customer_menu', None, f"/qrlink/{tenant['slug']}/menu?table={table}"),
+        ('admin.storefront_orders', 'staff', '/storefront/orders'),
+        ('admin.office_export_history', 'admin', '/office/history/export?date_filter=this_month'),
+    ]
+
+
+class RemoteClient:
+    def __init__(self, base_url):
+        parsed = urllib.parse.urlparse(base_url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.cookie = None
+
+    def login(self, email, password):
+        body = urllib.parse.urlencode({'email': email, 'password': password})
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        connection.request('POST', '/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+        response = connection.getresponse()
+        response.read()
+        self.cookie = response.getheader('Set-Cookie', '').split(';', 1)[0]
+        connection.close()
+
+    def fetch(self, path, encoding):
+        headers = {'Accept-Encoding': encoding}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        started = time.perf_counter()
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        first = response.read(1)
+        ttfb = time.perf_counter() - started
+        body = first + response.read()
+        total = time.perf_counter() - started
+        served = response.getheader('Content-Encoding') or 'identity'
+        connection.close()
+        return len(body), ttfb, total, served, response.status
+
+
+class InProcessClient:
+    def __init__(self):
+        from app import app
+        self.client = app.test_client()
+
+    def login(self, email, password):
+        self.client.post('/login', data={'email': email, 'password': password})
+
+    def fetch(self, path, encoding):
+        started = time.perf_counter()
+        response = self.client.get(path, headers={'Accept-Encoding': encoding})
+        ttfb = time.perf_counter() - started
+        body = response.get_data()
+        total = time.perf_counter() - started
+        return len(body), ttfb, total, response.headers.get('Content-Encoding', 'identity'), response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--manifest', default='benchmarks/tenants.json')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--base-url', help='URL of a running app instance')
+    target.add_argument('--in-process', action='store_true', help='Use the Flask test client against the configured database')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    tenant = manifest['tenants'][0]
+
+    results = []
+    for label, role, path in pages(tenant):
+        client = RemoteClient(args.base_url) if args.base_url else InProcessClient()
+        if role:
+            client.login(tenant['users'][role], manifest['password'])
+        client.fetch(path, 'identity') # warm caches and connections
+        for encoding in ENCODINGS:
+            samples = [client.fetch(path, encoding) for _ in range(args.repeat)]
+            results.append({
+                'page': label, 'encoding': encoding, 'served': samples[-1][3], 'status': samples[-1][4],
+                'bytes': int(statistics.median(s[0] for s in samples)),
+                'ttfb_ms': round(statistics.median(s[1] for s in samples) * 1000, 2),
+                'total_ms': round(statistics.median(s[2] for s in samples) * 1000, 2),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    identity = {r['page']: r['bytes'] for r in results if r['encoding'] == 'identity'}
+    print(f"{'page':<30}{'encoding':<10}{'bytes':>10}{'saved':>8}{'ttfb ms':>10}{'total ms':>10}")
+    for r in results:
+        saved = 1 - r['bytes'] / identity[r['page']] if identity[r['page']] else 0
+        print(f"{r['page']:<30}{r['served']:<10}{r['bytes']:>10}{saved:>8.0%}{r['ttfb_ms']:>10.2f}{r['total_ms']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
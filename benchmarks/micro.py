@@ -0,0 +1,149 @@
+"""
+Offline micro-benchmarks for the pure per-request hot paths in project.helpers and
+routes.nav. No database or server is needed; fixtures are plain objects shaped like
+the models.
+
+    python -m benchmarks.micro                 # run and fail on regressions vs the tracked baseline
+    python -m benchmarks.micro --update        # accept current numbers as the new baseline
+    python -m benchmarks.micro --threshold 30  # allowed slowdown in percent (default 25)
+
+Timings are normalized by a fixed pure-Python calibration loop, so the tracked
+baseline (benchmarks/micro_baseline.json) stays meaningful across machines.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime, time as dtime
+from types import SimpleNamespace
+
+from project.helpers import (scheduled_menus, serialize_menu_items, order_totals, sort_tables,
+                             derive_table_state)
+from routes.nav import Navigation
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'micro_baseline.json')
+
+
+def _fixtures(seed=7):
+    rng = random.Random(seed)
+    options = lambda n: [SimpleNamespace(id=i, name=f"Opt {i}", price_override=rng.choice([0.0, 0.5, 1.5])) for i in range(n)]
+    groups = lambda: [SimpleNamespace(id=g, name=f"Group {g}", selection_type='single', is_required=bool(g % 2), options=options(3))
+                      for g in range(rng.randint(0, 3))]
+    items = [SimpleNamespace(id=i, name=f"Dish {i}", price=round(rng.uniform(2, 30), 2),
+                             description=f"Dish number {i}", modifiers=groups()) for i in range(300)]
+
+    menus = [SimpleNamespace(
+        name=f"Menu {m}",
+        active_days=','.join(sorted(rng.sample('0123456', rng.randint(0, 7)))),
+        start_time=dtime(rng.randint(0, 23), 0) if m % 3 else None,
+        end_time=dtime(rng.randint(0, 23), 30) if m % 3 else None,
+    ) for m in range(30)]
+
+    orders = []
+    for o in range(200):
+        order_items = [SimpleNamespace(
+            menu_item=rng.choice(items), quantity=rng.randint(1, 3),
+            selected_modifiers=options(rng.randint(0, 3))
+        ) for _ in range(rng.randint(1, 6))]
+        orders.append(SimpleNamespace(id=o, items=order_items, status=rng.choice(['pending', 'paid', 'served']),
+                                      flagged_at=None))
+
+    numbers = [str(n) for n in range(1, 401)] + [f"A{n}" for n in range(1, 101)] + [f"Patio-{n}" for n in range(1, 51)]
+    rng.shuffle(numbers)
+    tables = [SimpleNamespace(id=i, number=num, status=rng.choice(['available', 'occupied', 'maintenance']),
+                              reservation_info=rng.choice([{}, {}, {'name': 'Lee'}])) for i, num in enumerate(numbers)]
+    table_orders = {t.id: rng.choice(orders) for t in tables if rng.random() < 0.4}
+    return items, menus, orders, tables, table_orders
+
+
+def benchmarks():
+    items, menus, orders, tables, table_orders = _fixtures()
+    now_local = datetime(2024, 5, 17, 12, 30)
+    nav = Navigation(lambda endpoint: '/' + endpoint)
+    return {
+        'menu_schedule': lambda: scheduled_menus(menus, now_local),
+        'menu_data_serialize': lambda: serialize_menu_items(items, include_description=True),
+        'order_totals': lambda: [order_totals(order, 0.06) for order in orders],
+        'table_natural_sort': lambda: sort_tables(list(tables)),
+        'nav_menu': lambda: nav.menu('office', 'admin'),
+        'table_state': lambda: [derive_table_state(t, table_orders.get(t.id)) for t in tables],
+    }
+
+
+def _calibrate():
+    data = list(range(1000))
+    return lambda: sum(x * 2 for x in data if x % 3)
+
+
+def measure(fn, repeat=9, min_time=0.1):
+    """Best-of-`repeat` time per call in microseconds."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2) or 1)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def run():
+    calibrate = _calibrate()
+    timings = {name: measure(fn) for name, fn in benchmarks().items()}
+    # Calibrate on both sides of the run and keep the best, to damp CPU frequency drift
+    calibration_us = min(measure(calibrate, repeat=15) for _ in range(2))
+    results = {name: {'us': us, 'normalized': us / calibration_us} for name, us in timings.items()}
+    return {'calibration_us': calibration_us, 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=25.0, help='Allowed slowdown in percent')
+    parser.add_argument('--update', action='store_true', help='Write the current results as the baseline')
+    args = parser.parse_args()
+
+    if args.update:
+        # Median of three runs so the tracked baseline isn't set by one lucky/unlucky pass
+        runs = [run() for _ in range(3)]
+        current = runs[0]
+        for name, row in current['results'].items():
+            row['normalized'] = statistics.median(r['results'][name]['normalized'] for r in runs)
+    else:
+        current = run()
+    baseline = None
+    if os.path.exists(args.baseline) and not args.update:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    regressions = []
+    print(f"calibration: {current['calibration_us']:.1f}us")
+    print(f"{'benchmark':<24}{'us/call':>12}{'normalized':>12}{'baseline':>12}{'change':>10}")
+    for name, row in current['results'].items():
+        base = baseline['results'].get(name) if baseline else None
+        line = f"{name:<24}{row['us']:>12.1f}{row['normalized']:>12.3f}"
+        if base:
+            change = (row['normalized'] - base['normalized']) / base['normalized'] * 100
+            if change > args.threshold:
+                # Re-measure once before reporting, to filter out scheduler noise
+                retry = run()['results'][name]
+                if retry['normalized'] < row['normalized']:
+                    row = retry
+                    change = (row['normalized'] - base['normalized']) / base['normalized'] * 100
+                    line = f"{name:<24}{row['us']:>12.1f}{row['normalized']:>12.3f}"
+            flag = ' !' if change > args.threshold else ''
+            if flag:
+                regressions.append(name)
+            line += f"{base['normalized']:>12.3f}{change:>9.1f}%{flag}"
+        print(line)
+
+    if args.update or baseline is None:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+    elif regressions:
+        print(f"\nRegressed beyond {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Latency/throughput aggregation and JSON baselines shared by the benchmark runners."""
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Recorder:
+    """Thread-safe collector of (label, latency, ok) samples."""
+
+    def __init__(self):
+        self._samples = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, label, seconds, ok=True):
+        with self._lock:
+            self._samples.setdefault(label, []).append(seconds)
+            if not ok:
+                self._errors[label] = self._errors.get(label, 0) + 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        endpoints = {}
+        with self._lock:
+            for label, samples in sorted(self._samples.items()):
+                samples = sorted(samples)
+                endpoints[label] = {
+                    'count': len(samples),
+                    'errors': self._errors.get(label, 0),
+                    'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+                    'p50_ms': percentile(samples, 50) * 1000,
+                    'p95_ms': percentile(samples, 95) * 1000,
+                    'p99_ms': percentile(samples, 99) * 1000,
+                    'max_ms': samples[-1] * 1000,
+                }
+        return {'elapsed_s': elapsed, 'endpoints': endpoints}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_summary(summary, title='Results'):
+    print(f"\n{title} ({summary['elapsed_s']:.1f}s)")
+    print(f"{'endpoint':<44}{'count':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for label, row in summary['endpoints'].items():
+        print(f"{label:<44}{row['count']:>8}{row['errors']:>6}{row['throughput_rps']:>9.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+
+
+def save_baseline(summary, path, meta=None):
+    """Writes a summary plus run metadata (git revision, host, arguments) as a JSON baseline."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    payload = {
+        'meta': {
+            'git_revision': git_revision(),
+            'created_at': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'host': platform.node(),
+            **(meta or {}),
+        },
+        **summary,
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,123 @@
+"""
+End-to-end load benchmark against a seeded database (see benchmarks.seed).
+
+Drives a weighted mix of scripted scenarios (QR menu browsing, place_order bursts,
+kitchen bumps, storefront payments, history exports) from concurrent workers and
+reports p50/p95/p99 latency and throughput per endpoint.
+
+    # against a running instance (gunicorn, socketio.run, ...)
+    python -m benchmarks.run --manifest benchmarks/tenants.json --base-url http://127.0.0.1:5000 \\
+        --seconds 60 --concurrency 16 --save benchmarks/baselines/$(git rev-parse --short HEAD).json
+
+    # in-process through the Flask test client (no server needed)
+    python -m benchmarks.run --manifest benchmarks/tenants.json --in-process --seconds 30
+
+    # compare against an earlier baseline
+    python -m benchmarks.compare benchmarks/baselines/abc123.json benchmarks/baselines/def456.json
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+from benchmarks.report import Recorder, print_summary, save_baseline
+from benchmarks.scenarios import SCENARIOS, BenchClient, RunState
+
+
+def parse_mix(value):
+    """Parses 'browse=40,order=25' into scenario weights (unlisted scenarios keep their defaults)."""
+    weights = {name: weight for name, (_, _, weight) in SCENARIOS.items()}
+    if value:
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            if name not in SCENARIOS:
+                raise SystemExit(f"Unknown scenario '{name}'. Choose from: {', '.join(SCENARIOS)}")
+            weights[name] = float(weight)
+    return weights
+
+
+class Worker(threading.Thread):
+    def __init__(self, index, manifest, weights, deadline, recorder, state, base_url=None, app=None):
+        super().__init__(name=f"bench-worker-{index}", daemon=True)
+        self.manifest = manifest
+        self.weights = weights
+        self.deadline = deadline
+        self.recorder = recorder
+        self.state = state
+        self.base_url = base_url
+        self.app = app
+        self.rng = random.Random(index)
+        self._clients = {}
+
+    def client_for(self, tenant, role):
+        """One client per (tenant, role) so logged-in sessions are reused like real tablets."""
+        key = (tenant['slug'], role)
+        if key not in self._clients:
+            client = BenchClient(self.recorder, base_url=self.base_url, app=self.app)
+            if role:
+                client.post('/login', 'POST auth.login', data={
+                    'email': tenant['users'][role], 'password': self.manifest['password']
+                })
+            self._clients[key] = client
+        return self._clients[key]
+
+    def run(self):
+        names = list(self.weights)
+        weights = [self.weights[n] for n in names]
+        while time.monotonic() < self.deadline:
+            name = self.rng.choices(names, weights=weights)[0]
+            scenario, role, _ = SCENARIOS[name]
+            tenant = self.rng.choice(self.manifest['tenants'])
+            scenario(self.client_for(tenant, role), tenant, self.state, self.rng, self.manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--manifest', default='benchmarks/tenants.json')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--base-url', help='URL of a running app instance')
+    target.add_argument('--in-process', action='store_true', help='Use the Flask test client against the configured database')
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--tenants', type=int, default=0, help='Limit the run to the first N tenants (0 = all)')
+    parser.add_argument('--mix', help="Scenario weights, e.g. 'browse=40,order=25,kitchen=15,payment=12,history=3'")
+    parser.add_argument('--save', help='Write the results as a JSON baseline to this path')
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    if args.tenants:
+        manifest['tenants'] = manifest['tenants'][:args.tenants]
+
+    app = None
+    if args.in_process:
+        from app import app
+
+    weights = parse_mix(args.mix)
+    recorder = Recorder()
+    state = RunState()
+    deadline = time.monotonic() + args.seconds
+    workers = [Worker(i, manifest, weights, deadline, recorder, state, base_url=args.base_url, app=app)
+               for i in range(args.concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    recorder.stop()
+
+    summary = recorder.summary()
+    print_summary(summary, title=f"{args.concurrency} workers, {len(manifest['tenants'])} tenants")
+    if args.save:
+        save_baseline(summary, args.save, meta={
+            'target': args.base_url or 'in-process',
+            'concurrency': args.concurrency,
+            'seconds': args.seconds,
+            'tenants': len(manifest['tenants']),
+            'mix': weights,
+        })
+        print(f"\nBaseline saved to {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Scripted user journeys driven by benchmarks.run. Each scenario takes a BenchClient, a
+tenant from the seed manifest and a shared RunState, and records its requests under
+stable labels such as 'GET qrlink.customer_menu'.
+"""
+import collections
+import re
+import threading
+import time
+
+_ITEM_ID = re.compile(r"updateItemStatus\('(\d+)', '(preparing|complete)'")
+
+
+class BenchClient:
+    """Uniform wrapper over requests.Session (remote app) and the Flask test client (in-process)."""
+
+    def __init__(self, recorder, base_url=None, app=None):
+        self.recorder = recorder
+        if app is not None:
+            self._client = app.test_client()
+            self._remote = False
+        else:
+            import requests
+            self._client = requests.Session()
+            self._base_url = base_url.rstrip('/')
+            self._remote = True
+
+    def request(self, method, path, label, **kwargs):
+        started = time.perf_counter()
+        try:
+            if self._remote:
+                resp = self._client.request(method, self._base_url + path, allow_redirects=False, timeout=60, **kwargs)
+                status, body = resp.status_code, resp.content
+            else:
+                resp = self._client.open(path, method=method, **kwargs)
+                status, body = resp.status_code, resp.get_data()
+        except Exception:
+            self.recorder.record(label, time.perf_counter() - started, ok=False)
+            return None, b''
+        self.recorder.record(label, time.perf_counter() - started, ok=status < 400)
+        return status, body
+
+    def get(self, path, label, **kwargs):
+        return self.request('GET', path, label, **kwargs)
+
+    def post(self, path, label, **kwargs):
+        return self.request('POST', path, label, **kwargs)
+
+
+class RunState:
+    """State shared across workers: placed-but-unpaid order ids per restaurant."""
+
+    def __init__(self):
+        self._orders = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+
+    def add_order(self, restaurant_id, order_id):
+        with self._lock:
+            queue = self._orders[restaurant_id]
+            queue.append(order_id)
+            if len(queue) > 1000:
+                queue.popleft()
+
+    def take_order(self, restaurant_id):
+        with self._lock:
+            queue = self._orders[restaurant_id]
+            return queue.popleft() if queue else None
+
+
+def _random_cart(tenant, rng):
+    items = []
+    for menu_item_id in rng.sample(tenant['item_ids'], min(len(tenant['item_ids']), rng.randint(1, 4))):
+        options = tenant['modifiers'].get(str(menu_item_id), [])
+        items.append({
+            'menu_item_id': menu_item_id,
+            'quantity': rng.randint(1, 3),
+            'modifiers': rng.sample(options, min(len(options), rng.randint(0, 2))),
+        })
+    return items
+
+
+def qr_browse(client, tenant, state, rng, manifest):
+    """Customer scans a QR code and browses: landing, menu, checkout."""
+    table = rng.choice(tenant['table_numbers'])
+    client.get(f"/qrlink/{tenant['slug']}?table={table}", 'GET qrlink.customer_view')
+    client.get(f"/qrlink/{tenant['slug']}/menu?table={table}", 'GET qrlink.customer_menu')
+    client.get(f"/qrlink/{tenant['slug']}/checkout?table={table}", 'GET qrlink.customer_checkout')
+
+
+def place_order_burst(client, tenant, state, rng, manifest, burst=3):
+    """A table submits several orders back to back, then checks the thank-you page."""
+    for _ in range(burst):
+        status, body = client.post('/qrlink/place-order', 'POST qrlink.place_order', json={
+            'restaurant_id': tenant['restaurant_id'],
+            'table_id': rng.choice(tenant['table_ids']),
+            'items': _random_cart(tenant, rng),
+        })
+        match = re.search(rb'"order_id":\s*(\d+)', body or b'')
+        if status == 200 and match:
+            order_id = int(match.group(1))
+            state.add_order(tenant['restaurant_id'], order_id)
+            client.get(f"/qrlink/{tenant['slug']}/thanks/{order_id}", 'GET qrlink.customer_thanks')
+
+
+def kitchen_bump(client, tenant, state, rng, manifest):
+    """Kitchen tablet renders the board and bumps a few items."""
+    status, body = client.get('/kitchen/orders', 'GET admin.kitchen_orders')
+    candidates = _ITEM_ID.findall((body or b'').decode('utf-8', 'ignore'))
+    for item_id, status_name in rng.sample(candidates, min(len(candidates), 3)):
+        client.post(f"/kitchen/item/{item_id}/{status_name}", 'POST admin.kitchen_update_item_status')
+
+
+def storefront_payment(client, tenant, state, rng, manifest):
+    """Cashier opens the active orders screen and takes payment for one order."""
+    client.get('/storefront/orders', 'GET admin.storefront_orders')
+    order_id = state.take_order(tenant['restaurant_id'])
+    if order_id:
+        client.get(f"/storefront/payment/{order_id}", 'GET admin.storefront_payment')
+        client.post(f"/storefront/payment/{order_id}", 'POST admin.storefront_payment',
+                    data={'action': 'mark_as_paid', 'payment_method': rng.choice(['card', 'cash', 'ewallet'])})
+
+
+def history_export(client, tenant, state, rng, manifest):
+    """Manager reviews this month's history and exports it."""
+    client.get('/office/history?date_filter=this_month', 'GET admin.history')
+    client.get('/office/history/export?date_filter=this_month', 'GET admin.office_export_history')
+
+
+# name -> (function, role that must be logged in, default weight)
+SCENARIOS = {
+    'browse': (qr_browse, None, 40),
+    'order': (place_order_burst, None, 25),
+    'kitchen': (kitchen_bump, 'kitchen', 15),
+    'payment': (storefront_payment, 'staff', 12),
+    'history': (history_export, 'admin', 3),
+}
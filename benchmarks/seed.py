@@ -0,0 +1,190 @@
+"""
+Seeds the configured database with realistic synthetic tenants for load testing.
+
+Each restaurant starts from auth_routes.preload_restaurant_data and is then filled
+in with bulk INSERTs: menu items with modifier groups/options spread over categories,
+tables across floors, staff/kitchen/admin users and a long tail of historical orders.
+A JSON manifest describing the tenants is written for benchmarks.run.
+
+    FLASK_CONFIG=production DATABASE_URL=postgresql://... \\
+        python -m benchmarks.seed --restaurants 50 --items 300 --tables 200 --orders 2000000
+
+All seeded users share the password given by --password (default 'bench').
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, func
+from werkzeug.security import generate_password_hash
+
+FLOORS = ['Ground', 'Mezzanine', 'Rooftop', 'Terrace']
+CATEGORY_NAMES = ['Starters', 'Mains', 'Noodles', 'Rice', 'Grill', 'Desserts', 'Coffee', 'Tea', 'Juices']
+MODIFIER_GROUPS = [
+    ('Size', 'single', True, [('Regular', 0.0), ('Large', 1.5)]),
+    ('Spice Level', 'single', False, [('Mild', 0.0), ('Medium', 0.0), ('Hot', 0.0)]),
+    ('Extras', 'multiple', False, [('Egg', 1.0), ('Cheese', 1.2), ('Bacon', 2.0), ('Avocado', 2.5)]),
+]
+HISTORY_STATUSES = ['completed'] * 8 + ['paid', 'cancelled']
+CHUNK = 5000
+
+
+def _chunks(rows, size=CHUNK):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _bulk_insert(db, model, rows):
+    for chunk in _chunks(rows):
+        db.session.execute(insert(model), chunk)
+
+
+def _next_id(db, model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def seed_restaurant(db, index, items, tables, password_hash, rng):
+    from project.models import (Restaurant, User, Category, MenuItem, ModifierGroup, ModifierOption,
+                                Table, Station, menu_item_categories, Menu)
+    from routes.auth_routes import preload_restaurant_data
+
+    slug = f"bench-{index:04d}"
+    restaurant = Restaurant(name=f"Bench Restaurant {index}", slug=slug, tax_rate=0.06, timezone='UTC')
+    db.session.add(restaurant)
+    db.session.flush()
+    preload_restaurant_data(restaurant.id)
+    db.session.flush()
+    rid = restaurant.id
+
+    users = {role: f"{role}-{index:04d}@bench.local" for role in ('admin', 'staff', 'kitchen')}
+    _bulk_insert(db, User, [
+        {'email': email, 'password': password_hash, 'role': role, 'restaurant_id': rid, 'is_active': True, 'password_version': 0}
+        for role, email in users.items()
+    ])
+
+    # Stations and categories (the preloaded menu is extended to cover all of them)
+    _bulk_insert(db, Station, [{'name': name, 'restaurant_id': rid} for name in ('Grill', 'Bar', 'Cold')])
+    station_ids = [s.id for s in Station.query.filter_by(restaurant_id=rid).all()]
+    _bulk_insert(db, Category, [{'name': name, 'restaurant_id': rid, 'is_active': True} for name in CATEGORY_NAMES])
+    categories = Category.query.filter_by(restaurant_id=rid).all()
+    menu = Menu.query.filter_by(restaurant_id=rid).first()
+    for category in categories:
+        if category not in menu.categories:
+            menu.categories.append(category)
+
+    # Menu items with modifier groups and options (explicit ids so children can reference them)
+    item_id = _next_id(db, MenuItem)
+    item_rows, link_rows = [], []
+    for n in range(items):
+        item_rows.append({
+            'id': item_id + n, 'name': f"Dish {n}", 'sku': f"B{index:04d}-{n:05d}",
+            'price': round(rng.uniform(2, 30), 2), 'description': f"Synthetic dish {n} for benchmarking.",
+            'is_available': rng.random() > 0.05, 'restaurant_id': rid, 'station_id': rng.choice(station_ids)
+        })
+        link_rows.append({'menu_item_id': item_id + n, 'category_id': rng.choice(categories).id})
+    _bulk_insert(db, MenuItem, item_rows)
+    for chunk in _chunks(link_rows):
+        db.session.execute(menu_item_categories.insert(), chunk)
+
+    group_id = _next_id(db, ModifierGroup)
+    group_rows, option_rows, option_ids = [], [], {}
+    for row in item_rows:
+        for name, selection_type, required, options in rng.sample(MODIFIER_GROUPS, rng.randint(0, len(MODIFIER_GROUPS))):
+            group_rows.append({
+                'id': group_id, 'name': name, 'selection_type': selection_type, 'is_required': required,
+                'min_selection': 1 if required else 0, 'menu_item_id': row['id']
+            })
+            for option_name, price in options:
+                option_rows.append({'name': option_name, 'price_override': price, 'group_id': group_id})
+            group_id += 1
+    _bulk_insert(db, ModifierGroup, group_rows)
+    _bulk_insert(db, ModifierOption, option_rows)
+    for option in db.session.query(ModifierOption.id, ModifierGroup.menu_item_id).join(ModifierGroup).filter(
+            ModifierGroup.menu_item_id >= item_id).all():
+        option_ids.setdefault(option[1], []).append(option[0])
+
+    # Tables across floors; the two preloaded tables are numbers 1 and 2
+    _bulk_insert(db, Table, [{
+        'number': str(n), 'restaurant_id': rid, 'floor': FLOORS[n % len(FLOORS)],
+        'seating_capacity': rng.choice([2, 4, 6, 8]), 'status': 'available', 'reservation_info': {}
+    } for n in range(3, tables + 1)])
+    table_ids = [t.id for t in db.session.query(Table.id).filter_by(restaurant_id=rid).all()]
+
+    return {
+        'restaurant_id': rid,
+        'slug': slug,
+        'users': users,
+        'table_ids': table_ids,
+        'table_numbers': [str(n) for n in range(1, tables + 1)],
+        'item_ids': [row['id'] for row in item_rows if row['is_available']],
+        'item_prices': {row['id']: row['price'] for row in item_rows},
+        'modifiers': {str(k): v for k, v in option_ids.items()},
+    }
+
+
+def seed_history(db, tenants, orders, rng, days=90):
+    """Bulk-inserts `orders` historical orders spread across tenants and the last `days` days."""
+    from project.models import Order, OrderItem
+
+    now = datetime.utcnow()
+    order_id = _next_id(db, Order)
+    remaining = orders
+    while remaining > 0:
+        batch = min(remaining, CHUNK)
+        order_rows, item_rows = [], []
+        for _ in range(batch):
+            tenant = rng.choice(tenants)
+            created = now - timedelta(seconds=rng.randint(3600, days * 86400))
+            order_rows.append({
+                'id': order_id, 'restaurant_id': tenant['restaurant_id'], 'table_id': rng.choice(tenant['table_ids']),
+                'created_at': created, 'status': rng.choice(HISTORY_STATUSES),
+                'payment_method': rng.choice(['card', 'cash', 'ewallet'])
+            })
+            for menu_item_id in rng.sample(tenant['item_ids'], min(len(tenant['item_ids']), rng.randint(1, 4))):
+                item_rows.append({
+                    'order_id': order_id, 'menu_item_id': menu_item_id, 'quantity': rng.randint(1, 3),
+                    'status': 'served', 'created_at': created
+                })
+            order_id += 1
+        db.session.execute(insert(Order), order_rows)
+        db.session.execute(insert(OrderItem), item_rows)
+        db.session.commit()
+        remaining -= batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--restaurants', type=int, default=20)
+    parser.add_argument('--items', type=int, default=200, help='Menu items per restaurant')
+    parser.add_argument('--tables', type=int, default=100, help='Tables per restaurant')
+    parser.add_argument('--orders', type=int, default=100000, help='Historical orders across all restaurants')
+    parser.add_argument('--password', default='bench')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default='benchmarks/tenants.json', help='Manifest path for benchmarks.run')
+    args = parser.parse_args()
+
+    from app import app
+    from extensions import db
+
+    rng = random.Random(args.seed)
+    password_hash = generate_password_hash(args.password)
+    started = time.perf_counter()
+    with app.app_context():
+        first = db.session.query(func.count()).select_from(db.metadata.tables['restaurant']).scalar() + 1
+        tenants = []
+        for index in range(first, first + args.restaurants):
+            tenants.append(seed_restaurant(db, index, args.items, args.tables, password_hash, rng))
+            db.session.commit()
+        print(f"Seeded {len(tenants)} restaurants in {time.perf_counter() - started:.1f}s")
+        seed_history(db, tenants, args.orders, rng)
+        print(f"Seeded {args.orders} historical orders in {time.perf_counter() - started:.1f}s total")
+
+    with open(args.out, 'w') as f:
+        json.dump({'password': args.password, 'tenants': tenants}, f)
+    print(f"Manifest written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Concurrency benchmark for the SQLite deployment profile.
+
+Spawns several worker processes (like gunicorn workers), each running a few threads
+that place customer orders and bump kitchen item statuses against one shared SQLite
+file, then reports throughput, latency and "database is locked" errors.
+
+    python -m benchmarks.sqlite_concurrency --config sqlite --processes 4 --threads 8 --seconds 20
+    python -m benchmarks.sqlite_concurrency --config development   # plain SQLite for comparison
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+
+def _load_app(config_name, db_path):
+    os.environ['FLASK_CONFIG'] = config_name
+    os.environ['SQLITE_DATABASE_PATH'] = db_path
+    os.environ['DEV_DATABASE_URL'] = 'sqlite:///' + db_path
+    from app import app
+    return app
+
+
+def seed(config_name, db_path):
+    app = _load_app(config_name, db_path)
+    from werkzeug.security import generate_password_hash
+    from extensions import db
+    from project.models import Restaurant, User, MenuItem
+    from routes.auth_routes import preload_restaurant_data
+
+    with app.app_context():
+        restaurant = Restaurant(name='Bench Bistro', slug='bench-bistro')
+        db.session.add(restaurant)
+        db.session.flush()
+        preload_restaurant_data(restaurant.id)
+        db.session.add(User(
+            email='bench@example.com',
+            password=generate_password_hash('bench'),
+            role='admin',
+            restaurant_id=restaurant.id,
+            is_active=True
+        ))
+        db.session.commit()
+        item_id = MenuItem.query.filter_by(restaurant_id=restaurant.id).first().id
+        return restaurant.id, item_id
+
+
+def _client_loop(app, restaurant_id, item_id, deadline, stats):
+    client = app.test_client()
+    client.post('/login', data={'email': 'bench@example.com', 'password': 'bench'})
+    while time.monotonic() < deadline:
+        try:
+            started = time.perf_counter()
+            resp = client.post('/qrlink/place-order', json={
+                'restaurant_id': restaurant_id,
+                'items': [{'menu_item_id': item_id, 'quantity': random.randint(1, 3)}]
+            })
+            stats['latencies'].append(time.perf_counter() - started)
+            if resp.status_code != 200:
+                stats['errors'] += 1
+                continue
+            stats['orders'] += 1
+
+            from project.models import OrderItem
+            with app.app_context():
+                order_item = OrderItem.query.filter_by(order_id=resp.get_json()['order_id']).first()
+                order_item_id = order_item.id if order_item else None
+            if order_item_id:
+                started = time.perf_counter()
+                resp = client.post(f'/kitchen/item/{order_item_id}/preparing')
+                stats['latencies'].append(time.perf_counter() - started)
+                if resp.status_code == 200:
+                    stats['updates'] += 1
+                else:
+                    stats['errors'] += 1
+        except Exception as e:
+            stats['errors'] += 1
+            if 'locked' in str(e):
+                stats['locked'] += 1
+
+
+def _worker(config_name, db_path, restaurant_id, item_id, threads, seconds, results):
+    app = _load_app(config_name, db_path)
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    deadline = time.monotonic() + seconds
+    stats = {'orders': 0, 'updates': 0, 'errors': 0, 'locked': 0, 'latencies': []}
+    pool = [threading.Thread(target=_client_loop, args=(app, restaurant_id, item_id, deadline, stats)) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', default='sqlite', help="Config name from config.py ('sqlite' or 'development')")
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--db', help='SQLite file to use (defaults to a fresh temp file)')
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='oda-bench-'), 'bench.db')
+    ctx = multiprocessing.get_context('spawn')
+
+    # Seed in a child so the parent never holds the database open
+    with ctx.Pool(1) as pool:
+        restaurant_id, item_id = pool.apply(seed, (args.config, db_path))
+
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(args.config, db_path, restaurant_id, item_id, args.threads, args.seconds, results))
+             for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    collected = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    orders = sum(s['orders'] for s in collected)
+    updates = sum(s['updates'] for s in collected)
+    errors = sum(s['errors'] for s in collected)
+    locked = sum(s['locked'] for s in collected)
+    latencies = sorted(l for s in collected for l in s['latencies'])
+
+    print(f"config={args.config} processes={args.processes} threads={args.threads} seconds={args.seconds}")
+    print(f"orders placed:      {orders} ({orders / args.seconds:.1f}/s)")
+    print(f"status updates:     {updates} ({updates / args.seconds:.1f}/s)")
+    print(f"errors:             {errors} (database is locked: {locked})")
+    if latencies:
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"latency p50/p95 ms: {statistics.median(latencies) * 1000:.1f} / {p95 * 1000:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Cold-start benchmark: how long a fresh process takes to import the app and answer its
+first request.
+
+Each run starts a new interpreter, so nothing is shared between runs except the on-disk
+template bytecode cache. The "fast" profile sets AUTO_CREATE_SCHEMA=false and precompiles
+templates into a temporary JINJA_BYTECODE_CACHE_DIR first. Pass --compare to run both profiles.
+
+    python -m benchmarks.startup                      # 5 runs of the current configuration
+    python -m benchmarks.startup --compare --runs 9   # current configuration vs the fast profile
+    python -m benchmarks.startup --gunicorn           # real gunicorn worker, polled over HTTP
+    python -m benchmarks.startup --gunicorn --worker-class sync
+
+The database is whatever FLASK_CONFIG / DATABASE_URL point at; the first request is an
+anonymous GET of --path (the landing page by default).
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IN_PROCESS = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+status = app.app.test_client().get(sys.argv[1]).status_code
+done = time.perf_counter()
+print(json.dumps({'import_s': imported - started, 'first_request_s': done - imported, 'status': status}))
+"""
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run_in_process(env, path):
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', _IN_PROCESS, path], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['total_s'] = time.perf_counter() - started
+    return result
+
+
+def run_gunicorn(env, path, worker_class='eventlet', timeout=60):
+    port = _free_port()
+    env = {**env, 'GUNICORN_BIND': f'127.0.0.1:{port}'}
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--worker-class', worker_class,
+                               '-w', '1', 'app:app'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=5) as response:
+                    return {'total_s': time.perf_counter() - started, 'status': response.status}
+            except urllib.error.HTTPError as e:
+                return {'total_s': time.perf_counter() - started, 'status': e.code}
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit(f'gunicorn did not answer within {timeout}s')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def fast_profile(env, cache_dir):
+    env = {**env, 'AUTO_CREATE_SCHEMA': 'false', 'JINJA_BYTECODE_CACHE_DIR': cache_dir}
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'compile-templates'], cwd=ROOT, env=env,
+                   capture_output=True, check=True)
+    return env
+
+
+def measure(label, env, args):
+    if args.gunicorn:
+        results = [run_gunicorn(env, args.path, args.worker_class) for _ in range(args.runs)]
+    else:
+        results = [run_in_process(env, args.path) for _ in range(args.runs)]
+    summary = {'profile': label, 'runs': args.runs, 'status': results[-1]['status']}
+    for key in ('import_s', 'first_request_s', 'total_s'):
+        if key in results[0]:
+            summary[key] = round(statistics.median(r[key] for r in results), 4)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--gunicorn', action='store_true', help='Boot a real gunicorn worker instead of the test client')
+    parser.add_argument('--worker-class', default='eventlet', help='gunicorn worker class for --gunicorn')
+    parser.add_argument('--compare', action='store_true', help='Also measure the fast startup profile')
+    parser.add_argument('--json', action='store_true', help='Print the summaries as JSON')
+    args = parser.parse_args()
+
+    env = {**os.environ, 'WARMUP_CACHES': ''}
+    summaries = [measure('current', env, args)]
+    if args.compare:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            summaries.append(measure('fast', fast_profile(env, cache_dir), args))
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+        return
+    print(f"{'profile':<10}{'import':>10}{'first req':>12}{'total':>10}  (median of {args.runs}, seconds)")
+    for s in summaries:
+        print(f"{s['profile']:<10}{s.get('import_s', float('nan')):>10.3f}"
+              f"{s.get('first_request_s', float('nan')):>12.3f}{s['total_s']:>10.3f}  HTTP {s['status']}")
+
+
+if __name__ == '__main__':
+    main()
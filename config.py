@@ -2,10 +2,37 @@ import os
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+def _env_flag(name, default):
+    return os.environ.get(name, default).lower() in ['true', 'on', '1']
+
+def _pool_options(prefix='DB_'):
+    """SQLAlchemy pool settings read from <prefix>POOL_SIZE, <prefix>MAX_OVERFLOW, etc."""
+    return {
+        'pool_size': int(os.environ.get(prefix + 'POOL_SIZE', '10')),
+        'max_overflow': int(os.environ.get(prefix + 'MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.environ.get(prefix + 'POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.environ.get(prefix + 'POOL_RECYCLE', '1800')),
+        'pool_pre_ping': _env_flag(prefix + 'POOL_PRE_PING', 'true'),
+    }
+
 class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'hard-to-guess-string'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection Pooling
+    SQLALCHEMY_ENGINE_OPTIONS = _pool_options()
+
+    # Read Replica (e.g. READ_DATABASE_URL=postgresql://.../oda_replica)
+    # Only READ_ONLY_BLUEPRINTS / READ_ONLY_ENDPOINTS read from it, and a user session
+    # reads from the primary for READ_YOUR_WRITES_SECONDS after it commits a write.
+    READ_DATABASE_URL = os.environ.get('READ_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': {'url': READ_DATABASE_URL, **_pool_options('DB_READ_')}} if READ_DATABASE_URL else {}
+    SQLALCHEMY_READ_BIND = 'replica' if READ_DATABASE_URL else None
+    SQLALCHEMY_READ_ROUTING = 'endpoints'
+    READ_ONLY_BLUEPRINTS = ['analytics', 'sysadmin']
+    READ_ONLY_ENDPOINTS = ['admin.history', 'admin.office_export_history']
+    READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', '5'))
     
     # Upload Configuration
     UPLOAD_FOLDER = os.path.join(basedir, 'static/uploads/menu_items')
@@ -14,17 +41,106 @@ class Config:
     # Email Configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.googlemail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', '587'))
-    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
+    MAIL_USE_TLS = _env_flag('MAIL_USE_TLS', 'true')
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+
+    # Mail Outbox: send_email only enqueues; a sender thread per serving worker delivers.
+    # Set MAIL_OUTBOX_SENDER=false to deliver from cron with `flask send-outbox` instead.
+    MAIL_OUTBOX_SENDER = _env_flag('MAIL_OUTBOX_SENDER', 'true')
+    MAIL_OUTBOX_INTERVAL_SECONDS = int(os.environ.get('MAIL_OUTBOX_INTERVAL_SECONDS', '10'))
+    MAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('MAIL_OUTBOX_BATCH_SIZE', '50'))
+    MAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('MAIL_OUTBOX_MAX_ATTEMPTS', '8'))
+    MAIL_OUTBOX_BACKOFF_SECONDS = int(os.environ.get('MAIL_OUTBOX_BACKOFF_SECONDS', '30'))
+    MAIL_OUTBOX_MAX_BACKOFF_SECONDS = int(os.environ.get('MAIL_OUTBOX_MAX_BACKOFF_SECONDS', '3600'))
+    MAIL_OUTBOX_CONNECTION_IDLE_SECONDS = int(os.environ.get('MAIL_OUTBOX_CONNECTION_IDLE_SECONDS', '60'))
+    
+    # Identity Cache: seconds a logged-in user's identity and restaurant summary are reused
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', '30'))
+    # Tenant Cache: seconds qrlink slug and table lookups are reused (project/tenancy.py)
+    TENANT_CACHE_TTL = int(os.environ.get('TENANT_CACHE_TTL', '30'))
     
     # Master System Admin
     MASTER_SYSTEM_ADMIN_EMAIL = os.environ.get('MASTER_SYSTEM_ADMIN_EMAIL', 'yokesan@paydee.co')
 
+    # Logging: LOG_LEVELS overrides per module, e.g. "routes.routes=DEBUG,routes.email=WARNING".
+    # LOG_DEBUG_SAMPLE_RATE keeps a fraction of DEBUG records (individual calls may override it).
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '1.0'))
+
+    # SQL Profiling (opt-in): per-request statement counts, DB time and N+1 detection
+    SQL_PROFILER_ENABLED = _env_flag('SQL_PROFILER_ENABLED', 'false')
+    SQL_PROFILER_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_PROFILER_N_PLUS_ONE_THRESHOLD', '5'))
+
+    # Prometheus metrics at METRICS_PATH (set PROMETHEUS_MULTIPROC_DIR under gunicorn)
+    METRICS_ENABLED = _env_flag('METRICS_ENABLED', 'false')
+    METRICS_PATH = os.environ.get('METRICS_PATH', '/metrics')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Request Profiler: sysadmins arm stack sampling for the next N matching requests
+    REQUEST_PROFILER_ENABLED = _env_flag('REQUEST_PROFILER_ENABLED', 'false')
+    REQUEST_PROFILER_DIR = os.environ.get('REQUEST_PROFILER_DIR') # Shared by all workers; defaults to instance/profiles
+    REQUEST_PROFILER_INTERVAL_MS = float(os.environ.get('REQUEST_PROFILER_INTERVAL_MS', '5'))
+
+    # Order Tracing: ring buffer of spans, optionally exported as Zipkin v2 JSON
+    TRACING_ENABLED = _env_flag('TRACING_ENABLED', 'false')
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '1.0'))
+    TRACE_BUFFER_SIZE = int(os.environ.get('TRACE_BUFFER_SIZE', '2000'))
+    TRACE_EXPORT_PATH = os.environ.get('TRACE_EXPORT_PATH') # e.g. instance/traces.jsonl
+    TRACE_COLLECTOR_URL = os.environ.get('TRACE_COLLECTOR_URL') # e.g. http://localhost:9411/api/v2/spans
+
+    # Startup: with AUTO_CREATE_SCHEMA=false workers skip the schema upgrade and deploys run
+    # `flask upgrade-schema`; `flask compile-templates` fills JINJA_BYTECODE_CACHE_DIR.
+    # WARMUP_CACHES (templates, database, restaurants) is warmed in the background once a worker is up.
+    AUTO_CREATE_SCHEMA = _env_flag('AUTO_CREATE_SCHEMA', 'true')
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR') # e.g. instance/jinja-cache
+    WARMUP_CACHES = os.environ.get('WARMUP_CACHES', 'templates,database')
+    WARMUP_RESTAURANT_LIMIT = int(os.environ.get('WARMUP_RESTAURANT_LIMIT', '200'))
+
+    # Response Compression: gzip/brotli for text responses of at least COMPRESSION_MIN_SIZE bytes
+    COMPRESSION_ENABLED = _env_flag('COMPRESSION_ENABLED', 'true')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+    COMPRESSION_CACHE_SIZE = int(os.environ.get('COMPRESSION_CACHE_SIZE', '256'))
+    COMPRESSION_CACHE_TTL = int(os.environ.get('COMPRESSION_CACHE_TTL', '3600'))
+    COMPRESSION_MIMETYPES = ['text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+                             'application/javascript', 'application/json', 'image/svg+xml']
+
+    # Static Assets: url_for('static') uses project/static/dist/manifest.json from `flask build-assets`
+    ASSET_MANIFEST_ENABLED = _env_flag('ASSET_MANIFEST_ENABLED', 'true')
+
+    # Fragment Cache: {% cache %} blocks, keyed on per-restaurant data versions (project/fragment_cache.py)
+    FRAGMENT_CACHE_ENABLED = _env_flag('FRAGMENT_CACHE_ENABLED', 'true')
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', '1000'))
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', '3600'))
+
+    # Offline Customer Client: service worker app shell for /qrlink/ and menu bundle snapshots per menu version
+    QRLINK_OFFLINE_ENABLED = _env_flag('QRLINK_OFFLINE_ENABLED', 'true')
+    MENU_BUNDLE_CACHE_SIZE = int(os.environ.get('MENU_BUNDLE_CACHE_SIZE', '200'))
+
+    # JSON API (/api/v1): fields= replaces flask-restx's X-Fields mask, and 404s stay plain
+    RESTX_MASK_SWAGGER = False
+    RESTX_ERROR_404_HELP = False
+    BOOTSTRAP_CACHE_SIZE = int(os.environ.get('BOOTSTRAP_CACHE_SIZE', '500')) # Built screen sections, per process
+
+    # Background Jobs: serving workers schedule the sweeper and take turns through a lease row
+    # (project/sweeper.py); leave it off and run `flask sweep-orders` from cron instead if preferred.
+    SCHEDULER_API_ENABLED = False
+    ORDER_SWEEPER_ENABLED = _env_flag('ORDER_SWEEPER_ENABLED', 'false')
+    ORDER_SWEEPER_INTERVAL_MINUTES = int(os.environ.get('ORDER_SWEEPER_INTERVAL_MINUTES', '15'))
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     ENV = 'development'
+    SQL_PROFILER_HEADERS = True
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+    FRAGMENT_CACHE_ENABLED = _env_flag('FRAGMENT_CACHE_ENABLED', 'false') # So template edits show up on reload
+    ASSET_MANIFEST_ENABLED = _env_flag('ASSET_MANIFEST_ENABLED', 'false') # Serve the files being edited, not a stale build
+    QRLINK_OFFLINE_ENABLED = _env_flag('QRLINK_OFFLINE_ENABLED', 'false') # A cached app shell hides template edits
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'dev.db')
 
@@ -32,11 +148,38 @@ class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
     ENV = 'production'
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR', os.path.join(basedir, 'instance', 'jinja-cache'))
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'prod.db')
 
+class SQLiteProductionConfig(ProductionConfig):
+    """Production on a single SQLite file: WAL, tuned pragmas, one writer and a read-only pool."""
+    SQLITE_PROFILE = True
+    SQLITE_DATABASE_PATH = os.environ.get('SQLITE_DATABASE_PATH') or os.path.join(basedir, 'prod.db')
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + SQLITE_DATABASE_PATH
+    # A single writer connection per process; concurrent write transactions wait for it
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 30}
+    SQLALCHEMY_BINDS = {
+        'reader': {
+            'url': 'sqlite:///file:' + SQLITE_DATABASE_PATH + '?mode=ro&uri=true',
+            'pool_size': int(os.environ.get('SQLITE_READ_POOL_SIZE', '8')),
+            'max_overflow': 4,
+        }
+    }
+    SQLALCHEMY_READ_BIND = 'reader'
+    SQLALCHEMY_READ_ROUTING = 'all'
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    }
+    SQLITE_WRITE_BATCH_SIZE = 50
+    SQLITE_WRITE_BATCH_WINDOW_MS = 5
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'sqlite': SQLiteProductionConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
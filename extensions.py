@@ -2,8 +2,11 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO
 from flask_login import LoginManager
 from flask_mail import Mail
+from flask_apscheduler import APScheduler
+from project.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 socketio = SocketIO(cors_allowed_origins="*")
 login_manager = LoginManager()
-mail = Mail()
\ No newline at end of file
+mail = Mail()
+scheduler = APScheduler()
\ No newline at end of file
@@ -0,0 +1,36 @@
+# gunicorn -c gunicorn.conf.py --worker-class eventlet -w 4 app:app
+#
+# With METRICS_ENABLED, export PROMETHEUS_MULTIPROC_DIR (an empty directory, wiped on deploy)
+# so /metrics aggregates every worker.
+#
+# For fast worker boots: AUTO_CREATE_SCHEMA=false with `flask upgrade-schema` in the deploy
+# step, and JINJA_BYTECODE_CACHE_DIR filled by `flask compile-templates` at build time.
+#
+# Run `flask build-assets` at build time too: production serves fingerprinted, immutable
+# static files from project/static/dist (ASSET_MANIFEST_ENABLED).
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+
+def on_starting(server):
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from project.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # The worker is ready to accept requests; fill WARMUP_CACHES without delaying it
+    from project.outbox import start_outbox_sender
+    from project.startup import start_warmup
+    from project.sweeper import start_sweeper
+    start_warmup(worker.wsgi)
+    start_sweeper(worker.wsgi) # workers share one job lease, so only one of them sweeps
+    start_outbox_sender(worker.wsgi)
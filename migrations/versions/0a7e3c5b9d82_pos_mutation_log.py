@@ -0,0 +1,40 @@
+"""POS mutation log for offline replay and dedupe
+
+Revision ID: 0a7e3c5b9d82
+Revises: f40b8d2e7a61
+Create Date: 2026-10-19 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a7e3c5b9d82'
+down_revision = 'f40b8d2e7a61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'pos_mutation' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('pos_mutation',
+        sa.Column('id', sa.String(length=64), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('type', sa.String(length=30), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pos_mutation_created_at'), 'pos_mutation', ['created_at'], unique=False)
+    op.create_index(op.f('ix_pos_mutation_restaurant_id'), 'pos_mutation', ['restaurant_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_pos_mutation_restaurant_id'), table_name='pos_mutation')
+    op.drop_index(op.f('ix_pos_mutation_created_at'), table_name='pos_mutation')
+    op.drop_table('pos_mutation')
@@ -0,0 +1,31 @@
+"""Job leases, so one worker at a time runs the stale-order sweeper
+
+Revision ID: 1b5d8f0e3c96
+Revises: 0a7e3c5b9d82
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b5d8f0e3c96'
+down_revision = '0a7e3c5b9d82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'job_lease' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('job_lease',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('holder', sa.String(length=32), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('job_lease')
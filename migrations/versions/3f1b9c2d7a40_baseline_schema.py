@@ -0,0 +1,229 @@
+"""Baseline schema
+
+Every table as it was before the first migration. Databases that db.create_all() already
+set up have all of them, so only the missing ones are created.
+
+Revision ID: 3f1b9c2d7a40
+Revises: 
+Create Date: 2026-10-19 10:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1b9c2d7a40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'global_announcement' not in existing:
+        op.create_table('global_announcement',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=100), nullable=False),
+            sa.Column('message', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('level', sa.String(length=20), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'restaurant' not in existing:
+        op.create_table('restaurant',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('slug', sa.String(length=50), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('logo_path', sa.String(length=255), nullable=True),
+            sa.Column('logo_data', sa.LargeBinary(), nullable=True),
+            sa.Column('logo_mimetype', sa.String(length=50), nullable=True),
+            sa.Column('brand_color', sa.String(length=7), nullable=True),
+            sa.Column('banner_image', sa.String(length=255), nullable=True),
+            sa.Column('banner_data', sa.LargeBinary(), nullable=True),
+            sa.Column('banner_mimetype', sa.String(length=50), nullable=True),
+            sa.Column('tagline', sa.String(length=200), nullable=True),
+            sa.Column('pages_config', sa.JSON(), nullable=True),
+            sa.Column('qr_config', sa.JSON(), nullable=True),
+            sa.Column('address', sa.String(length=255), nullable=True),
+            sa.Column('phone_number', sa.String(length=50), nullable=True),
+            sa.Column('tax_id', sa.String(length=100), nullable=True),
+            sa.Column('tax_rate', sa.Float(), nullable=True),
+            sa.Column('timezone', sa.String(length=100), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('slug')
+        )
+    if 'category' not in existing:
+        op.create_table('category',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('restaurant_id', sa.Integer(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'menu' not in existing:
+        op.create_table('menu',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('description', sa.String(length=200), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('restaurant_id', sa.Integer(), nullable=True),
+            sa.Column('start_time', sa.Time(), nullable=True),
+            sa.Column('end_time', sa.Time(), nullable=True),
+            sa.Column('start_date', sa.Date(), nullable=True),
+            sa.Column('end_date', sa.Date(), nullable=True),
+            sa.Column('active_days', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'station' not in existing:
+        op.create_table('station',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('restaurant_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'table' not in existing:
+        op.create_table('table',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('number', sa.String(length=10), nullable=True),
+            sa.Column('qr_identifier', sa.String(length=100), nullable=True),
+            sa.Column('restaurant_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('floor', sa.String(length=50), nullable=True),
+            sa.Column('seating_capacity', sa.Integer(), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('reservation_info', sa.JSON(), nullable=True),
+            sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'user' not in existing:
+        op.create_table('user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=100), nullable=True),
+            sa.Column('password', sa.String(length=255), nullable=True),
+            sa.Column('role', sa.String(length=20), nullable=True),
+            sa.Column('restaurant_id', sa.Integer(), nullable=True),
+            sa.Column('password_version', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=False),
+            sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email')
+        )
+    if 'menu_category_association' not in existing:
+        op.create_table('menu_category_association',
+            sa.Column('menu_id', sa.Integer(), nullable=False),
+            sa.Column('category_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['category_id'], ['category.id'], ),
+            sa.ForeignKeyConstraint(['menu_id'], ['menu.id'], ),
+            sa.PrimaryKeyConstraint('menu_id', 'category_id')
+        )
+    if 'menu_item' not in existing:
+        op.create_table('menu_item',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('sku', sa.String(length=50), nullable=True),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('compare_at_price', sa.Float(), nullable=True),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('image_filename', sa.String(length=255), nullable=True),
+            sa.Column('image_data', sa.LargeBinary(), nullable=True),
+            sa.Column('image_mimetype', sa.String(length=50), nullable=True),
+            sa.Column('is_available', sa.Boolean(), nullable=True),
+            sa.Column('restaurant_id', sa.Integer(), nullable=True),
+            sa.Column('station_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+            sa.ForeignKeyConstraint(['station_id'], ['station.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'order' not in existing:
+        op.create_table('order',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('table_id', sa.Integer(), nullable=True),
+            sa.Column('restaurant_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('payment_method', sa.String(length=50), nullable=True),
+            sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+            sa.ForeignKeyConstraint(['table_id'], ['table.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'menu_item_categories' not in existing:
+        op.create_table('menu_item_categories',
+            sa.Column('menu_item_id', sa.Integer(), nullable=False),
+            sa.Column('category_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['category_id'], ['category.id'], ),
+            sa.ForeignKeyConstraint(['menu_item_id'], ['menu_item.id'], ),
+            sa.PrimaryKeyConstraint('menu_item_id', 'category_id')
+        )
+    if 'modifier_group' not in existing:
+        op.create_table('modifier_group',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=50), nullable=True),
+            sa.Column('is_required', sa.Boolean(), nullable=True),
+            sa.Column('selection_type', sa.String(length=20), nullable=True),
+            sa.Column('min_selection', sa.Integer(), nullable=True),
+            sa.Column('max_selection', sa.Integer(), nullable=True),
+            sa.Column('menu_item_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['menu_item_id'], ['menu_item.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'order_item' not in existing:
+        op.create_table('order_item',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('menu_item_id', sa.Integer(), nullable=True),
+            sa.Column('quantity', sa.Integer(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['menu_item_id'], ['menu_item.id'], ),
+            sa.ForeignKeyConstraint(['order_id'], ['order.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'modifier_option' not in existing:
+        op.create_table('modifier_option',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=50), nullable=True),
+            sa.Column('price_override', sa.Float(), nullable=True),
+            sa.Column('group_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['group_id'], ['modifier_group.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'order_item_modifier_options' not in existing:
+        op.create_table('order_item_modifier_options',
+            sa.Column('order_item_id', sa.Integer(), nullable=False),
+            sa.Column('modifier_option_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['modifier_option_id'], ['modifier_option.id'], ),
+            sa.ForeignKeyConstraint(['order_item_id'], ['order_item.id'], ),
+            sa.PrimaryKeyConstraint('order_item_id', 'modifier_option_id')
+        )
+
+
+def downgrade():
+    op.drop_table('order_item_modifier_options')
+    op.drop_table('modifier_option')
+    op.drop_table('order_item')
+    op.drop_table('modifier_group')
+    op.drop_table('menu_item_categories')
+    op.drop_table('order')
+    op.drop_table('menu_item')
+    op.drop_table('menu_category_association')
+    op.drop_table('user')
+    op.drop_table('table')
+    op.drop_table('station')
+    op.drop_table('menu')
+    op.drop_table('category')
+    op.drop_table('restaurant')
+    op.drop_table('global_announcement')
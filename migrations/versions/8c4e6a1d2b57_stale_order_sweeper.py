@@ -0,0 +1,54 @@
+"""Stale-order sweeper: per-restaurant rules, flagged orders and the order audit log
+
+Revision ID: 8c4e6a1d2b57
+Revises: 3f1b9c2d7a40
+Create Date: 2026-10-19 10:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e6a1d2b57'
+down_revision = '3f1b9c2d7a40'
+branch_labels = None
+depends_on = None
+
+
+def _columns(inspector, table):
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'sweeper_config' not in _columns(inspector, 'restaurant'):
+        op.add_column('restaurant', sa.Column('sweeper_config', sa.JSON(), nullable=True))
+    if 'flagged_at' not in _columns(inspector, 'order'):
+        op.add_column('order', sa.Column('flagged_at', sa.DateTime(), nullable=True))
+    if 'order_audit_log' not in inspector.get_table_names():
+        op.create_table('order_audit_log',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('restaurant_id', sa.Integer(), nullable=True),
+            sa.Column('action', sa.String(length=50), nullable=False),
+            sa.Column('from_status', sa.String(length=20), nullable=True),
+            sa.Column('to_status', sa.String(length=20), nullable=True),
+            sa.Column('source', sa.String(length=50), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['order_id'], ['order.id'], ),
+            sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_order_audit_log_order_id'), 'order_audit_log', ['order_id'], unique=False)
+        op.create_index(op.f('ix_order_audit_log_restaurant_id'), 'order_audit_log', ['restaurant_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_order_audit_log_restaurant_id'), table_name='order_audit_log')
+    op.drop_index(op.f('ix_order_audit_log_order_id'), table_name='order_audit_log')
+    op.drop_table('order_audit_log')
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.drop_column('flagged_at')
+    with op.batch_alter_table('restaurant') as batch_op:
+        batch_op.drop_column('sweeper_config')
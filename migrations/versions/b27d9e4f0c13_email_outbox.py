@@ -0,0 +1,46 @@
+"""Email outbox
+
+Revision ID: b27d9e4f0c13
+Revises: 8c4e6a1d2b57
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b27d9e4f0c13'
+down_revision = '8c4e6a1d2b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'outbox_message' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('outbox_message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipient', sa.String(length=255), nullable=False),
+        sa.Column('sender', sa.String(length=255), nullable=True),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('body_text', sa.Text(), nullable=True),
+        sa.Column('body_html', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('claimed_by', sa.String(length=32), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbox_message_next_attempt_at'), 'outbox_message', ['next_attempt_at'], unique=False)
+    op.create_index(op.f('ix_outbox_message_status'), 'outbox_message', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_outbox_message_status'), table_name='outbox_message')
+    op.drop_index(op.f('ix_outbox_message_next_attempt_at'), table_name='outbox_message')
+    op.drop_table('outbox_message')
@@ -0,0 +1,30 @@
+"""User.password_version, now part of every session id
+
+Databases whose user table predates the column get it with the model default of 0, so
+existing users keep a valid get_id() and their reset tokens still verify.
+
+Revision ID: c5a80f3e6d29
+Revises: b27d9e4f0c13
+Create Date: 2026-10-19 10:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a80f3e6d29'
+down_revision = 'b27d9e4f0c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('user')}
+    if 'password_version' not in columns:
+        op.add_column('user', sa.Column('password_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    # The baseline revision already creates the column; dropping it here would break that schema
+    pass
@@ -0,0 +1,32 @@
+"""Per-restaurant data version counters
+
+Revision ID: d93f2b7c8e04
+Revises: c5a80f3e6d29
+Create Date: 2026-10-19 10:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd93f2b7c8e04'
+down_revision = 'c5a80f3e6d29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'data_version' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('data_version',
+        sa.Column('restaurant_id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+        sa.PrimaryKeyConstraint('restaurant_id', 'scope')
+    )
+
+
+def downgrade():
+    op.drop_table('data_version')
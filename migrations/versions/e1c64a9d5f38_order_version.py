@@ -0,0 +1,29 @@
+"""Order.version for ETags and conditional updates
+
+Existing orders start at version 1, like new ones.
+
+Revision ID: e1c64a9d5f38
+Revises: d93f2b7c8e04
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1c64a9d5f38'
+down_revision = 'd93f2b7c8e04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('order')}
+    if 'version' not in columns:
+        op.add_column('order', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,34 @@
+"""Order.client_token, the idempotency key of offline customer orders
+
+SQLite cannot add a UNIQUE column, so uniqueness comes from a unique index. Databases
+that create_all() built with the column already have a UNIQUE constraint instead.
+
+Revision ID: f40b8d2e7a61
+Revises: e1c64a9d5f38
+Create Date: 2026-10-19 11:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f40b8d2e7a61'
+down_revision = 'e1c64a9d5f38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('order')}
+    if 'client_token' not in columns:
+        op.add_column('order', sa.Column('client_token', sa.String(length=64), nullable=True))
+        op.create_index('ix_order_client_token', 'order', ['client_token'], unique=True)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'ix_order_client_token' in {index['name'] for index in inspector.get_indexes('order')}:
+        op.drop_index('ix_order_client_token', table_name='order')
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.drop_column('client_token')
@@ -0,0 +1,265 @@
+"""
+Sparse fieldsets, includes, cursor pagination and ETags for the /api/v1 resources.
+
+Each resource is declared once with resource(): its model, its tenant scope, the fields a
+client may ask for, the relationships it may include and the filters it accepts.
+- fields=a,b picks the primary resource's fields, fields[<include path>]=a,b those of an
+  included one (fields[items.menu_item]=name). Only the columns behind the chosen fields
+  are loaded (load_only), so leaving out description or notes leaves them out of the SELECT.
+- include=items,items.menu_item embeds related rows. Each include is loaded for the whole
+  page in one extra query (selectinload), never per row.
+- Collections are keyed by id. The cursor is the position after the last row of the
+  previous page, so pages stay stable while rows are inserted, and a deep page is an
+  index range scan instead of an OFFSET.
+
+ETags depend on what the response is built from:
+- 'menu' resources (menus, categories, items, stations) change with the restaurant's
+  menu data version, so a revalidation is answered before any row is read.
+- 'row' resources (orders, order items) carry Order.version. The page's ids and versions
+  are read first, and the full rows and their includes are loaded only on a miss.
+- Anything else (tables) is hashed from the body: that saves the transfer, not the query.
+"""
+import base64
+import hashlib
+from collections import namedtuple
+from datetime import date, datetime, time
+
+from flask import jsonify, request
+from sqlalchemy.orm import load_only, selectinload
+
+from project.etags import make_etag, not_modified, with_etag
+from project.fragment_cache import menu_version
+
+Field = namedtuple('Field', ['columns', 'get'])
+Include = namedtuple('Include', ['attr', 'resource', 'many', 'columns'])
+Selection = namedtuple('Selection', ['fields', 'includes'])
+Resource = namedtuple('Resource', ['name', 'model', 'scope', 'fields', 'default_fields', 'includes', 'filters',
+                                   'version', 'version_column'])
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+MAX_INCLUDE_DEPTH = 3
+
+_resources = {}
+
+
+class QueryError(ValueError):
+    """An invalid fields/include/filter/cursor parameter; answered with a 400."""
+
+
+def _format(value):
+    if isinstance(value, datetime):
+        return value.isoformat() + 'Z'
+    if isinstance(value, time):
+        return value.strftime('%H:%M')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def column(attr):
+    """A field read straight from one column."""
+    return Field((attr,), lambda obj: _format(getattr(obj, attr.key)))
+
+
+def resource(name, model, scope, fields, default_fields=None, includes=None, filters=None, version=None,
+             version_column=None):
+    """Declares an API resource; `scope(query, restaurant_id)` limits a query to one tenant."""
+    _resources[name] = Resource(name, model, scope, fields, default_fields or list(fields), includes or {},
+                                filters or {}, version, version_column)
+    return _resources[name]
+
+
+# --- Parsing ---
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def _selection(spec, path, include_tree):
+    requested = request.args.get(f'fields[{path}]' if path else 'fields')
+    fields = _split(requested) if requested is not None else spec.default_fields
+    unknown = [name for name in fields if name not in spec.fields]
+    if unknown:
+        raise QueryError(f"Unknown field(s) for {spec.name}: {', '.join(unknown)}")
+    includes = {}
+    for name, subtree in include_tree.items():
+        if name not in spec.includes:
+            raise QueryError(f"{spec.name} cannot include {name}")
+        child_path = f'{path}.{name}' if path else name
+        includes[name] = _selection(_resources[spec.includes[name].resource], child_path, subtree)
+    return Selection(fields, includes)
+
+
+def parse_selection(spec):
+    """The Selection the request asks for: fields per resource and the include tree."""
+    tree = {}
+    for path in _split(request.args.get('include')):
+        parts = path.split('.')
+        if len(parts) > MAX_INCLUDE_DEPTH:
+            raise QueryError(f"Include paths are at most {MAX_INCLUDE_DEPTH} levels deep")
+        node = tree
+        for part in parts:
+            node = node.setdefault(part, {})
+    return _selection(spec, '', tree)
+
+
+def _encode_cursor(last_id):
+    return base64.urlsafe_b64encode(f'id:{last_id}'.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        prefix, _, last_id = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().partition(':')
+        if prefix != 'id':
+            raise ValueError(cursor)
+        return int(last_id)
+    except ValueError:
+        raise QueryError('Invalid cursor')
+
+
+def _limit():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise QueryError('limit must be a number')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _filtered(spec, query):
+    for name, apply in spec.filters.items():
+        value = request.args.get(name)
+        if value is not None and value != '':
+            query = apply(query, value)
+    return query
+
+
+# --- Loading and serializing ---
+
+def _columns(spec, selection):
+    attrs = {spec.model.id}
+    for name in selection.fields:
+        attrs.update(spec.fields[name].columns)
+    for name in selection.includes:
+        attrs.update(spec.includes[name].columns)
+    return sorted(attrs, key=lambda attr: attr.key)
+
+
+def _loader_options(spec, selection):
+    options = []
+    for name, child in selection.includes.items():
+        include = spec.includes[name]
+        child_spec = _resources[include.resource]
+        options.append(selectinload(getattr(spec.model, include.attr)).options(
+            load_only(*_columns(child_spec, child)), *_loader_options(child_spec, child)))
+    return options
+
+
+def _options(spec, selection):
+    return [load_only(*_columns(spec, selection))] + _loader_options(spec, selection)
+
+
+def serialize(spec, obj, selection):
+    data = {name: spec.fields[name].get(obj) for name in selection.fields}
+    for name, child in selection.includes.items():
+        include = spec.includes[name]
+        child_spec = _resources[include.resource]
+        value = getattr(obj, include.attr)
+        if include.many:
+            data[name] = [serialize(child_spec, related, child) for related in value]
+        else:
+            data[name] = serialize(child_spec, value, child) if value is not None else None
+    return data
+
+
+def _versions(spec, selection, found=None):
+    found = set() if found is None else found
+    found.add(spec.version)
+    for name, child in selection.includes.items():
+        _versions(_resources[spec.includes[name].resource], child, found)
+    return found
+
+
+def _respond(payload, etag=None):
+    response = jsonify(payload)
+    if etag is None:
+        etag = hashlib.sha1(response.get_data()).hexdigest()[:24]
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+    return with_etag(response, etag)
+
+
+def _request_key():
+    return tuple(sorted(request.args.items(multi=True)))
+
+
+# --- Views ---
+
+def list_response(name, restaurant_id):
+    """One page of a resource collection: {'data': [...], 'next_cursor': str|None}."""
+    spec = _resources[name]
+    selection = parse_selection(spec)
+    limit = _limit()
+    query = _filtered(spec, spec.scope(spec.model.query, restaurant_id))
+    cursor = request.args.get('cursor')
+    if cursor:
+        query = query.filter(spec.model.id > _decode_cursor(cursor))
+    versions = _versions(spec, selection)
+    menu_part = menu_version(restaurant_id) if 'menu' in versions else None
+
+    etag = None
+    if versions == {'menu'}:
+        etag = make_etag('api', name, restaurant_id, menu_part, _request_key())
+        response = not_modified(etag)
+        if response is not None:
+            return response
+
+    if spec.version == 'row' and versions <= {'row', 'menu'}:
+        # Ids and versions first; the full rows and includes only load on an ETag miss
+        page = query.with_entities(spec.model.id, spec.version_column).order_by(spec.model.id).limit(limit + 1).all()
+        has_more, page = len(page) > limit, page[:limit]
+        # has_more too: a new row past a full page must change the ETag, or next_cursor never reaches the client
+        etag = make_etag('api', name, restaurant_id, menu_part, _request_key(), tuple(page), has_more)
+        response = not_modified(etag)
+        if response is not None:
+            return response
+        ids = [row[0] for row in page]
+        by_id = {obj.id: obj for obj in spec.model.query.filter(spec.model.id.in_(ids)).options(*_options(spec, selection))} \
+            if ids else {}
+        rows = [by_id[row_id] for row_id in ids if row_id in by_id]
+    else:
+        rows = query.options(*_options(spec, selection)).order_by(spec.model.id).limit(limit + 1).all()
+        has_more, rows = len(rows) > limit, rows[:limit]
+
+    payload = {
+        'data': [serialize(spec, obj, selection) for obj in rows],
+        'next_cursor': _encode_cursor(rows[-1].id) if has_more and rows else None,
+    }
+    return _respond(payload, etag)
+
+
+def item_response(name, restaurant_id, object_id):
+    """A single resource as {'data': {...}}, or None when it is not this tenant's."""
+    spec = _resources[name]
+    selection = parse_selection(spec)
+    query = spec.scope(spec.model.query, restaurant_id).filter(spec.model.id == object_id)
+    versions = _versions(spec, selection)
+    menu_part = menu_version(restaurant_id) if 'menu' in versions else None
+
+    etag = None
+    if versions == {'menu'} or (spec.version == 'row' and versions <= {'row', 'menu'}):
+        row_version = None
+        if spec.version == 'row':
+            row_version = query.with_entities(spec.version_column).scalar()
+            if row_version is None:
+                return None
+        etag = make_etag('api', name, restaurant_id, object_id, row_version, menu_part, _request_key())
+        response = not_modified(etag)
+        if response is not None:
+            return response
+
+    obj = query.options(*_options(spec, selection)).first()
+    if obj is None:
+        return None
+    return _respond({'data': serialize(spec, obj, selection)}, etag)
+
@@ -0,0 +1,173 @@
+"""
+Fingerprinted static assets.
+
+`flask build-assets` copies every file under project/static into project/static/dist
+with a content hash in its name (css/kitchen.css -> css/kitchen.3f2a9c1b7d4e.css).
+- Text assets get precompressed .gz siblings, and .br siblings when the optional
+  `brotli` package is installed.
+- JPEG/PNG images are re-encoded when the optional Pillow package is installed
+  and the result is smaller.
+- CSS url() references to other assets are rewritten to their hashed names.
+- The mapping is written to dist/manifest.json.
+
+With ASSET_MANIFEST_ENABLED, url_for('static', filename=...) resolves through the
+manifest. The hashed files are served with a year-long immutable Cache-Control, and
+with a precompressed sibling when the client accepts br or gzip. Files missing from
+the manifest keep Flask's default handling. A front proxy can serve the same
+directory directly (nginx: gzip_static/brotli_static).
+"""
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.ico'}
+MIN_COMPRESS_SIZE = 256
+JPEG_QUALITY = 82
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def _source_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        if rel_root == '.':
+            dirs[:] = [d for d in dirs if d not in (DIST_DIR, 'uploads')]
+        for name in files:
+            if not name.startswith('.'):
+                yield os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, '/')
+
+
+def _recompress_image(path, data):
+    """Re-encoded bytes if Pillow makes the image smaller, else the original bytes."""
+    ext = os.path.splitext(path)[1].lower()
+    if Image is None or ext not in ('.jpg', '.jpeg', '.png'):
+        return data
+    with Image.open(io.BytesIO(data)) as image:
+        out = io.BytesIO()
+        if ext == '.png':
+            image.save(out, format='PNG', optimize=True)
+        else:
+            image.convert('RGB').save(out, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue() if out.tell() < len(data) else data
+
+
+def _rewrite_css(rel_path, text, manifest):
+    base = os.path.dirname(rel_path)
+
+    def replace(match):
+        quote, target = match.groups()
+        if target.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path, _, suffix = target.partition('?')
+        resolved = os.path.normpath(os.path.join(base, path)).replace(os.sep, '/')
+        if resolved not in manifest:
+            return match.group(0)
+        # The rewritten stylesheet itself lives under dist/, next to the hashed target
+        hashed = os.path.relpath(manifest[resolved], os.path.join(DIST_DIR, base)).replace(os.sep, '/')
+        return f"url({quote}{hashed}{'?' + suffix if suffix else ''}{quote})"
+
+    return _CSS_URL.sub(replace, text)
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build_assets(static_folder):
+    """Writes hashed copies, compressed siblings and the manifest into <static>/dist; returns the manifest."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    files = sorted(_source_files(static_folder), key=lambda p: p.endswith('.css')) # CSS last, so url() targets are known
+    manifest = {}
+    for rel_path in files:
+        with open(os.path.join(static_folder, rel_path), 'rb') as f:
+            data = f.read()
+        ext = os.path.splitext(rel_path)[1].lower()
+        if ext == '.css':
+            data = _rewrite_css(rel_path, data.decode('utf-8'), manifest).encode('utf-8')
+        else:
+            data = _recompress_image(rel_path, data)
+
+        stem = os.path.splitext(rel_path)[0]
+        hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        target = os.path.join(dist, hashed)
+        _write(target, data)
+        if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+            _write(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(target + '.br', brotli.compress(data, quality=11))
+        manifest[rel_path] = f"{DIST_DIR}/{hashed}"
+
+    _write(os.path.join(dist, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _precompressed(app, filename):
+    """(sibling filename, encoding) for the best precompressed variant the client accepts, or (None, None)."""
+    accepted = request.accept_encodings
+    for suffix, encoding in (('.br', 'br'), ('.gz', 'gzip')):
+        if accepted[encoding] and os.path.isfile(os.path.join(app.static_folder, filename + suffix)):
+            return filename + suffix, encoding
+    return None, None
+
+
+def init_assets(app):
+    """Resolves url_for('static') through the build manifest and serves hashed files as immutable."""
+    if not app.config.get('ASSET_MANIFEST_ENABLED'):
+        return
+    manifest = load_manifest(app.static_folder)
+    if not manifest:
+        app.logger.warning("ASSET_MANIFEST_ENABLED but no manifest in %s; run `flask build-assets`",
+                           os.path.join(app.static_folder, DIST_DIR))
+        return
+    app.extensions['asset_manifest'] = manifest
+    hashed_files = set(manifest.values())
+    default_static = app.view_functions['static']
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    def static(filename):
+        if filename not in hashed_files:
+            return default_static(filename=filename)
+        sibling, encoding = _precompressed(app, filename)
+        response = app.send_static_file(sibling or filename)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+            response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+    app.view_functions['static'] = static
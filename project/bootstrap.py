@@ -0,0 +1,178 @@
+"""
+One-request bootstrap payloads for the operational screens (kitchen, storefront, tables).
+
+A screen's payload is a set of sections. Each section has its own data version:
+- restaurant: digest of the cached RestaurantSummary (no query when warm)
+- stations, menu: the restaurant's menu data version (project/fragment_cache.py)
+- tables: a 'tables' DataVersion counter, bumped in the same transaction as any table change
+- orders: digest of the active orders' (id, version) pairs, read in one narrow query,
+  and of the menu and tables versions
+
+The client sends the versions it already holds (?known=menu:12,orders:9f2c...). A section
+whose version matches comes back as {'version': v}, without being loaded. Sections are
+shared between screens, so a tablet moving from the kitchen to the storefront only
+fetches what the kitchen screen did not already have. Built sections are also cached
+per process by (restaurant, section, version), so ten tablets opening the same screen
+build it once. The orders section has the POS replica's shape (project/pos_sync.py).
+"""
+import hashlib
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import selectinload
+
+from extensions import db
+from project.db_routing import RoutingSession
+from project.fragment_cache import MENU_SCOPE, bump_version
+from project.helpers import serialize_menu_items, sort_tables
+from project.identity import TTLCache, restaurant_summary
+from project.metrics import record_cache
+from project.models import Category, DataVersion, MenuItem, ModifierGroup, Station, Table
+from project.pos_sync import active_order_versions, load_pos_orders
+
+TABLES_SCOPE = 'tables'
+
+SCREENS = {
+    'kitchen': ['restaurant', 'stations', 'orders'],
+    'storefront': ['restaurant', 'menu', 'tables', 'orders'],
+    'tables': ['restaurant', 'tables', 'orders'],
+}
+
+_sections = TTLCache(maxsize=500)
+
+
+def init_bootstrap(app):
+    """Sizes the per-process section cache (BOOTSTRAP_CACHE_SIZE built sections)."""
+    _sections.maxsize = app.config.get('BOOTSTRAP_CACHE_SIZE', 500)
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode()).hexdigest()[:16]
+
+
+def parse_known(value):
+    """'menu:12,orders:9f2c' -> {'menu': '12', 'orders': '9f2c'}."""
+    known = {}
+    for part in (value or '').split(','):
+        name, _, version = part.partition(':')
+        if name.strip() and version.strip():
+            known[name.strip()] = version.strip()
+    return known
+
+
+# --- Versions ---
+
+def section_versions(restaurant_id, sections):
+    """{section: version string} for the requested sections, in at most two queries."""
+    versions = {}
+    scopes = {MENU_SCOPE} if {'menu', 'stations', 'orders'} & set(sections) else set()
+    if {'tables', 'orders'} & set(sections):
+        scopes.add(TABLES_SCOPE)
+    counters = dict(db.session.query(DataVersion.scope, DataVersion.version).filter(
+        DataVersion.restaurant_id == restaurant_id, DataVersion.scope.in_(scopes)
+    ).all()) if scopes else {}
+    active_orders = None
+    for section in sections:
+        if section == 'restaurant':
+            versions[section] = _digest(tuple(restaurant_summary(restaurant_id)))
+        elif section in ('menu', 'stations'):
+            versions[section] = str(counters.get(MENU_SCOPE, 0))
+        elif section == 'tables':
+            versions[section] = str(counters.get(TABLES_SCOPE, 0))
+        elif section == 'orders':
+            active_orders = active_order_versions(restaurant_id)
+            # Orders embed item names, prices and table numbers, so menu and table edits change them too
+            versions[section] = _digest((sorted(active_orders.items()), counters.get(MENU_SCOPE, 0),
+                                         counters.get(TABLES_SCOPE, 0)))
+    return versions, active_orders
+
+
+# --- Sections ---
+
+def _restaurant(restaurant_id, context):
+    summary = restaurant_summary(restaurant_id)
+    return {field: getattr(summary, field) for field in
+            ('id', 'name', 'slug', 'timezone', 'tax_rate', 'brand_color', 'has_logo')}
+
+
+def _stations(restaurant_id, context):
+    return [{'id': station.id, 'name': station.name} for station in
+            Station.query.filter_by(restaurant_id=restaurant_id).order_by(Station.name).all()]
+
+
+def _menu(restaurant_id, context):
+    items = MenuItem.query.filter_by(restaurant_id=restaurant_id, is_available=True).options(
+        selectinload(MenuItem.modifiers).selectinload(ModifierGroup.options)
+    ).all()
+    categories = Category.query.filter_by(restaurant_id=restaurant_id, is_active=True).options(
+        selectinload(Category.items)
+    ).order_by(Category.name).all()
+    available = {item.id for item in items}
+    return {
+        'items': serialize_menu_items(items),
+        'categories': [{'id': category.id, 'name': category.name,
+                        'item_ids': [item.id for item in category.items if item.id in available]}
+                       for category in categories],
+    }
+
+
+def _tables(restaurant_id, context):
+    tables = sort_tables(Table.query.filter_by(restaurant_id=restaurant_id).all())
+    return [{'id': table.id, 'number': table.number, 'status': table.status, 'floor': table.floor,
+             'seating_capacity': table.seating_capacity} for table in tables]
+
+
+def _orders(restaurant_id, context):
+    return load_pos_orders(sorted(context['active_orders']))
+
+
+BUILDERS = {
+    'restaurant': _restaurant,
+    'stations': _stations,
+    'menu': _menu,
+    'tables': _tables,
+    'orders': _orders,
+}
+
+
+def screen_versions(restaurant_id, screen):
+    """(versions, context) for a screen's sections; pass both on to build_payload()."""
+    versions, active_orders = section_versions(restaurant_id, SCREENS[screen])
+    return versions, {'active_orders': active_orders}
+
+
+def build_payload(restaurant_id, screen, versions, context, known=None):
+    """
+    The payload for a screen. Sections whose version is in `known` are sent as
+    {'version': v} only; the rest are built (or taken from the section cache) with data.
+    """
+    known = known or {}
+    ttl = current_app.config.get('FRAGMENT_CACHE_TTL', 3600)
+    payload = {}
+    for section in SCREENS[screen]:
+        version = versions[section]
+        if known.get(section) == version:
+            payload[section] = {'version': version}
+            continue
+        key = (restaurant_id, section, version)
+        data = _sections.get(key, ttl)
+        record_cache('bootstrap', data is not None)
+        if data is None:
+            data = BUILDERS[section](restaurant_id, context)
+            _sections.set(key, data)
+        payload[section] = {'version': version, 'data': data}
+    return {'screen': screen, 'sections': payload}
+
+
+def clear():
+    _sections.clear()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _bump_table_versions(db_session, flush_context):
+    changed = list(db_session.new) + list(db_session.deleted) + \
+        [obj for obj in db_session.dirty if isinstance(obj, Table) and db_session.is_modified(obj)]
+    restaurant_ids = {obj.restaurant_id for obj in changed if isinstance(obj, Table)}
+    restaurant_ids.discard(None)
+    for restaurant_id in restaurant_ids:
+        bump_version(db_session, restaurant_id, TABLES_SCOPE)
@@ -0,0 +1,126 @@
+"""
+Negotiated response compression.
+
+HTML, JSON, CSV and other text responses of at least COMPRESSION_MIN_SIZE bytes are sent
+as brotli or gzip, whichever the client accepts (brotli preferred when installed).
+- Streamed responses (generators such as the CSV export) are compressed chunk by chunk
+  with a sync flush, so rows still reach the client as they are produced.
+- Responses that can be cached (an ETag, or a public/max-age Cache-Control) keep their
+  compressed body in a per-process LRU keyed by the digest of the uncompressed body, so
+  a repeated page is compressed once.
+- Strong ETags are weakened on compressed responses, since the bytes differ per
+  encoding. If-None-Match comparisons are weak, so 304s still work.
+
+Responses that already have a Content-Encoding (precompressed static assets), file
+responses (direct_passthrough) and Cache-Control: no-transform are left alone.
+"""
+import gzip
+import hashlib
+import zlib
+
+from flask import request
+
+from project.identity import TTLCache
+from project.metrics import record_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_compressed = TTLCache(maxsize=256)
+
+
+def negotiate(accept_encodings):
+    """'br', 'gzip' or None for the request's Accept-Encoding."""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.get('COMPRESSION_BROTLI_QUALITY', 5))
+    return gzip.compress(data, compresslevel=config.get('COMPRESSION_LEVEL', 6), mtime=0)
+
+
+def compress_stream(chunks, encoding, config, close=None):
+    """Compresses an iterable of byte chunks, flushing after each so nothing waits for the end."""
+    try:
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=config.get('COMPRESSION_BROTLI_QUALITY', 5))
+            for chunk in chunks:
+                out = compressor.process(chunk) + compressor.flush()
+                if out:
+                    yield out
+            yield compressor.finish()
+        else:
+            compressor = zlib.compressobj(config.get('COMPRESSION_LEVEL', 6), zlib.DEFLATED, 31) # 31: gzip container
+            for chunk in chunks:
+                out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if out:
+                    yield out
+            yield compressor.flush()
+    finally:
+        if close is not None:
+            close()
+
+
+def _compressible(response, config):
+    if response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.cache_control.no_transform:
+        return False
+    return response.mimetype in config.get('COMPRESSION_MIMETYPES', ())
+
+
+def _cacheable(response):
+    etag, _ = response.get_etag()
+    return request.method == 'GET' and bool(etag or response.cache_control.public or response.cache_control.max_age)
+
+
+def init_compression(app):
+    """Compresses eligible responses; register before other after_request hooks so it runs last."""
+    if not app.config.get('COMPRESSION_ENABLED'):
+        return
+    config = app.config
+    _compressed.maxsize = config.get('COMPRESSION_CACHE_SIZE', 256)
+
+    @app.after_request
+    def compress_response(response):
+        if not _compressible(response, config):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            original = response.response
+            response.response = compress_stream(response.iter_encoded(), encoding, config,
+                                                close=getattr(original, 'close', None))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config.get('COMPRESSION_MIN_SIZE', 1024):
+                return response
+            if _cacheable(response):
+                key = (encoding, hashlib.sha1(data).digest())
+                body = _compressed.get(key, config.get('COMPRESSION_CACHE_TTL', 3600))
+                record_cache('compression', body is not None)
+                if body is None:
+                    body = compress(data, encoding, config)
+                    _compressed.set(key, body)
+            else:
+                body = compress(data, encoding, config)
+            response.set_data(body)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
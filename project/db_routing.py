@@ -0,0 +1,86 @@
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to a read-only bind when one is configured
+    (``SQLALCHEMY_READ_BIND``), and everything else to the primary.
+    Once the current transaction has written, all of its reads stay on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get('has_written'):
+            if getattr(clause, 'is_select', False):
+                read_key = read_bind_for_request()
+                if read_key:
+                    engine = self._db.engines.get(read_key)
+                    if engine is not None:
+                        return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_bind_for_request():
+    """
+    Returns the bind key reads should use right now, or None for the primary.
+
+    SQLALCHEMY_READ_ROUTING = 'all' routes every read (used by the SQLite profile, where
+    the read pool is the same file). 'endpoints' only routes requests to READ_ONLY_BLUEPRINTS
+    and READ_ONLY_ENDPOINTS, and falls back to the primary for READ_YOUR_WRITES_SECONDS
+    after the same user session committed a write, so replica lag is never visible to them.
+    """
+    config = current_app.config
+    read_key = config.get('SQLALCHEMY_READ_BIND')
+    if not read_key:
+        return None
+    if config.get('SQLALCHEMY_READ_ROUTING', 'all') == 'all':
+        return read_key
+    if not has_request_context():
+        return None
+
+    if request.blueprint not in config.get('READ_ONLY_BLUEPRINTS', ()) and \
+            request.endpoint not in config.get('READ_ONLY_ENDPOINTS', ()):
+        return None
+    if g.get('_db_wrote'):
+        return None
+    last_write = session.get('_db_last_write')
+    if last_write and time.time() - last_write < config.get('READ_YOUR_WRITES_SECONDS', 5):
+        return None
+    return read_key
+
+
+def init_db_routing(app):
+    """Remembers when a user session last wrote, for read-your-writes on replica routing."""
+    if not app.config.get('SQLALCHEMY_READ_BIND') or app.config.get('SQLALCHEMY_READ_ROUTING', 'all') == 'all':
+        return
+
+    @app.after_request
+    def remember_last_write(response):
+        if g.get('_db_wrote'):
+            session['_db_last_write'] = time.time()
+        return response
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written_on_flush(db_session, flush_context):
+    db_session.info['has_written'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_written_on_bulk(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['has_written'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_commit(db_session):
+    if db_session.info.pop('has_written', None) and has_request_context():
+        g._db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _clear_written(db_session):
+    db_session.info.pop('has_written', None)
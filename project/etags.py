@@ -0,0 +1,125 @@
+"""
+Strong ETags and conditional GETs for the customer pages customers keep re-fetching.
+
+An ETag is a digest of the data versions a page is built from, plus the deploy version
+(a digest of the templates and the static manifest), so a deploy changes every ETag.
+Views compute the ETag from cached summaries and one version lookup, and call
+not_modified() before loading anything else.
+- Menu pages use the restaurant's menu_version() and the scheduled categories. The
+  schedule comes from a MenuSchedule snapshot cached per menu version, so no menu
+  rows are read.
+- Order pages use Order.version. It starts at 1 and is bumped in the same transaction
+  as any change to the order or its items (and by the sweeper's bulk updates).
+"""
+import hashlib
+import os
+from collections import namedtuple
+
+from flask import current_app, request, session
+from sqlalchemy import event, update
+
+from extensions import db
+from project.db_routing import RoutingSession
+from project.identity import TTLCache
+from project.models import Order, OrderItem, Menu, Category
+
+MenuSchedule = namedtuple('MenuSchedule', ['id', 'active_days', 'start_time', 'end_time', 'category_ids'])
+
+_schedules = TTLCache(maxsize=5000)
+_deploy_version = None
+
+
+def deploy_version():
+    """Digest of template and static manifest files (names, sizes, mtimes); the same in every worker of a deploy."""
+    global _deploy_version
+    if _deploy_version is None:
+        digest = hashlib.sha1()
+        roots = [current_app.jinja_loader.searchpath[0], os.path.join(current_app.static_folder, 'dist')]
+        for root in roots:
+            for directory, _, files in sorted(os.walk(root)):
+                for name in sorted(files):
+                    stat = os.stat(os.path.join(directory, name))
+                    digest.update(f"{directory}/{name}:{stat.st_size}:{int(stat.st_mtime)}".encode())
+        _deploy_version = digest.hexdigest()[:12]
+    return _deploy_version
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts + (deploy_version(),)).encode()).hexdigest()[:24]
+
+
+def not_modified(etag):
+    """A 304 response if the request already holds this ETag, else None."""
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    """Marks a full response with its ETag; no-cache makes clients revalidate on every use."""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def conditional_allowed():
+    # A pending flash message is rendered into the page once, so that page must not be reused
+    return not session.get('_flashes')
+
+
+def menu_schedule(restaurant_id, version):
+    """MenuSchedule snapshots of the restaurant's active menus, cached per menu version."""
+    key = (restaurant_id, version)
+    schedule = _schedules.get(key, current_app.config.get('FRAGMENT_CACHE_TTL', 3600))
+    if schedule is None:
+        menus = Menu.query.filter_by(restaurant_id=restaurant_id, is_active=True).all()
+        active_categories = {}
+        if menus:
+            rows = db.session.query(Menu.id, Category.id).select_from(Menu).join(Menu.categories).filter(
+                Menu.restaurant_id == restaurant_id, Menu.is_active.is_(True), Category.is_active.is_(True)
+            ).all()
+            for menu_id, category_id in rows:
+                active_categories.setdefault(menu_id, []).append(category_id)
+        schedule = tuple(MenuSchedule(menu.id, menu.active_days, menu.start_time, menu.end_time,
+                                      tuple(sorted(active_categories.get(menu.id, ())))) for menu in menus)
+        _schedules.set(key, schedule)
+    return schedule
+
+
+def order_version(order_id, restaurant_id):
+    """The order's version, or None if it does not belong to the restaurant."""
+    return db.session.query(Order.version).filter_by(id=order_id, restaurant_id=restaurant_id).scalar()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _bump_order_versions(db_session, flush_context):
+    created = db_session.info.setdefault('orders_created', set())
+    order_ids = set()
+    for obj in db_session.new:
+        if isinstance(obj, Order):
+            created.add(obj.id)
+        elif isinstance(obj, OrderItem):
+            order_ids.add(obj.order_id)
+    for obj in db_session.dirty:
+        if isinstance(obj, (Order, OrderItem)) and db_session.is_modified(obj):
+            order_ids.add(obj.id if isinstance(obj, Order) else obj.order_id)
+    for obj in db_session.deleted:
+        if isinstance(obj, OrderItem):
+            order_ids.add(obj.order_id)
+    # Orders created in this transaction are still at their first version
+    order_ids -= created
+    order_ids.discard(None)
+    if order_ids:
+        db_session.execute(
+            update(Order).where(Order.id.in_(order_ids)).values(version=Order.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_created_orders(db_session):
+    db_session.info.pop('orders_created', None)
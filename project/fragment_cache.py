@@ -0,0 +1,104 @@
+"""
+Template fragment caching keyed on restaurant data versions.
+
+    {% cache 'qr-menu', restaurant.id, menu_version(restaurant.id) %}
+        ... markup that only depends on the menu ...
+    {% endcache %}
+
+The rendered fragment is kept in a per-process LRU under the tag's arguments, which
+must be hashable and must cover everything the fragment depends on. menu_version()
+reads a per-restaurant counter (DataVersion) that is bumped in the same transaction
+as any change to menus, categories, items, modifiers or stations. A menu edit committed
+by any worker therefore changes the key everywhere, and the old entries age out.
+"""
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event, insert, update
+
+from extensions import db
+from project.db_routing import RoutingSession
+from project.identity import TTLCache
+from project.metrics import record_cache
+from project.models import DataVersion, Menu, Category, MenuItem, ModifierGroup, ModifierOption, Station
+
+MENU_SCOPE = 'menu'
+
+_fragments = TTLCache(maxsize=1000)
+
+
+def _menu_restaurant_id(obj):
+    if isinstance(obj, ModifierOption):
+        obj = obj.group
+    if isinstance(obj, ModifierGroup):
+        obj = obj.menu_item
+    return getattr(obj, 'restaurant_id', None)
+
+
+def menu_version(restaurant_id):
+    """The restaurant's current menu data version (0 until its menu first changes)."""
+    if restaurant_id is None:
+        return 0
+    return db.session.query(DataVersion.version).filter_by(
+        restaurant_id=restaurant_id, scope=MENU_SCOPE
+    ).scalar() or 0
+
+
+def bump_version(db_session, restaurant_id, scope=MENU_SCOPE):
+    """Increments a restaurant's version inside the session's current transaction."""
+    result = db_session.execute(
+        update(DataVersion).where(DataVersion.restaurant_id == restaurant_id, DataVersion.scope == scope)
+        .values(version=DataVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db_session.execute(insert(DataVersion).values(restaurant_id=restaurant_id, scope=scope, version=1))
+
+
+def clear():
+    _fragments.clear()
+
+
+class FragmentCacheExtension(Extension):
+    """Adds {% cache key, ... %}...{% endcache %}."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(args)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        config = current_app.config
+        if not config.get('FRAGMENT_CACHE_ENABLED'):
+            return caller()
+        key = tuple(key)
+        fragment = _fragments.get(key, config.get('FRAGMENT_CACHE_TTL', 3600))
+        record_cache('fragment', fragment is not None)
+        if fragment is None:
+            fragment = Markup(caller())
+            _fragments.set(key, fragment)
+        return fragment
+
+
+def init_fragment_cache(app):
+    """Registers the {% cache %} tag and menu_version(); call before the Jinja environment is first used."""
+    extensions = list(app.jinja_options.get('extensions', ()))
+    app.jinja_options = {**app.jinja_options, 'extensions': extensions + [FragmentCacheExtension]}
+    _fragments.maxsize = app.config.get('FRAGMENT_CACHE_SIZE', 1000)
+    app.add_template_global(menu_version)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _bump_menu_versions(db_session, flush_context):
+    tracked = (Menu, Category, MenuItem, ModifierGroup, ModifierOption, Station)
+    changed = list(db_session.new) + list(db_session.deleted) + \
+        [obj for obj in db_session.dirty if isinstance(obj, tracked) and db_session.is_modified(obj)]
+    restaurant_ids = {_menu_restaurant_id(obj) for obj in changed if isinstance(obj, tracked)}
+    restaurant_ids.discard(None)
+    for restaurant_id in restaurant_ids:
+        bump_version(db_session, restaurant_id)
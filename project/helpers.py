@@ -0,0 +1,107 @@
+"""
+Pure helpers for the per-request hot paths (menu scheduling, menu serialization,
+order totals, table ordering and table state). They take plain model instances and
+never touch the session, so they can be benchmarked and tested without a database.
+"""
+import re
+
+_DIGITS = re.compile('([0-9]+)')
+
+
+def menu_is_scheduled(menu, day_index, current_time):
+    """
+    Whether a menu's schedule covers the given local weekday index ('0'-'6', Monday is '0')
+    and local time. An empty active_days string means the menu is never active;
+    missing start/end times mean no time restriction.
+    """
+    day_match = bool(menu.active_days) and day_index in menu.active_days.split(',')
+    if not day_match:
+        return False
+    if not menu.start_time or not menu.end_time:
+        return True # No time restriction
+    if menu.start_time <= menu.end_time: # Same day schedule
+        return menu.start_time <= current_time <= menu.end_time
+    # Overnight schedule (e.g., 10pm - 2am)
+    return current_time >= menu.start_time or current_time <= menu.end_time
+
+
+def scheduled_menus(menus, now_local):
+    """Filters menus down to those whose schedule covers the restaurant-local datetime."""
+    day_index = str(now_local.weekday())
+    current_time = now_local.time()
+    return [menu for menu in menus if menu_is_scheduled(menu, day_index, current_time)]
+
+
+def serialize_menu_item(item, include_description=False):
+    """JSON-ready dict for a menu item with its modifier groups and options."""
+    data = {
+        'id': item.id,
+        'name': item.name,
+        'price': item.price,
+    }
+    if include_description:
+        data['description'] = item.description
+    data['modifiers'] = [{
+        'id': group.id,
+        'name': group.name,
+        'selection_type': group.selection_type,
+        'is_required': group.is_required,
+        'options': [{
+            'id': opt.id,
+            'name': opt.name,
+            'price_override': opt.price_override
+        } for opt in group.options]
+    } for group in item.modifiers]
+    return data
+
+
+def serialize_menu_items(items, include_description=False):
+    """Maps item id -> serialize_menu_item(item) for embedding as menu_data_json."""
+    return {item.id: serialize_menu_item(item, include_description) for item in items}
+
+
+def order_item_total(item):
+    """Line total: (menu price + selected modifier prices) x quantity."""
+    modifier_price = sum(mod.price_override for mod in item.selected_modifiers)
+    return (item.menu_item.price + modifier_price) * item.quantity
+
+
+def order_subtotal(order):
+    return sum(order_item_total(item) for item in order.items)
+
+
+def order_totals(order, tax_rate):
+    """Returns (subtotal, tax_amount, total) for an order at the given tax rate."""
+    subtotal = order_subtotal(order)
+    tax_amount = subtotal * (tax_rate or 0.0)
+    return subtotal, tax_amount, subtotal + tax_amount
+
+
+def natural_sort_key(number):
+    """Sort key so table numbers order naturally: '2' < '10', 'A2' < 'A10'."""
+    return [int(c) if c.isdigit() else c.lower() for c in _DIGITS.split(number or '')]
+
+
+def sort_tables(tables):
+    tables.sort(key=lambda t: natural_sort_key(t.number))
+    return tables
+
+
+def derive_table_state(table, order):
+    """
+    Storefront display state for a table given its active order (or None),
+    using the priority: maintenance > reservation > active order > manual status.
+    """
+    if table.status == 'maintenance':
+        return {'status': 'Not Available', 'color': 'dark'}
+    if table.reservation_info and table.reservation_info.get('name'):
+        return {'status': 'Not Available', 'color': 'info'} # Reserved
+    if order:
+        if order.flagged_at:
+            return {'status': 'Stale Order', 'color': 'danger'} # Left from a previous business day (project/sweeper.py)
+        if order.status in ['paid', 'completed']:
+            return {'status': 'Not Available', 'color': 'primary'} # Needs clearing
+        return {'status': 'Occupied', 'color': 'warning'}
+    if table.status == 'occupied':
+        return {'status': 'Occupied', 'color': 'secondary'}
+    return {'status': 'Available', 'color': 'success'} # Green
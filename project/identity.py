@@ -0,0 +1,194 @@
+"""
+Cached request identity.
+
+Flask-Login's session id is "<user id>:<password_version>", so a password change ends
+all other sessions. The user loader returns a CachedIdentity instead of a User row, so
+a warm cache resolves current_user without touching the database.
+- Identities are cached per (user id, password_version).
+- Restaurant summaries (the scalar columns templates read through
+  current_user.restaurant or the qrlink pages, with has_logo/has_banner instead of the
+  logo/banner BLOBs) are cached per restaurant id.
+
+Both caches are per process, with IDENTITY_CACHE_TTL seconds to live. Commits that
+update or delete a User or Restaurant evict the matching entries in this process right
+away; other workers pick up the change within the TTL.
+
+Routes that modify the logged-in user must load the real row with current_user.load().
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app
+from sqlalchemy import event
+
+from extensions import db
+from project.db_routing import RoutingSession
+from project.metrics import record_cache
+from project.models import User, Restaurant
+
+RestaurantSummary = namedtuple('RestaurantSummary', [
+    'id', 'name', 'slug', 'timezone', 'tax_rate', 'tax_id', 'address', 'phone_number', 'brand_color',
+    'tagline', 'has_logo', 'has_banner'
+])
+_SUMMARY_COLUMNS = [getattr(Restaurant, field) for field in RestaurantSummary._fields[:-2]] + [
+    Restaurant.logo_data.isnot(None), Restaurant.banner_data.isnot(None)
+]
+
+
+class TTLCache:
+    """Small thread-safe LRU with a per-entry time to live."""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard_where(self, predicate):
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_identities = TTLCache()
+_restaurants = TTLCache()
+
+
+class CachedIdentity:
+    """Read-only stand-in for User that satisfies Flask-Login and the attributes views and templates read."""
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user, is_superadmin):
+        self.id = user.id
+        self.email = user.email
+        self.role = user.role
+        self.restaurant_id = user.restaurant_id
+        self.password_version = user.password_version
+        self.is_active = user.is_active
+        self.is_superadmin = is_superadmin
+
+    def get_id(self):
+        return f"{self.id}:{self.password_version}"
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def restaurant(self):
+        return restaurant_summary(self.restaurant_id)
+
+    def load(self):
+        """The User row for this identity, for routes that change the user."""
+        return db.session.get(User, self.id)
+
+    def __eq__(self, other):
+        return isinstance(other, (CachedIdentity, User)) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+def _ttl():
+    return current_app.config.get('IDENTITY_CACHE_TTL', 30)
+
+
+def parse_session_id(session_id):
+    """'12:3' -> (12, 3). Sessions created before the version was embedded give (12, None)."""
+    user_id, _, version = str(session_id).partition(':')
+    try:
+        return int(user_id), int(version) if version else None
+    except ValueError:
+        return None, None
+
+
+def load_identity(session_id):
+    """Flask-Login user_loader: a CachedIdentity, or None if the user is gone or the session is stale."""
+    user_id, version = parse_session_id(session_id)
+    if user_id is None:
+        return None
+    if version is not None:
+        identity = _identities.get((user_id, version), _ttl())
+        record_cache('identity', identity is not None)
+        if identity is not None:
+            return identity
+
+    user = db.session.get(User, user_id)
+    if user is None or (version is not None and user.password_version != version):
+        return None
+    identity = CachedIdentity(user, user.email == current_app.config.get('MASTER_SYSTEM_ADMIN_EMAIL'))
+    _identities.set((user.id, user.password_version), identity)
+    return identity
+
+
+def restaurant_summary(restaurant_id):
+    if restaurant_id is None:
+        return None
+    summary = _restaurants.get(restaurant_id, _ttl())
+    record_cache('restaurant_summary', summary is not None)
+    if summary is None:
+        row = db.session.query(*_SUMMARY_COLUMNS).filter(Restaurant.id == restaurant_id).first()
+        if row is None:
+            return None
+        summary = RestaurantSummary(*row)
+        _restaurants.set(restaurant_id, summary)
+    return summary
+
+
+def invalidate_user(user_id):
+    _identities.discard_where(lambda key: key[0] == user_id)
+
+
+def invalidate_restaurant(restaurant_id):
+    _restaurants.discard_where(lambda key: key == restaurant_id)
+
+
+def clear():
+    _identities.clear()
+    _restaurants.clear()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_identity_changes(db_session, flush_context):
+    changed = db_session.info.setdefault('identity_changes', set())
+    for obj in list(db_session.dirty) + list(db_session.deleted):
+        if isinstance(obj, (User, Restaurant)):
+            changed.add((type(obj), obj.id))
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _evict_identity_changes(db_session):
+    for model, obj_id in db_session.info.pop('identity_changes', ()):
+        if model is User:
+            invalidate_user(obj_id)
+        else:
+            invalidate_restaurant(obj_id)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_identity_changes(db_session):
+    db_session.info.pop('identity_changes', None)
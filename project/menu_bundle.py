@@ -0,0 +1,88 @@
+"""
+Menu bundles for the offline customer client.
+
+A bundle is the JSON the customer pages need to show and price a restaurant's menu:
+every available item on an active menu (with modifiers), and the categories listing
+them. Bundles are built once per (restaurant, menu version) and kept per process, so
+the previous versions are still around to diff against. A client that holds version N
+asks for ?since=N and gets only the items and categories that changed or disappeared.
+If this process no longer has version N, it gets the full bundle instead.
+
+The scheduled category ids depend on the time of day, not on the menu version, so they
+are computed per request and sent alongside every bundle or diff.
+"""
+from flask import current_app
+from sqlalchemy.orm import selectinload
+
+from project.etags import menu_schedule
+from project.helpers import serialize_menu_item
+from project.identity import TTLCache
+from project.metrics import record_cache
+from project.models import Category, MenuItem, ModifierGroup
+
+_bundles = TTLCache(maxsize=200)
+
+
+def init_menu_bundle(app):
+    """Sizes the per-process bundle cache (MENU_BUNDLE_CACHE_SIZE versions)."""
+    _bundles.maxsize = app.config.get('MENU_BUNDLE_CACHE_SIZE', 200)
+
+
+def build_bundle(restaurant_id, version):
+    """{'version', 'items': {id: item}, 'categories': {id: category}} for a menu version, cached per process."""
+    key = (restaurant_id, version)
+    bundle = _bundles.get(key, current_app.config.get('FRAGMENT_CACHE_TTL', 3600))
+    record_cache('menu_bundle', bundle is not None)
+    if bundle is not None:
+        return bundle
+
+    category_ids = {category_id for menu in menu_schedule(restaurant_id, version) for category_id in menu.category_ids}
+    categories = Category.query.filter(Category.id.in_(category_ids)).options(
+        selectinload(Category.items).selectinload(MenuItem.modifiers).selectinload(ModifierGroup.options)
+    ).order_by(Category.name).all() if category_ids else []
+
+    items, bundle_categories = {}, {}
+    for position, category in enumerate(categories):
+        available = [item for item in category.items if item.is_available]
+        for item in available:
+            if item.id not in items:
+                data = serialize_menu_item(item, include_description=True)
+                data['has_image'] = item.image_data is not None
+                items[item.id] = data
+        bundle_categories[category.id] = {
+            'name': category.name,
+            'position': position,
+            'item_ids': [item.id for item in available],
+        }
+    bundle = {'version': version, 'items': items, 'categories': bundle_categories}
+    _bundles.set(key, bundle)
+    return bundle
+
+
+def bundle_diff(old, new):
+    """What a client holding `old` needs to reach `new`: changed entries and removed ids."""
+    return {
+        'items': {item_id: item for item_id, item in new['items'].items() if old['items'].get(item_id) != item},
+        'removed_items': [item_id for item_id in old['items'] if item_id not in new['items']],
+        'categories': {category_id: category for category_id, category in new['categories'].items()
+                       if old['categories'].get(category_id) != category},
+        'removed_categories': [category_id for category_id in old['categories'] if category_id not in new['categories']],
+    }
+
+
+def bundle_payload(restaurant_id, version, since=None):
+    """The full bundle, or the diff from `since` when that version is still cached here."""
+    bundle = build_bundle(restaurant_id, version)
+    if since is not None and since != version:
+        old = _bundles.get((restaurant_id, since), current_app.config.get('FRAGMENT_CACHE_TTL', 3600))
+        if old is not None:
+            return {'version': version, 'since': since, 'full': False, **bundle_diff(old, bundle)}
+    if since == version:
+        return {'version': version, 'since': since, 'full': False,
+                'items': {}, 'removed_items': [], 'categories': {}, 'removed_categories': []}
+    return {'version': version, 'since': None, 'full': True, 'items': bundle['items'],
+            'removed_items': [], 'categories': bundle['categories'], 'removed_categories': []}
+
+
+def clear():
+    _bundles.clear()
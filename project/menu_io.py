@@ -0,0 +1,713 @@
+"""
+Bulk import and export of a restaurant's menu: stations, categories, menus with their
+schedules, items, and each item's modifier groups and options.
+
+JSON carries the whole graph (the shape export_menu() returns). CSV carries one row per
+item (CSV_FIELDS): categories are separated by '|' and modifiers are a JSON list, while
+stations and categories named in a row are created as needed. Menus and their
+schedules are JSON only.
+
+Importing is an upsert. Items are matched on SKU and everything else on its name within
+the restaurant. A row without a SKU matches the one item of that name that has no SKU
+either (items added before SKUs were assigned export without one), and a name shared
+by several such items is reported as an error rather than guessed. Only the fields present in the document are compared and written, and
+nothing is deleted except modifier groups and options left out of an item that lists
+its modifiers. import_menu() loads the current menu once, in one query per table,
+validates the document and diffs the two. The diff is the dry-run report. When the
+import is applied, changed rows are updated through the session, and new items, their
+category links, modifier groups and options are written with one executemany INSERT per
+table. A 2,000 item menu therefore costs a few dozen statements, not thousands of
+round trips. Everything lands in the caller's transaction.
+
+SKUs: allocate_skus() hands out ITEM-NNN numbers from a per-restaurant counter
+(DataVersion scope 'sku'). A block of numbers is reserved with one UPDATE, and the row
+lock it takes holds concurrent allocations back until this transaction ends, so two
+requests never get the same number the way count() + 1 could give them. The counter
+starts after the highest ITEM- number already in use, and numbers that already exist as
+hand-entered SKUs are skipped.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, lazyload, selectinload
+
+from extensions import db
+from project.fragment_cache import bump_version
+from project.models import (Category, DataVersion, Menu, MenuItem, ModifierGroup, ModifierOption, Station,
+                            menu_item_categories)
+
+FORMAT = 'oda-menu'
+FORMAT_VERSION = 1
+
+SKU_SCOPE = 'sku'
+SKU_PREFIX = 'ITEM-'
+
+CSV_FIELDS = ['sku', 'name', 'price', 'compare_at_price', 'description', 'is_available', 'station', 'categories',
+              'modifiers']
+SECTIONS = ('stations', 'categories', 'menus', 'items')
+
+TRUE_VALUES = ('true', 'yes', 'y', '1', 'on')
+FALSE_VALUES = ('false', 'no', 'n', '0', 'off')
+
+
+class MenuImportError(ValueError):
+    """A document that cannot be read at all (not JSON, unknown CSV columns); answered with a 400."""
+
+
+# --- SKUs ---
+
+def _highest_sku_number(db_session, restaurant_id):
+    skus = db_session.query(MenuItem.sku).filter(MenuItem.restaurant_id == restaurant_id,
+                                                 MenuItem.sku.like(f'{SKU_PREFIX}%'))
+    numbers = [int(sku[len(SKU_PREFIX):]) for (sku,) in skus if sku[len(SKU_PREFIX):].isdigit()]
+    return max(numbers, default=0)
+
+
+def _reserve(db_session, restaurant_id, count):
+    """Advances the SKU counter by count and returns its new value."""
+    counter = (DataVersion.restaurant_id == restaurant_id, DataVersion.scope == SKU_SCOPE)
+    if db_session.execute(update(DataVersion).where(*counter).values(version=DataVersion.version + count)).rowcount:
+        return db_session.query(DataVersion.version).filter(*counter).scalar()
+    last = _highest_sku_number(db_session, restaurant_id) + count
+    try:
+        with db_session.begin_nested():
+            db_session.execute(insert(DataVersion).values(restaurant_id=restaurant_id, scope=SKU_SCOPE, version=last))
+        return last
+    except IntegrityError:
+        # Another transaction created the counter first; take a block from it instead
+        return _reserve(db_session, restaurant_id, count)
+
+
+def allocate_skus(db_session, restaurant_id, count=1):
+    """count unused ITEM-NNN SKUs, reserved for this restaurant until the transaction ends."""
+    skus = []
+    while len(skus) < count:
+        needed = count - len(skus)
+        last = _reserve(db_session, restaurant_id, needed)
+        candidates = [f'{SKU_PREFIX}{number:03d}' for number in range(last - needed + 1, last + 1)]
+        taken = {sku for (sku,) in db_session.query(MenuItem.sku).filter(
+            MenuItem.restaurant_id == restaurant_id, MenuItem.sku.in_(candidates))}
+        skus.extend(sku for sku in candidates if sku not in taken)
+    return skus
+
+
+def next_sku(db_session, restaurant_id):
+    return allocate_skus(db_session, restaurant_id)[0]
+
+
+# --- Current menu ---
+
+class _Menu:
+    """The restaurant's current menu, loaded in one query per table and indexed for matching."""
+
+    def __init__(self, restaurant_id):
+        self.stations = {}
+        for station in Station.query.filter_by(restaurant_id=restaurant_id).order_by(Station.id):
+            self.stations.setdefault(station.name, station)
+        self.station_names = {station.id: name for name, station in self.stations.items()}
+        self.categories = {}
+        for category in Category.query.filter_by(restaurant_id=restaurant_id).options(
+                lazyload(Category.items)).order_by(Category.id):
+            self.categories.setdefault(category.name, category)
+        self.menus = {}
+        for menu in Menu.query.filter_by(restaurant_id=restaurant_id).options(
+                selectinload(Menu.categories).lazyload(Category.items)).order_by(Menu.id):
+            self.menus.setdefault(menu.name, menu)
+        self.items = MenuItem.query.filter_by(restaurant_id=restaurant_id).options(
+            defer(MenuItem.image_data),
+            selectinload(MenuItem.categories).lazyload(Category.items),
+            selectinload(MenuItem.modifiers).selectinload(ModifierGroup.options),
+        ).order_by(MenuItem.id).all()
+        self.by_sku, self.unskued = {}, {}
+        for item in self.items:
+            if item.sku:
+                self.by_sku.setdefault(item.sku, item)
+            else:
+                self.unskued.setdefault(item.name, []).append(item)
+
+    def item_for(self, values):
+        """The item a normalized row updates, None for a new one; ValueError if its name is ambiguous."""
+        if values['sku']:
+            return self.by_sku.get(values['sku'])
+        matches = self.unskued.get(values.get('name'), [])
+        if len(matches) > 1:
+            raise ValueError(f"name {values['name']!r} matches {len(matches)} items without a SKU; give them SKUs")
+        return matches[0] if matches else None
+
+
+def _station_values(station, current):
+    return {'name': station.name}
+
+
+def _category_values(category, current):
+    return {'name': category.name, 'is_active': bool(category.is_active)}
+
+
+def _menu_values(menu, current):
+    return {
+        'name': menu.name,
+        'description': menu.description,
+        'is_active': bool(menu.is_active),
+        'start_time': menu.start_time.strftime('%H:%M') if menu.start_time else None,
+        'end_time': menu.end_time.strftime('%H:%M') if menu.end_time else None,
+        'start_date': menu.start_date.isoformat() if menu.start_date else None,
+        'end_date': menu.end_date.isoformat() if menu.end_date else None,
+        'active_days': sorted({int(day) for day in menu.active_days.split(',') if day}) if menu.active_days else None,
+        'categories': sorted({category.name for category in menu.categories}),
+    }
+
+
+def _modifier_values(group):
+    return {
+        'name': group.name,
+        'selection_type': group.selection_type or 'single',
+        'is_required': bool(group.is_required),
+        'min_selection': group.min_selection or 0,
+        'max_selection': group.max_selection,
+        'options': [{'name': option.name, 'price': option.price_override or 0.0}
+                    for option in sorted(group.options, key=lambda option: option.id or 0)],
+    }
+
+
+def _item_values(item, current):
+    return {
+        'sku': item.sku or None,
+        'name': item.name,
+        'price': item.price,
+        'compare_at_price': item.compare_at_price,
+        'description': item.description,
+        'is_available': bool(item.is_available),
+        'station': current.station_names.get(item.station_id),
+        'categories': sorted({category.name for category in item.categories}),
+        'modifiers': [_modifier_values(group) for group in sorted(item.modifiers, key=lambda group: group.id or 0)],
+    }
+
+
+# --- Export ---
+
+def export_menu(restaurant_id):
+    """The restaurant's whole menu as an import document."""
+    current = _Menu(restaurant_id)
+    return {
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'exported_at': datetime.utcnow().isoformat() + 'Z',
+        'stations': [_station_values(station, current) for station in current.stations.values()],
+        'categories': [_category_values(category, current) for category in current.categories.values()],
+        'menus': [_menu_values(menu, current) for menu in current.menus.values()],
+        'items': [_item_values(item, current) for item in current.items],
+    }
+
+
+def export_csv(document):
+    """The items of an export document as CSV, one row per item."""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for item in document['items']:
+        writer.writerow({
+            **{field: item[field] for field in ('sku', 'name', 'description', 'station')},
+            'price': f"{item['price']:.2f}",
+            'compare_at_price': f"{item['compare_at_price']:.2f}" if item['compare_at_price'] is not None else '',
+            'is_available': 'true' if item['is_available'] else 'false',
+            'categories': '|'.join(item['categories']),
+            'modifiers': json.dumps(item['modifiers'], separators=(',', ':')) if item['modifiers'] else '',
+        })
+    return output.getvalue()
+
+
+# --- Reading documents ---
+
+def load_document(content, fmt):
+    """Parses an uploaded JSON or CSV file into an import document."""
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise MenuImportError('The file is not UTF-8 text')
+    if fmt == 'json':
+        try:
+            return json.loads(content)
+        except ValueError as error:
+            raise MenuImportError(f'Invalid JSON: {error}')
+    if fmt != 'csv':
+        raise MenuImportError(f'Unknown format {fmt!r}; use json or csv')
+    reader = csv.DictReader(io.StringIO(content))
+    columns = [column.strip() for column in reader.fieldnames or []]
+    unknown = [column for column in columns if column not in CSV_FIELDS]
+    if unknown:
+        raise MenuImportError(f"Unknown CSV column(s): {', '.join(unknown)}; expected {', '.join(CSV_FIELDS)}")
+    if 'sku' not in columns and 'name' not in columns:
+        raise MenuImportError('The CSV needs a sku or a name column')
+    reader.fieldnames = columns
+    return {'items': [{**{key: value for key, value in row.items() if key in CSV_FIELDS}, '_row': number}
+                      for number, row in enumerate(reader, 2)]}
+
+
+# --- Validation ---
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _text(value, label, limit=None):
+    if _blank(value):
+        return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f'{label} must be text')
+    value = str(value).strip()
+    if limit and len(value) > limit:
+        raise ValueError(f'{label} is longer than {limit} characters')
+    return value
+
+
+def _name(value, label, limit):
+    name = _text(value, label, limit)
+    if name is None:
+        raise ValueError(f'{label} is required')
+    return name
+
+
+def _number(value, label):
+    if _blank(value):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f'{label} must be a number')
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{label} must be a number, got {value!r}')
+    if number < 0:
+        raise ValueError(f'{label} cannot be negative')
+    return number
+
+
+def _count(value, label):
+    number = _number(value, label)
+    if number is not None and number != int(number):
+        raise ValueError(f'{label} must be a whole number')
+    return int(number) if number is not None else None
+
+
+def _flag(value, label):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in TRUE_VALUES + FALSE_VALUES:
+        return value.strip().lower() in TRUE_VALUES
+    raise ValueError(f'{label} must be true or false')
+
+
+def _time(value, label):
+    if _blank(value):
+        return None
+    try:
+        return datetime.strptime(str(value).strip(), '%H:%M').strftime('%H:%M')
+    except ValueError:
+        raise ValueError(f'{label} must be HH:MM')
+
+
+def _date(value, label):
+    if _blank(value):
+        return None
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise ValueError(f'{label} must be YYYY-MM-DD')
+
+
+def _days(value):
+    if _blank(value):
+        return None
+    days = value.split(',') if isinstance(value, str) else value
+    if not isinstance(days, list):
+        raise ValueError('active_days must be a list of weekday numbers')
+    try:
+        days = sorted({int(day) for day in days if not _blank(day)})
+    except (TypeError, ValueError):
+        raise ValueError('active_days must be weekday numbers, 0 (Monday) to 6')
+    if any(day < 0 or day > 6 for day in days):
+        raise ValueError('active_days must be weekday numbers, 0 (Monday) to 6')
+    return days or None
+
+
+def _names(value, label):
+    names = value.split('|') if isinstance(value, str) else value
+    if names is None:
+        return []
+    if not isinstance(names, list):
+        raise ValueError(f'{label} must be a list of names')
+    return sorted({_name(name, label, 50) for name in names if not _blank(name)})
+
+
+def _modifiers(value):
+    if _blank(value):
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError('modifiers must be a JSON list')
+    if not isinstance(value, list):
+        raise ValueError('modifiers must be a list')
+    groups = []
+    for raw in value:
+        if not isinstance(raw, dict):
+            raise ValueError('each modifier group must be an object')
+        name = _name(raw.get('name'), 'modifier group name', 50)
+        selection_type = raw.get('selection_type') or 'single'
+        if selection_type not in ('single', 'multiple'):
+            raise ValueError(f'{name}: selection_type must be single or multiple')
+        options = []
+        for option in raw.get('options') or []:
+            if not isinstance(option, dict):
+                raise ValueError(f'{name}: each option must be an object')
+            options.append({'name': _name(option.get('name'), f'{name}: option name', 50),
+                            'price': _number(option.get('price'), f'{name}: option price') or 0.0})
+        if len({option['name'] for option in options}) != len(options):
+            raise ValueError(f'{name}: option names must be unique')
+        groups.append({
+            'name': name,
+            'selection_type': selection_type,
+            'is_required': _flag(raw['is_required'], f'{name}: is_required') if 'is_required' in raw else False,
+            'min_selection': _count(raw.get('min_selection'), f'{name}: min_selection') or 0,
+            'max_selection': _count(raw.get('max_selection'), f'{name}: max_selection'),
+            'options': options,
+        })
+    if len({group['name'] for group in groups}) != len(groups):
+        raise ValueError('modifier group names must be unique per item')
+    return groups
+
+
+def _station(raw):
+    return {'name': _name(raw.get('name'), 'name', 50)}
+
+
+def _category(raw):
+    values = {'name': _name(raw.get('name'), 'name', 50)}
+    if not _blank(raw.get('is_active')):
+        values['is_active'] = _flag(raw['is_active'], 'is_active')
+    return values
+
+
+def _menu(raw):
+    values = {'name': _name(raw.get('name'), 'name', 50)}
+    if 'description' in raw:
+        values['description'] = _text(raw['description'], 'description', 200)
+    if not _blank(raw.get('is_active')):
+        values['is_active'] = _flag(raw['is_active'], 'is_active')
+    for field in ('start_time', 'end_time'):
+        if field in raw:
+            values[field] = _time(raw[field], field)
+    for field in ('start_date', 'end_date'):
+        if field in raw:
+            values[field] = _date(raw[field], field)
+    if 'active_days' in raw:
+        values['active_days'] = _days(raw['active_days'])
+    if 'categories' in raw:
+        values['categories'] = _names(raw['categories'], 'categories')
+    return values
+
+
+def _item(raw):
+    values = {'sku': _text(raw.get('sku'), 'sku', 50)}
+    if not _blank(raw.get('name')):
+        values['name'] = _name(raw['name'], 'name', 100)
+    if not _blank(raw.get('price')):
+        values['price'] = _number(raw['price'], 'price')
+    if 'compare_at_price' in raw:
+        values['compare_at_price'] = _number(raw['compare_at_price'], 'compare_at_price')
+    if 'description' in raw:
+        values['description'] = _text(raw['description'], 'description')
+    if not _blank(raw.get('is_available')):
+        values['is_available'] = _flag(raw['is_available'], 'is_available')
+    if 'station' in raw:
+        values['station'] = _text(raw['station'], 'station', 50)
+    if 'categories' in raw:
+        values['categories'] = _names(raw['categories'], 'categories')
+    if 'modifiers' in raw:
+        values['modifiers'] = _modifiers(raw['modifiers'])
+    return values
+
+
+NORMALIZERS = {'stations': _station, 'categories': _category, 'menus': _menu, 'items': _item}
+
+
+def _normalize(document):
+    """({section: [values]}, errors). Entries with an error are left out of their section."""
+    if not isinstance(document, dict):
+        raise MenuImportError('Expected a JSON object with stations, categories, menus and items')
+    if document.get('version', FORMAT_VERSION) != FORMAT_VERSION:
+        raise MenuImportError(f"Unsupported menu format version {document.get('version')!r}")
+    sections, errors = {}, []
+    for section in SECTIONS:
+        entries = document.get(section) or []
+        sections[section] = []
+        if not isinstance(entries, list):
+            errors.append(f'{section} must be a list')
+            continue
+        for index, raw in enumerate(entries):
+            where = f"row {raw['_row']}" if isinstance(raw, dict) and '_row' in raw else f'{section}[{index}]'
+            try:
+                if not isinstance(raw, dict):
+                    raise ValueError('expected an object')
+                sections[section].append(NORMALIZERS[section](raw))
+            except ValueError as error:
+                errors.append(f'{where}: {error}')
+    for section in ('stations', 'categories', 'menus'):
+        names = [values['name'] for values in sections[section]]
+        errors.extend(f'{section}: {name!r} is listed more than once'
+                      for name in sorted({name for name in names if names.count(name) > 1}))
+    skus = [values['sku'] for values in sections['items'] if values['sku']]
+    errors.extend(f'items: SKU {sku!r} is listed more than once'
+                  for sku in sorted({sku for sku in skus if skus.count(sku) > 1}))
+    return sections, errors
+
+
+# --- Diff and apply ---
+
+def _plan(entries, snapshot, current):
+    """Splits normalized entries into creates and (object, values, changes) updates."""
+    created, updated, unchanged = [], [], 0
+    for values, obj in entries:
+        if obj is None:
+            created.append(values)
+            continue
+        old = snapshot(obj, current)
+        changes = {field: [old[field], value] for field, value in values.items()
+                   if field in old and not _same(field, old[field], value)}
+        if changes:
+            updated.append((obj, values, changes))
+        else:
+            unchanged += 1
+    return created, updated, unchanged
+
+
+def _same(field, old, new):
+    if field == 'modifiers':
+        # Matched by name on apply, so order does not matter
+        def key(groups):
+            return sorted((group['name'], group['selection_type'], group['is_required'], group['min_selection'],
+                           group['max_selection'], sorted((o['name'], o['price']) for o in group['options']))
+                          for group in groups)
+        return key(old) == key(new)
+    return old == new
+
+
+def _summary(value):
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        return [f"{group['name']} ({len(group['options'])} options)" for group in value]
+    return value
+
+
+def _by_name(values):
+    return {'name': values['name']}
+
+
+def _by_sku(values):
+    return {'sku': values['sku'], 'name': values.get('name')}
+
+
+def _report_section(created, updated, unchanged, label):
+    return {
+        'created': [label(values) for values in created],
+        'updated': [{**label(values if 'name' in values else {**values, 'name': obj.name}),
+                     'changes': {field: [_summary(old), _summary(new)] for field, (old, new) in changes.items()}}
+                    for obj, values, changes in updated],
+        'unchanged': unchanged,
+    }
+
+
+def _set_modifiers(item, groups):
+    """Reconciles an item's modifier groups and options by name; the ones left out are deleted."""
+    current = {group.name: group for group in item.modifiers}
+    kept = []
+    for values in groups:
+        group = current.pop(values['name'], None) or ModifierGroup(name=values['name'])
+        for field in ('selection_type', 'is_required', 'min_selection', 'max_selection'):
+            setattr(group, field, values[field])
+        options = {option.name: option for option in group.options}
+        kept_options = []
+        for option_values in values['options']:
+            option = options.pop(option_values['name'], None) or ModifierOption(name=option_values['name'])
+            option.price_override = option_values['price']
+            kept_options.append(option)
+        group.options = kept_options
+        kept.append(group)
+    item.modifiers = kept
+
+
+def _time_value(value):
+    return datetime.strptime(value, '%H:%M').time() if value else None
+
+
+def _date_value(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def _apply_menu(menu, values, categories):
+    for field, value in values.items():
+        if field in ('start_time', 'end_time'):
+            value = _time_value(value)
+        elif field in ('start_date', 'end_date'):
+            value = _date_value(value)
+        elif field == 'active_days':
+            value = ','.join(str(day) for day in value) if value else ''
+        elif field == 'categories':
+            value = [categories[name] for name in value]
+        setattr(menu, field, value)
+
+
+def _apply_item(item, values, stations, categories):
+    for field, value in values.items():
+        if field == 'station':
+            item.station_id = stations[value].id if value else None
+        elif field == 'categories':
+            item.categories = [categories[name] for name in value]
+        elif field == 'modifiers':
+            _set_modifiers(item, value)
+        else:
+            setattr(item, field, value)
+
+
+def _insert_items(session, restaurant_id, new_items, stations, categories):
+    """
+    Inserts new items, their category links, modifier groups and options with one
+    executemany INSERT per table. Nothing is read back per row: the new ids are looked
+    up afterwards by SKU, and group ids by (item, group name), both unique here.
+    """
+    if not new_items:
+        return
+    now = datetime.utcnow()
+    session.execute(insert(MenuItem), [{
+        'restaurant_id': restaurant_id, 'sku': values['sku'], 'name': values['name'], 'price': values['price'],
+        'compare_at_price': values.get('compare_at_price'), 'description': values.get('description'),
+        'is_available': values.get('is_available', True), 'created_at': now,
+        'station_id': stations[values['station']].id if values.get('station') else None,
+    } for values in new_items])
+    new_skus = {values['sku'] for values in new_items}
+    item_ids = {}
+    for sku, item_id in session.query(MenuItem.sku, MenuItem.id).filter(
+            MenuItem.restaurant_id == restaurant_id).order_by(MenuItem.id):
+        if sku in new_skus:
+            item_ids[sku] = item_id
+
+    links = [{'menu_item_id': item_ids[values['sku']], 'category_id': categories[name].id}
+             for values in new_items for name in values.get('categories', ())]
+    if links:
+        session.execute(insert(menu_item_categories), links)
+
+    groups = [(item_ids[values['sku']], group) for values in new_items for group in values.get('modifiers', ())]
+    if not groups:
+        return
+    session.execute(insert(ModifierGroup), [{
+        'menu_item_id': item_id, 'name': group['name'], 'selection_type': group['selection_type'],
+        'is_required': group['is_required'], 'min_selection': group['min_selection'],
+        'max_selection': group['max_selection'], 'created_at': now,
+    } for item_id, group in groups])
+    new_ids = set(item_ids.values())
+    group_ids = {(item_id, name): group_id for group_id, item_id, name in session.query(
+        ModifierGroup.id, ModifierGroup.menu_item_id, ModifierGroup.name
+    ).filter(ModifierGroup.menu_item_id >= min(new_ids)) if item_id in new_ids}
+    options = [{'group_id': group_ids[(item_id, group['name'])], 'name': option['name'],
+                'price_override': option['price'], 'created_at': now}
+               for item_id, group in groups for option in group['options']]
+    if options:
+        session.execute(insert(ModifierOption), options)
+
+
+def import_menu(restaurant_id, document, dry_run=False):
+    """
+    Diffs an import document against the restaurant's menu and, unless dry_run or the
+    document has errors, writes it to the session without committing. Returns the report:
+    {'dry_run', 'applied', 'errors', and per section {'created', 'updated', 'unchanged'}}.
+    """
+    sections, errors = _normalize(document)
+    current = _Menu(restaurant_id)
+
+    matched, item_entries = set(), []
+    for values in sections['items']:
+        try:
+            item = current.item_for(values)
+        except ValueError as error:
+            errors.append(f'items: {error}')
+            continue
+        if item is not None and item.id in matched:
+            errors.append(f"items: {values['name']!r} is listed more than once")
+            continue
+        if item is not None:
+            matched.add(item.id)
+        item_entries.append((values, item))
+        if item is None:
+            missing = [field for field in ('name', 'price') if field not in values]
+            if missing:
+                errors.append(f"items: new item {values.get('name') or values['sku']!r} needs "
+                              f"{' and '.join(missing)}")
+    # Stations and categories that items or menus name without listing are created with defaults
+    listed = {section: {values['name'] for values in sections[section]} for section in ('stations', 'categories')}
+    named_stations = {values['station'] for values in sections['items'] if values.get('station')}
+    named_categories = {name for section in ('menus', 'items') for values in sections[section]
+                        for name in values.get('categories', ())}
+    sections['stations'] += [{'name': name} for name in sorted(named_stations - listed['stations'] -
+                                                                 set(current.stations))]
+    sections['categories'] += [{'name': name} for name in sorted(named_categories - listed['categories'] -
+                                                                   set(current.categories))]
+
+    plans = {
+        'stations': _plan([(values, current.stations.get(values['name'])) for values in sections['stations']],
+                          _station_values, current),
+        'categories': _plan([(values, current.categories.get(values['name'])) for values in sections['categories']],
+                            _category_values, current),
+        'menus': _plan([(values, current.menus.get(values['name'])) for values in sections['menus']],
+                       _menu_values, current),
+        'items': _plan(item_entries, _item_values, current),
+    }
+    report = {
+        'dry_run': dry_run,
+        'applied': False,
+        'errors': errors,
+        'stations': _report_section(*plans['stations'], _by_name),
+        'categories': _report_section(*plans['categories'], _by_name),
+        'menus': _report_section(*plans['menus'], _by_name),
+        'items': _report_section(*plans['items'], _by_sku),
+    }
+    if dry_run or errors:
+        return report
+
+    session = db.session
+    stations, categories = dict(current.stations), dict(current.categories)
+    for values in plans['stations'][0]:
+        stations[values['name']] = Station(restaurant_id=restaurant_id, **values)
+    for values in plans['categories'][0]:
+        categories[values['name']] = Category(restaurant_id=restaurant_id, **values)
+    session.add_all([stations[values['name']] for values in plans['stations'][0]] +
+                    [categories[values['name']] for values in plans['categories'][0]])
+    for obj, values, changes in plans['categories'][1]:
+        obj.is_active = values['is_active']
+    session.flush()  # New stations need their ids before items can point at them
+
+    new_menus = []
+    for values in plans['menus'][0]:
+        menu = Menu(restaurant_id=restaurant_id)
+        _apply_menu(menu, values, categories)
+        new_menus.append(menu)
+    for menu, values, changes in plans['menus'][1]:
+        _apply_menu(menu, {field: values[field] for field in changes}, categories)
+
+    new_items = plans['items'][0]
+    skus = iter(allocate_skus(session, restaurant_id, sum(1 for values in new_items if not values['sku'])))
+    for values in new_items:
+        values['sku'] = values['sku'] or next(skus)
+    for item, values, changes in plans['items'][1]:
+        _apply_item(item, {field: values[field] for field in changes}, stations, categories)
+    session.add_all(new_menus)
+    session.flush()
+    _insert_items(session, restaurant_id, new_items, stations, categories)
+    bump_version(session, restaurant_id)
+    report['applied'] = True
+    for created, values in zip(report['items']['created'], new_items):
+        created['sku'] = values['sku']
+    return report
@@ -0,0 +1,145 @@
+import hmac
+import os
+import time
+from datetime import datetime
+
+from flask import Response, abort, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                               REGISTRY, generate_latest)
+from sqlalchemy import event
+
+from extensions import db
+
+# Multi-process mode (gunicorn): set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory
+# before the workers start. Each worker then writes its samples to mmap'd files in that
+# directory and /metrics aggregates all of them, whichever worker serves the scrape.
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+REQUEST_LATENCY = Histogram(
+    'oda_http_request_duration_seconds', 'HTTP request latency',
+    ['blueprint', 'endpoint', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    'oda_db_pool_checked_out', 'Connections currently checked out of the pool', ['bind'],
+    multiprocess_mode='livesum'
+)
+DB_POOL_SIZE = Gauge(
+    'oda_db_pool_size', 'Configured pool size', ['bind'],
+    multiprocess_mode='livesum'
+)
+SOCKET_CLIENTS = Gauge(
+    'oda_socketio_clients', 'Connected Socket.IO clients by room type', ['room_type'],
+    multiprocess_mode='livesum'
+)
+ORDERS_PLACED = Counter('oda_orders_placed_total', 'Orders placed', ['restaurant_id'])
+ORDER_TO_KITCHEN = Histogram(
+    'oda_order_to_kitchen_seconds', 'Time from order placement until an item is first picked up by the kitchen',
+    ['status'],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+)
+CACHE_REQUESTS = Counter('oda_cache_requests_total', 'Cache lookups', ['cache', 'result'])
+JOB_QUEUE_DEPTH = Gauge(
+    'oda_job_queue_depth', 'Jobs waiting in background queues', ['queue'],
+    multiprocess_mode='livesum'
+)
+
+_enabled = False
+
+
+def observe_order_placed(restaurant_id):
+    if _enabled:
+        ORDERS_PLACED.labels(str(restaurant_id)).inc()
+
+
+def observe_kitchen_pickup(order, previous_status, new_status):
+    """Records order-to-kitchen latency the first time an item leaves 'pending'."""
+    if _enabled and previous_status == 'pending' and new_status in ('preparing', 'ready') and order.created_at:
+        latency = (datetime.utcnow() - order.created_at).total_seconds()
+        ORDER_TO_KITCHEN.labels(new_status).observe(max(latency, 0.0))
+
+
+def record_cache(cache, hit):
+    if _enabled:
+        CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def set_queue_depth(queue, depth):
+    if _enabled:
+        JOB_QUEUE_DEPTH.labels(queue).set(depth)
+
+
+def socket_client_joined(room_type, delta=1):
+    if _enabled:
+        SOCKET_CLIENTS.labels(room_type).inc(delta)
+
+
+def _watch_pool(bind, engine):
+    pool = engine.pool
+    if hasattr(pool, 'size'):
+        DB_POOL_SIZE.labels(bind).set(pool.size())
+
+    @event.listens_for(engine, 'checkout')
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.labels(bind).inc()
+
+    @event.listens_for(engine, 'checkin')
+    def _on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.labels(bind).dec()
+
+
+def _registry():
+    if not MULTIPROCESS:
+        return REGISTRY
+    from prometheus_client import multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def init_metrics(app):
+    """
+    Instruments requests, pools and the order hot path, and serves them at METRICS_PATH.
+    Does nothing unless METRICS_ENABLED is set. When METRICS_TOKEN is set, scrapers must
+    send it as a bearer token.
+    """
+    global _enabled
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    _enabled = True
+
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            _watch_pool(bind or 'default', engine)
+
+    metrics_path = app.config.get('METRICS_PATH', '/metrics')
+    token = app.config.get('METRICS_TOKEN')
+
+    @app.before_request
+    def start_request_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None and request.endpoint not in ('static', 'metrics'):
+            REQUEST_LATENCY.labels(
+                request.blueprint or '', request.endpoint or 'unmatched', request.method, str(response.status_code)
+            ).observe(time.perf_counter() - started)
+        return response
+
+    def metrics():
+        if token:
+            supplied = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(supplied, f"Bearer {token}"):
+                abort(401)
+        return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule(metrics_path, 'metrics', metrics)
+
+
+def mark_worker_dead(pid):
+    """Call from gunicorn's child_exit hook so a dead worker's live gauges are dropped."""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
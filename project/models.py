@@ -29,6 +29,9 @@ class Restaurant(db.Model):
     tax_id = db.Column(db.String(100))
     tax_rate = db.Column(db.Float, default=0.0) # e.g., 7.5% is stored as 0.075
     timezone = db.Column(db.String(100), default='UTC')
+
+    # Stale-order sweeper rules, merged over DEFAULT_SWEEPER_CONFIG in project/sweeper.py
+    sweeper_config = db.Column(db.JSON, default={})
     
     items = db.relationship('MenuItem', backref='restaurant')
     tables = db.relationship('Table', backref='restaurant')
@@ -45,6 +48,10 @@ class User(UserMixin, db.Model):
     restaurant = db.relationship('Restaurant', backref='users')
     is_active = db.Column(db.Boolean, default=False, nullable=False)
 
+    def get_id(self):
+        # The password version is part of the session id, so changing the password ends other sessions
+        return f"{self.id}:{self.password_version}"
+
     def is_admin(self):
         return self.role == 'admin'
     
@@ -178,6 +185,9 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='pending') # pending, preparing, ready, served, paid, completed, cancelled
     payment_method = db.Column(db.String(50), nullable=True) # card, cash, ewallet
+    flagged_at = db.Column(db.DateTime, nullable=True) # Set by the sweeper when a pending order outlives its business day
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # Bumped on every change to the order or its items, see project/etags.py
+    client_token = db.Column(db.String(64), unique=True, nullable=True) # Idempotency key from the customer client's offline outbox
     items = db.relationship('OrderItem', backref='order', cascade="all, delete-orphan")
     table = db.relationship('Table')
 
@@ -192,6 +202,54 @@ class OrderItem(db.Model):
     menu_item = db.relationship('MenuItem')
     selected_modifiers = db.relationship('ModifierOption', secondary=order_item_modifier_options)
 
+class OrderAuditLog(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), index=True)
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), index=True)
+    action = db.Column(db.String(50), nullable=False) # e.g. 'auto_complete', 'flag_stale', 'close_ready'
+    from_status = db.Column(db.String(20))
+    to_status = db.Column(db.String(20))
+    source = db.Column(db.String(50), default='sweeper')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class JobLease(db.Model):
+    """Which process may run a periodic job until expires_at; see project/sweeper.py."""
+    name = db.Column(db.String(50), primary_key=True) # e.g. 'sweep_stale_orders'
+    holder = db.Column(db.String(32), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class OutboxMessage(db.Model):
+    """An email rendered at enqueue time and delivered by project/outbox.py."""
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255))
+    subject = db.Column(db.String(255), nullable=False)
+    body_text = db.Column(db.Text)
+    body_html = db.Column(db.Text)
+    status = db.Column(db.String(20), default='pending', index=True) # pending, sending, sent, dead
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    claimed_by = db.Column(db.String(32))
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+class PosMutation(db.Model):
+    """A mutation applied by /pos/sync, kept so a replayed batch is answered with the original result."""
+    id = db.Column(db.String(64), primary_key=True) # Generated by the tablet
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    type = db.Column(db.String(30), nullable=False)
+    result = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class DataVersion(db.Model):
+    """Per-restaurant counter bumped whenever a scope's data changes; see project/fragment_cache.py."""
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), primary_key=True)
+    scope = db.Column(db.String(20), primary_key=True) # e.g. 'menu'
+    version = db.Column(db.Integer, nullable=False, default=1)
+
 class Station(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
@@ -0,0 +1,80 @@
+"""
+The order and order item state machines.
+
+ORDER_TRANSITIONS / ITEM_TRANSITIONS list the statuses each status may move to. Moves
+that a client queued while offline are checked against the status the row has now,
+not the one the client saw (see resolve_transition), so a concurrent change on another
+device wins unless the queued move carries it further along the flow.
+"""
+
+ORDER_FLOW = ['pending', 'preparing', 'ready', 'served', 'paid', 'completed']
+ITEM_FLOW = ['pending', 'preparing', 'ready', 'served']
+TERMINAL_ORDER_STATUSES = {'completed', 'cancelled'}
+# Orders whose items may still be added, changed or removed
+OPEN_ORDER_STATUSES = ['pending', 'preparing', 'ready', 'served']
+# Orders a POS tablet keeps in its replica
+ACTIVE_ORDER_STATUSES = OPEN_ORDER_STATUSES + ['paid']
+
+ORDER_TRANSITIONS = {
+    'pending': ['preparing', 'ready', 'served', 'paid', 'cancelled'],
+    'preparing': ['pending', 'ready', 'served', 'paid', 'cancelled'],
+    'ready': ['preparing', 'served', 'paid', 'cancelled'],
+    'served': ['preparing', 'ready', 'paid', 'cancelled'],
+    'paid': ['completed'],
+    'completed': [],
+    'cancelled': [],
+}
+
+ITEM_TRANSITIONS = {
+    'pending': ['preparing', 'ready', 'served'],
+    'preparing': ['pending', 'ready', 'served'],
+    'ready': ['preparing', 'served'],
+    'served': [],
+}
+
+APPLY, NOOP, CONFLICT = 'apply', 'noop', 'conflict'
+
+
+def _rank(flow, status):
+    # Cancelled sorts after everything: nothing queued earlier may undo it
+    return flow.index(status) if status in flow else len(flow)
+
+
+def resolve_transition(transitions, flow, current, expected, target):
+    """
+    APPLY, NOOP or CONFLICT for moving a row from `current` to `target`, when the client
+    queued the move while it saw `expected`. If the row changed since, the move is only
+    applied when it is still allowed and goes forward from the new status.
+    """
+    if current == target:
+        return NOOP
+    if target not in transitions.get(current, ()):
+        return CONFLICT
+    if expected is None or expected == current:
+        return APPLY
+    return APPLY if _rank(flow, target) > _rank(flow, current) else CONFLICT
+
+
+def resolve_order_transition(current, expected, target):
+    return resolve_transition(ORDER_TRANSITIONS, ORDER_FLOW, current, expected, target)
+
+
+def resolve_item_transition(current, expected, target):
+    return resolve_transition(ITEM_TRANSITIONS, ITEM_FLOW, current, expected, target)
+
+
+def derived_order_status(order):
+    """
+    The kitchen status implied by the order's items, or None to leave it as it is.
+    Only orders still in the kitchen (pending/preparing/ready) follow their items.
+    """
+    if order.status not in ('pending', 'preparing', 'ready'):
+        return None
+    statuses = {item.status for item in order.items}
+    if not statuses:
+        return 'pending'
+    if 'preparing' in statuses:
+        return 'preparing'
+    if statuses <= {'ready', 'served'}:
+        return 'ready'
+    return 'pending'
@@ -0,0 +1,225 @@
+"""
+Persistent mail outbox.
+
+routes.email.send_email renders the templates and stores an OutboxMessage, so the
+request never waits on SMTP. A sender thread per serving worker (or `flask send-outbox` from
+cron) claims due messages, sends them over a reused SMTP connection, retries temporary
+failures with exponential backoff and dead-letters permanent ones (5xx replies, or
+MAIL_OUTBOX_MAX_ATTEMPTS exhausted).
+
+For local testing, point MAIL_SERVER/MAIL_PORT at any SMTP sink (e.g. MailHog, or
+`python -m aiosmtpd -n -l localhost:1025`) with MAIL_USE_TLS=false.
+"""
+import logging
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from sqlalchemy import or_, and_, update
+
+from extensions import db, mail
+from project.metrics import set_queue_depth
+from project.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# A 'sending' claim older than this is assumed to belong to a dead worker and is retried
+STALE_CLAIM = timedelta(minutes=10)
+
+_wakeup = threading.Event()
+
+
+def enqueue(recipient, subject, sender, body_text, body_html):
+    """Stores a rendered message, commits, and nudges this worker's sender."""
+    message = OutboxMessage(
+        recipient=recipient, subject=subject, sender=sender,
+        body_text=body_text, body_html=body_html,
+        status='pending', attempts=0, next_attempt_at=datetime.utcnow()
+    )
+    db.session.add(message)
+    db.session.commit()
+    _wakeup.set()
+    return message.id
+
+
+def backoff(attempts, base_seconds, max_seconds):
+    """Delay before retry number `attempts` (1-based): base, 2x base, 4x base... capped."""
+    return min(base_seconds * (2 ** (attempts - 1)), max_seconds)
+
+
+def is_permanent(error):
+    """SMTP 5xx replies (bad recipient, rejected content) will not succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    code = getattr(error, 'smtp_code', None)
+    return code is not None and 500 <= code < 600
+
+
+class SMTPConnectionPool:
+    """
+    Keeps one flask_mail connection open between batches and reuses it while it is
+    younger than `max_idle` seconds and still answers NOOP.
+    """
+
+    def __init__(self, max_idle=60):
+        self.max_idle = max_idle
+        self._connection = None
+        self._last_used = 0.0
+
+    def get(self):
+        if self._connection is not None:
+            fresh = time.monotonic() - self._last_used < self.max_idle
+            if fresh and self._alive():
+                return self._connection
+            self.close()
+        connection = mail.connect()
+        connection.__enter__()
+        self._connection = connection
+        return connection
+
+    def release(self):
+        self._last_used = time.monotonic()
+
+    def _alive(self):
+        try:
+            return self._connection.host.noop()[0] == 250
+        except Exception:
+            return False
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.__exit__(None, None, None)
+            except Exception:
+                pass
+        self._connection = None
+
+
+def _claim(batch_size, now):
+    """Marks up to batch_size due messages as 'sending' for this run and returns them."""
+    token = uuid.uuid4().hex
+    due = or_(
+        and_(OutboxMessage.status == 'pending', OutboxMessage.next_attempt_at <= now),
+        and_(OutboxMessage.status == 'sending', OutboxMessage.claimed_at < now - STALE_CLAIM),
+    )
+    ids = [row.id for row in db.session.query(OutboxMessage.id).filter(due)
+           .order_by(OutboxMessage.next_attempt_at).limit(batch_size).all()]
+    if not ids:
+        return []
+    # Re-check the due condition in the UPDATE so two workers never claim the same row
+    db.session.execute(
+        update(OutboxMessage).where(OutboxMessage.id.in_(ids), due)
+        .values(status='sending', claimed_by=token, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return OutboxMessage.query.filter_by(claimed_by=token, status='sending').all()
+
+
+def deliver_due(app, pool=None):
+    """Sends every due message in batches; returns {'sent': n, 'retried': n, 'dead': n}."""
+    config = app.config
+    batch_size = config.get('MAIL_OUTBOX_BATCH_SIZE', 50)
+    max_attempts = config.get('MAIL_OUTBOX_MAX_ATTEMPTS', 8)
+    base, cap = config.get('MAIL_OUTBOX_BACKOFF_SECONDS', 30), config.get('MAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+    own_pool = pool is None
+    pool = pool or SMTPConnectionPool()
+    summary = {'sent': 0, 'retried': 0, 'dead': 0}
+
+    try:
+        while True:
+            now = datetime.utcnow()
+            batch = _claim(batch_size, now)
+            if not batch:
+                break
+            try:
+                connection = pool.get()
+            except Exception as e:
+                connection, connect_error = None, e
+                pool.close()
+
+            for message in batch:
+                message.attempts = (message.attempts or 0) + 1
+                try:
+                    if connection is None:
+                        raise connect_error
+                    connection.send(Message(
+                        message.subject, sender=message.sender, recipients=[message.recipient],
+                        body=message.body_text, html=message.body_html
+                    ))
+                except Exception as e:
+                    message.last_error = f"{type(e).__name__}: {e}"[:2000]
+                    message.claimed_by = None
+                    if is_permanent(e) or message.attempts >= max_attempts:
+                        message.status = 'dead'
+                        summary['dead'] += 1
+                        logger.error("Outbox message %s to %s dead-lettered after %d attempt(s): %s",
+                                     message.id, message.recipient, message.attempts, message.last_error)
+                    else:
+                        message.status = 'pending'
+                        message.next_attempt_at = now + timedelta(seconds=backoff(message.attempts, base, cap))
+                        summary['retried'] += 1
+                        logger.warning("Outbox message %s to %s failed (attempt %d), retrying at %s: %s",
+                                       message.id, message.recipient, message.attempts,
+                                       message.next_attempt_at, message.last_error)
+                    if connection is not None and not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                        # The connection itself may be broken; reconnect for the rest of the batch
+                        pool.close()
+                        try:
+                            connection = pool.get()
+                        except Exception as reconnect_error:
+                            connection, connect_error = None, reconnect_error
+                else:
+                    message.status = 'sent'
+                    message.sent_at = datetime.utcnow()
+                    message.last_error = None
+                    summary['sent'] += 1
+            pool.release()
+            db.session.commit()
+    finally:
+        if own_pool:
+            pool.close()
+        set_queue_depth('mail_outbox', OutboxMessage.query.filter_by(status='pending').count())
+    return summary
+
+
+class OutboxSender:
+    """Background thread that delivers the outbox every `interval` seconds or when woken by enqueue()."""
+
+    def __init__(self, app, interval=10):
+        self.app = app
+        self.interval = interval
+        self.pool = SMTPConnectionPool(max_idle=app.config.get('MAIL_OUTBOX_CONNECTION_IDLE_SECONDS', 60))
+        self._thread = threading.Thread(target=self._loop, name='mail-outbox', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            _wakeup.wait(self.interval)
+            _wakeup.clear()
+            with self.app.app_context():
+                try:
+                    deliver_due(self.app, self.pool)
+                except Exception:
+                    logger.exception("Outbox delivery run failed")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+
+def start_outbox_sender(app):
+    """
+    Starts this worker's sender thread unless MAIL_OUTBOX_SENDER is off (e.g. cron runs
+    send-outbox). Called by serving processes only (gunicorn's post_worker_init, `python
+    app.py`), not by create_app, so CLI commands, scripts and tests never send.
+    """
+    if not app.config.get('MAIL_OUTBOX_SENDER') or 'mail_outbox_sender' in app.extensions:
+        return
+    sender = OutboxSender(app, interval=app.config.get('MAIL_OUTBOX_INTERVAL_SECONDS', 10))
+    app.extensions['mail_outbox_sender'] = sender
+    sender.start()
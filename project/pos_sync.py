@@ -0,0 +1,354 @@
+"""
+Batched mutations and replica deltas for POS tablets (storefront and kitchen).
+
+A tablet applies actions to its local replica of the active orders at once and sends
+them to /pos/sync in batches. Each mutation:
+- carries an id generated on the tablet. Results are recorded in PosMutation, so a
+  batch resent after a lost response is answered from the record, not applied twice.
+- runs in its own SAVEPOINT, so one failure does not undo the rest of the batch.
+- is checked against the order state machine (project/order_state.py) using the row's
+  current status. A mutation that lost a race with another device comes back as a
+  conflict, and the tablet drops it from its local state.
+
+The same request returns the replica delta. The tablet sends {order_id: version} for
+the orders it holds, and gets back the active orders whose version differs, plus the
+ids of those no longer active.
+
+Creating, moving and merging orders stay online-only actions on the storefront page:
+they depend on which tables are free at that moment.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+
+from extensions import db
+from project.metrics import observe_kitchen_pickup
+from project.models import Order, OrderItem, MenuItem, ModifierGroup, ModifierOption, PosMutation
+from project.order_state import (ACTIVE_ORDER_STATUSES, OPEN_ORDER_STATUSES, ORDER_FLOW, ITEM_FLOW,
+                                 ORDER_TRANSITIONS, ITEM_TRANSITIONS, APPLY, NOOP,
+                                 resolve_order_transition, resolve_item_transition, derived_order_status)
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 200
+MAX_ID = 2 ** 63 - 1
+MUTATION_RETENTION = timedelta(days=7) # Longer than any tablet stays offline with a queue
+PAYMENT_METHODS = ('card', 'cash', 'ewallet')
+
+
+class MutationError(Exception):
+    """A mutation that cannot be applied; the message is shown on the tablet."""
+
+    def __init__(self, message, status='conflict'):
+        super().__init__(message)
+        self.status = status
+
+
+def client_config():
+    """The state machine as the tablet's pos.js needs it, so both sides apply the same rules."""
+    return {
+        'order_flow': ORDER_FLOW, 'item_flow': ITEM_FLOW,
+        'order_transitions': ORDER_TRANSITIONS, 'item_transitions': ITEM_TRANSITIONS,
+        'open_order_statuses': OPEN_ORDER_STATUSES, 'active_order_statuses': ACTIVE_ORDER_STATUSES,
+        'max_batch': MAX_BATCH,
+    }
+
+
+# --- Mutations ---
+
+def _ref(refs, ref, key):
+    """The id an earlier add_item mutation (by its mutation id) produced, in this batch or a previous one."""
+    if ref in refs:
+        return refs[ref].get(key)
+    recorded = db.session.get(PosMutation, ref)
+    return (recorded.result or {}).get(key) if recorded is not None else None
+
+
+def _id(value, label):
+    """A row id as the tablet sends it: a positive integer, or its digits in a string."""
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= MAX_ID:
+        raise MutationError(f'Invalid {label}.', 'rejected')
+    return value
+
+
+def _text(mutation, key, label, required=False):
+    value = mutation.get(key)
+    if value is None and not required:
+        return None
+    if not isinstance(value, str):
+        raise MutationError(f'Invalid {label}.', 'rejected')
+    return value
+
+
+def _order(restaurant_id, mutation):
+    order = Order.query.filter_by(id=_id(mutation.get('order_id'), 'order id'), restaurant_id=restaurant_id).first()
+    if order is None:
+        raise MutationError('Order not found.')
+    return order
+
+
+def _item(restaurant_id, mutation, refs):
+    if mutation.get('item_id'):
+        item_id = _id(mutation['item_id'], 'item id')
+    elif mutation.get('item_ref'):
+        item_id = _ref(refs, _text(mutation, 'item_ref', 'item reference'), 'item_id')
+    else:
+        item_id = None
+    item = OrderItem.query.join(Order).filter(OrderItem.id == item_id, Order.restaurant_id == restaurant_id).first() \
+        if item_id else None
+    if item is None:
+        raise MutationError('Item no longer on the order.')
+    return item
+
+
+def _require_open(order):
+    if order.status not in OPEN_ORDER_STATUSES:
+        raise MutationError(f'Order #{order.id} is already {order.status}.')
+
+
+def _quantity(value):
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise MutationError('Invalid quantity.', 'rejected')
+    if abs(quantity) > MAX_ID:
+        raise MutationError('Invalid quantity.', 'rejected')
+    return quantity
+
+
+def _set_order_status(order, target, expected, status_changes):
+    decision = resolve_order_transition(order.status, expected, target)
+    if decision == NOOP:
+        return {'status': 'noop', 'order_id': order.id}
+    if decision != APPLY:
+        raise MutationError(f'Order #{order.id} is {order.status}; cannot change it to {target}.')
+    order.status = target
+    status_changes[order.id] = target
+    return {'order_id': order.id}
+
+
+def _item_status(restaurant_id, mutation, refs, status_changes):
+    item = _item(restaurant_id, mutation, refs)
+    target = _text(mutation, 'to', 'status', required=True)
+    decision = resolve_item_transition(item.status, _text(mutation, 'from', 'status'), target)
+    if decision == NOOP:
+        return {'status': 'noop', 'order_id': item.order_id, 'item_id': item.id}
+    if decision != APPLY:
+        raise MutationError(f'Item is already {item.status}.')
+    previous_status = item.status
+    item.status = target
+    observe_kitchen_pickup(item.order, previous_status, target)
+    order = item.order
+    derived = derived_order_status(order)
+    if derived and derived != order.status:
+        order.status = derived
+        status_changes[order.id] = derived
+    return {'order_id': order.id, 'item_id': item.id}
+
+
+def _order_status(restaurant_id, mutation, refs, status_changes):
+    return _set_order_status(_order(restaurant_id, mutation), _text(mutation, 'to', 'status', required=True),
+                             _text(mutation, 'from', 'status'), status_changes)
+
+
+def _cancel_order(restaurant_id, mutation, refs, status_changes):
+    return _set_order_status(_order(restaurant_id, mutation), 'cancelled', _text(mutation, 'from', 'status'), status_changes)
+
+
+def _mark_paid(restaurant_id, mutation, refs, status_changes):
+    order = _order(restaurant_id, mutation)
+    payment_method = mutation.get('payment_method') or 'card'
+    if not isinstance(payment_method, str) or payment_method not in PAYMENT_METHODS:
+        raise MutationError('Unknown payment method.', 'rejected')
+    result = _set_order_status(order, 'paid', _text(mutation, 'from', 'status'), status_changes)
+    order.payment_method = payment_method
+    return result
+
+
+def _add_item(restaurant_id, mutation, refs, status_changes):
+    order = _order(restaurant_id, mutation)
+    _require_open(order)
+    quantity = _quantity(mutation.get('quantity', 1))
+    if quantity < 1:
+        raise MutationError('Invalid quantity.', 'rejected')
+    menu_item = MenuItem.query.filter_by(id=_id(mutation.get('menu_item_id'), 'menu item'),
+                                         restaurant_id=restaurant_id).first()
+    if menu_item is None:
+        raise MutationError('Menu item not found.', 'rejected')
+    item = OrderItem(order_id=order.id, menu_item_id=menu_item.id, quantity=quantity,
+                     notes=_text(mutation, 'notes', 'notes') or None)
+    modifiers = mutation.get('modifiers') or []
+    if not isinstance(modifiers, list):
+        raise MutationError('Invalid modifiers.', 'rejected')
+    modifier_ids = [_id(modifier_id, 'modifier') for modifier_id in modifiers]
+    if modifier_ids:
+        item.selected_modifiers = ModifierOption.query.join(ModifierGroup).filter(
+            ModifierOption.id.in_(modifier_ids), ModifierGroup.menu_item_id == menu_item.id
+        ).all()
+    db.session.add(item)
+    db.session.flush()
+    return {'order_id': order.id, 'item_id': item.id}
+
+
+def _update_item_quantity(restaurant_id, mutation, refs, status_changes):
+    item = _item(restaurant_id, mutation, refs)
+    _require_open(item.order)
+    quantity = _quantity(mutation.get('quantity'))
+    if quantity > 0 and mutation.get('from') is not None:
+        # Applied as a change relative to what the tablet saw, so concurrent edits add up
+        quantity = item.quantity + quantity - _quantity(mutation['from'])
+    result = {'order_id': item.order_id, 'item_id': item.id}
+    if quantity > 0:
+        item.quantity = quantity
+    else:
+        db.session.delete(item)
+    return result
+
+
+def _remove_item(restaurant_id, mutation, refs, status_changes):
+    item = _item(restaurant_id, mutation, refs)
+    _require_open(item.order)
+    result = {'order_id': item.order_id, 'item_id': item.id}
+    db.session.delete(item)
+    return result
+
+
+HANDLERS = {
+    'item_status': _item_status,
+    'order_status': _order_status,
+    'cancel_order': _cancel_order,
+    'mark_paid': _mark_paid,
+    'add_item': _add_item,
+    'update_item_quantity': _update_item_quantity,
+    'remove_item': _remove_item,
+}
+
+
+def _recorded_result(restaurant_id, mutation_id):
+    recorded = db.session.get(PosMutation, mutation_id)
+    if recorded is None:
+        return None
+    if recorded.restaurant_id != restaurant_id:
+        return {'id': mutation_id, 'status': 'rejected', 'message': 'Invalid mutation.'}
+    return {**(recorded.result or {}), 'duplicate': True}
+
+
+def _apply_one(restaurant_id, user_id, mutation, refs, status_changes):
+    mutation_id = mutation.get('id') if isinstance(mutation, dict) else None
+    mutation_type = mutation.get('type') if isinstance(mutation, dict) else None
+    if not isinstance(mutation_id, str) or not 0 < len(mutation_id) <= 64 or mutation_type not in HANDLERS:
+        return {'id': mutation_id, 'status': 'rejected', 'message': 'Invalid mutation.'}
+
+    result = _recorded_result(restaurant_id, mutation_id)
+    if result is not None:
+        refs[mutation_id] = result
+        return result
+
+    changes = {}
+    savepoint = db.session.begin_nested()
+    try:
+        outcome = HANDLERS[mutation_type](restaurant_id, mutation, refs, changes)
+        result = {'id': mutation_id, 'status': outcome.pop('status', 'applied'), **outcome}
+    except MutationError as error:
+        savepoint.rollback()
+        savepoint, changes = db.session.begin_nested(), {}
+        result = {'id': mutation_id, 'status': error.status, 'message': str(error)}
+    except Exception:
+        # Anything else is a malformed mutation this code did not anticipate. Record it as
+        # rejected like the rest, or the tablet would resend the whole batch forever.
+        logger.exception("POS mutation %s (%s) failed", mutation_id, mutation_type,
+                         extra={'restaurant_id': restaurant_id})
+        savepoint.rollback()
+        savepoint, changes = db.session.begin_nested(), {}
+        result = {'id': mutation_id, 'status': 'rejected', 'message': 'This change could not be applied.'}
+    try:
+        # Conflicts are recorded too: a replay must not apply a mutation that was refused
+        db.session.add(PosMutation(id=mutation_id, restaurant_id=restaurant_id, user_id=user_id,
+                                   type=mutation_type, result=result))
+        db.session.flush()
+        savepoint.commit()
+    except IntegrityError:
+        # The same batch is being applied by a concurrent request
+        savepoint.rollback()
+        return _recorded_result(restaurant_id, mutation_id) or \
+            {'id': mutation_id, 'status': 'rejected', 'message': 'Mutation is already being applied.'}
+    refs[mutation_id] = result
+    status_changes.update(changes)
+    return result
+
+
+def apply_batch(restaurant_id, user_id, mutations):
+    """Applies up to MAX_BATCH mutations in one transaction; returns (results, {order_id: new status})."""
+    results, refs, status_changes = [], {}, {}
+    for mutation in mutations[:MAX_BATCH]:
+        results.append(_apply_one(restaurant_id, user_id, mutation, refs, status_changes))
+    db.session.commit()
+    conflicts = sum(1 for result in results if result['status'] in ('conflict', 'rejected'))
+    if conflicts:
+        logger.info("POS sync for restaurant %s: %d of %d mutations refused", restaurant_id, conflicts, len(results),
+                    extra={'restaurant_id': restaurant_id})
+    return results, status_changes
+
+
+def purge_mutations(now=None):
+    """Deletes mutation records older than MUTATION_RETENTION (run by the order sweeper; uncommitted)."""
+    cutoff = (now or datetime.utcnow()) - MUTATION_RETENTION
+    return db.session.execute(delete(PosMutation).where(PosMutation.created_at < cutoff)).rowcount
+
+
+# --- Replica ---
+
+def serialize_pos_order(order):
+    return {
+        'id': order.id,
+        'version': order.version,
+        'status': order.status,
+        'table_id': order.table_id,
+        'table_number': order.table.number if order.table else None,
+        'payment_method': order.payment_method,
+        'created_at': order.created_at.isoformat() + 'Z' if order.created_at else None,
+        'flagged_at': order.flagged_at.isoformat() + 'Z' if order.flagged_at else None,
+        'items': [{
+            'id': item.id,
+            'menu_item_id': item.menu_item_id,
+            'name': item.menu_item.name if item.menu_item else None,
+            'unit_price': item.menu_item.price if item.menu_item else 0,
+            'station_id': item.menu_item.station_id if item.menu_item else None,
+            'quantity': item.quantity,
+            'status': item.status,
+            'notes': item.notes,
+            'created_at': item.created_at.isoformat() + 'Z' if item.created_at else None,
+            'modifiers': [{'id': mod.id, 'name': mod.name, 'price': mod.price_override} for mod in item.selected_modifiers],
+        } for item in order.items],
+    }
+
+
+def active_order_versions(restaurant_id):
+    """{order_id: version} of the restaurant's active orders, in one narrow query."""
+    return dict(db.session.query(Order.id, Order.version).filter(
+        Order.restaurant_id == restaurant_id, Order.status.in_(ACTIVE_ORDER_STATUSES)
+    ).all())
+
+
+def load_pos_orders(order_ids):
+    """serialize_pos_order() for the given orders, with their items, menu items and modifiers batch-loaded."""
+    orders = Order.query.filter(Order.id.in_(order_ids)).options(
+        joinedload(Order.table),
+        selectinload(Order.items).joinedload(OrderItem.menu_item),
+        selectinload(Order.items).selectinload(OrderItem.selected_modifiers),
+    ).order_by(Order.id).all() if order_ids else []
+    return [serialize_pos_order(order) for order in orders]
+
+
+def replica_delta(restaurant_id, known):
+    """(changed order snapshots, ids no longer active) for a replica holding {order_id: version}."""
+    known = {int(order_id): version for order_id, version in (known or {}).items() if str(order_id).isdigit()}
+    active = active_order_versions(restaurant_id)
+    changed_ids = [order_id for order_id, version in active.items() if known.get(order_id) != version]
+    removed = [order_id for order_id in known if order_id not in active]
+    return load_pos_orders(changed_ids), removed
@@ -0,0 +1,90 @@
+"""
+Socket.IO handlers. Clients join one room after connecting:
+- staff/kitchen screens: emit('join', {'restaurant_id': ...}) -> room restaurant_<id> (login required)
+- customers: emit('join', {'order_id': ..., 'token': ...}) -> room order_<id>, with the
+  order_token that place_order returned, so a customer can only follow their own orders
+Kitchen screens acknowledge traced 'new_order' events with 'order_rendered'.
+"""
+from flask import request, current_app
+from flask_login import current_user
+from flask_socketio import join_room
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from extensions import socketio
+from project.metrics import socket_client_joined
+from project.tracing import record_kitchen_ack
+
+# sid -> room type, so disconnects decrement the right gauge
+_client_rooms = {}
+
+
+def _order_serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='order-room')
+
+
+def order_room_token(order_id):
+    """Signed token that lets the customer who placed the order join its room."""
+    return _order_serializer().dumps(order_id)
+
+
+def _order_for_room_token(token):
+    try:
+        return _order_serializer().loads(token) if isinstance(token, str) else None
+    except BadSignature:
+        return None
+
+
+@socketio.on('connect')
+def on_connect():
+    _client_rooms[request.sid] = 'none'
+    socket_client_joined('none')
+
+
+def _room_id(value):
+    """A room's id as clients send it: a positive integer, or its digits in a string; None otherwise."""
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        return None
+    return value
+
+
+@socketio.on('join')
+def on_join(data):
+    if not isinstance(data, dict):
+        return {'success': False}
+    if data.get('restaurant_id'):
+        if not current_user.is_authenticated or current_user.restaurant_id != _room_id(data['restaurant_id']):
+            return {'success': False}
+        join_room(f"restaurant_{current_user.restaurant_id}")
+        room_type = 'restaurant'
+    elif data.get('order_id'):
+        order_id = _order_for_room_token(data.get('token'))
+        if order_id is None or order_id != _room_id(data['order_id']):
+            return {'success': False}
+        join_room(f"order_{order_id}")
+        room_type = 'order'
+    else:
+        return {'success': False}
+
+    previous = _client_rooms.get(request.sid)
+    if previous != room_type:
+        if previous:
+            socket_client_joined(previous, -1)
+        socket_client_joined(room_type)
+        _client_rooms[request.sid] = room_type
+    return {'success': True}
+
+
+@socketio.on('order_rendered')
+def on_order_rendered(data):
+    if not current_user.is_authenticated:
+        return {'success': False}
+    return {'success': record_kitchen_ack(data, client_id=request.sid)}
+
+
+@socketio.on('disconnect')
+def on_disconnect(*args):
+    room_type = _client_rooms.pop(request.sid, None)
+    if room_type:
+        socket_client_joined(room_type, -1)
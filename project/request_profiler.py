@@ -0,0 +1,274 @@
+"""
+On-demand sampling profiler for live requests.
+
+A sysadmin arms it for the next N requests matching an endpoint and/or restaurant.
+The arming is a small JSON file under REQUEST_PROFILER_DIR, so every worker process
+picks it up. Each worker re-reads it at most once per second, which is the only cost
+while disarmed. Workers claim capture slots with O_EXCL files, so exactly N requests
+are captured across all workers.
+
+While a matching request runs, a real OS thread samples the request thread's stack
+every REQUEST_PROFILER_INTERVAL_MS. The result is written to the same directory as JSON:
+- folded stacks (flamegraph.pl / speedscope format), with the SQL statement running at
+  each sample as the leaf frame;
+- the raw samples;
+- every statement the request executed.
+
+Under eventlet all greenlets share one OS thread, so a sample can occasionally land in
+another greenlet that was scheduled at that instant.
+"""
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+from flask_login import current_user
+
+from project.logging_setup import _real
+from project.sql_profiler import APP_ROOT, RequestProfile, current_profile, fingerprint, install_listeners
+
+ARM_FILE = 'armed.json'
+RESULT_PREFIX = 'profile-'
+
+_cache = {'checked_at': 0.0, 'mtime': None, 'state': None}
+
+
+def _directory(app):
+    return app.config.get('REQUEST_PROFILER_DIR') or os.path.join(app.instance_path, 'profiles')
+
+
+def arm(app, remaining, endpoint=None, restaurant_id=None, restaurant_slug=None, interval_ms=None, armed_by=None):
+    """Arms the profiler for the next `remaining` matching requests (replacing any previous arming)."""
+    directory = _directory(app)
+    os.makedirs(directory, exist_ok=True)
+    disarm(app)
+    state = {
+        'id': uuid.uuid4().hex[:12],
+        'remaining': int(remaining),
+        'endpoint': endpoint or None,
+        'restaurant_id': int(restaurant_id) if restaurant_id else None,
+        'restaurant_slug': restaurant_slug,
+        'interval_ms': float(interval_ms or app.config.get('REQUEST_PROFILER_INTERVAL_MS', 5)),
+        'armed_by': armed_by,
+        'armed_at': datetime.utcnow().isoformat(),
+    }
+    tmp_path = os.path.join(directory, ARM_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, os.path.join(directory, ARM_FILE))
+    return state
+
+
+def disarm(app):
+    directory = _directory(app)
+    for name in os.listdir(directory) if os.path.isdir(directory) else ():
+        if name == ARM_FILE or name.startswith('slot-'):
+            os.remove(os.path.join(directory, name))
+
+
+def armed_state(app):
+    """The current arming, re-read from disk at most once per second."""
+    now = time.monotonic()
+    if now - _cache['checked_at'] < 1.0:
+        return _cache['state']
+    _cache['checked_at'] = now
+    path = os.path.join(_directory(app), ARM_FILE)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        _cache['mtime'] = _cache['state'] = None
+        return None
+    if mtime != _cache['mtime']:
+        try:
+            with open(path) as f:
+                _cache['state'] = json.load(f)
+            _cache['mtime'] = mtime
+        except (OSError, ValueError):
+            _cache['state'] = None
+    return _cache['state']
+
+
+def _matches(state):
+    if state['endpoint'] and request.endpoint != state['endpoint']:
+        return False
+    if state['restaurant_id']:
+        view_args = request.view_args or {}
+        restaurant_id = getattr(current_user, 'restaurant_id', None) if current_user.is_authenticated else None
+        if restaurant_id != state['restaurant_id'] and \
+                view_args.get('restaurant_id') != state['restaurant_id'] and \
+                (not state['restaurant_slug'] or view_args.get('slug') != state['restaurant_slug']):
+            return False
+    return True
+
+
+def _claim_slot(app, state):
+    """Atomically claims one of the armed capture slots; returns the slot number or None."""
+    directory = _directory(app)
+    for slot in range(state['remaining']):
+        try:
+            fd = os.open(os.path.join(directory, f"slot-{state['id']}-{slot}"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            continue
+        except OSError:
+            return None
+        os.close(fd)
+        return slot
+    _cache['state'] = None # All slots taken: stay idle until the next arming changes the file
+    return None
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(APP_ROOT) and 'site-packages' not in filename:
+        filename = os.path.relpath(filename, APP_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{frame.f_lineno})"
+
+
+class StackSampler:
+    """Samples one thread's stack from a separate OS thread until stopped."""
+
+    MAX_SAMPLES = 20000
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = [] # (perf_counter, [frames root -> leaf])
+        real_threading = _real('threading')
+        self._sleep = _real('time').sleep
+        self._stop = real_threading.Event()
+        self._thread = real_threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while not self._stop.is_set() and len(self.samples) < self.MAX_SAMPLES:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples.append((time.perf_counter(), stack))
+            self._sleep(self.interval)
+
+
+def _statement_at(statements, at):
+    for started_at, duration, statement in statements:
+        if started_at <= at <= started_at + duration:
+            return statement
+    return None
+
+
+def _build_result(state, slot, sampler, profile, started, elapsed, status_code):
+    statements = profile.statements if profile is not None else []
+    folded = Counter()
+    samples = []
+    for at, stack in sampler.samples:
+        statement = _statement_at(statements, at)
+        frames = list(stack)
+        if statement:
+            frames.append('SQL: ' + fingerprint(statement)[:200].replace(';', ','))
+        folded[';'.join(frames)] += 1
+        samples.append({'t_ms': round((at - started) * 1000, 3), 'stack': stack, 'sql': statement})
+    return {
+        'arming_id': state['id'],
+        'slot': slot,
+        'endpoint': request.endpoint,
+        'path': request.path,
+        'method': request.method,
+        'status': status_code,
+        'restaurant_id': getattr(current_user, 'restaurant_id', None) if current_user.is_authenticated else None,
+        'captured_at': datetime.utcnow().isoformat(),
+        'duration_ms': round(elapsed * 1000, 3),
+        'interval_ms': state['interval_ms'],
+        'folded': [f"{stack} {count}" for stack, count in folded.most_common()],
+        'samples': samples,
+        'sql': [{'t_ms': round((s - started) * 1000, 3), 'duration_ms': round(d * 1000, 3), 'statement': stmt}
+                for s, d, stmt in statements],
+    }
+
+
+def list_results(app):
+    directory = _directory(app)
+    if not os.path.isdir(directory):
+        return []
+    results = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.startswith(RESULT_PREFIX) and name.endswith('.json'):
+            path = os.path.join(directory, name)
+            results.append({'name': name, 'size': os.path.getsize(path),
+                            'modified': datetime.utcfromtimestamp(os.path.getmtime(path))})
+    return results
+
+
+def result_path(app, name):
+    """Absolute path of a stored result, or None if the name is not a result file."""
+    if os.path.basename(name) != name or not name.startswith(RESULT_PREFIX) or not name.endswith('.json'):
+        return None
+    path = os.path.join(_directory(app), name)
+    return path if os.path.isfile(path) else None
+
+
+def init_request_profiler(app):
+    """Installs the (normally idle) hooks when REQUEST_PROFILER_ENABLED is set."""
+    if not app.config.get('REQUEST_PROFILER_ENABLED'):
+        return
+
+    install_listeners(app)
+
+    @app.before_request
+    def maybe_start_profile():
+        state = armed_state(app)
+        if state is None or request.endpoint in (None, 'static') or request.blueprint == 'sysadmin':
+            return
+        if not _matches(state):
+            return
+        slot = _claim_slot(app, state)
+        if slot is None:
+            return
+        if g.get('_sql_profile') is None:
+            g._sql_profile = RequestProfile()
+            g._request_profiler_owns_sql = True
+        sampler = StackSampler(_real('threading').get_ident(), state['interval_ms'] / 1000.0)
+        g._request_profile = (state, slot, sampler, time.perf_counter())
+        sampler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        captured = g.pop('_request_profile', None)
+        if captured is None:
+            return response
+        state, slot, sampler, started = captured
+        sampler.stop()
+        elapsed = time.perf_counter() - started
+        profile = current_profile()
+        if g.pop('_request_profiler_owns_sql', False):
+            g.pop('_sql_profile', None)
+
+        result = _build_result(state, slot, sampler, profile, started, elapsed, response.status_code)
+        name = f"{RESULT_PREFIX}{datetime.utcnow():%Y%m%d-%H%M%S}-{state['id']}-{slot}.json"
+        try:
+            with open(os.path.join(_directory(app), name), 'w') as f:
+                json.dump(result, f)
+        except OSError:
+            app.logger.exception("Could not store request profile %s", name)
+        if slot == state['remaining'] - 1:
+            app.logger.info("Request profiler arming %s captured its last request", state['id'])
+            try:
+                os.remove(os.path.join(_directory(app), ARM_FILE))
+            except OSError:
+                pass
+        return response
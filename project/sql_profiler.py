@@ -0,0 +1,179 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from extensions import db
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]*)\)", re.IGNORECASE)
+_PLACEHOLDER_RUN = re.compile(r"(\?|%\(\w+\)s|:\w+)(\s*,\s*(\?|%\(\w+\)s|:\w+))+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Per-endpoint aggregates for this process: endpoint -> dict
+_endpoint_stats = {}
+_stats_lock = threading.Lock()
+
+
+def fingerprint(statement):
+    """Normalizes a SQL statement so executions differing only in literals/params compare equal."""
+    sql = _STRING_LITERAL.sub('?', statement)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER_RUN.sub('?, ...', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _origin():
+    """Returns 'path:line in func' for the innermost app frame (routes, models or templates)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_ROOT) and filename != _THIS_FILE and 'site-packages' not in filename:
+            return f"{os.path.relpath(filename, APP_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class RequestProfile:
+    """SQL activity recorded during one request."""
+
+    MAX_STATEMENTS = 500
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.fingerprints = Counter()
+        self.origins = {}
+        self.statements = [] # (started_at, duration, statement), capped at MAX_STATEMENTS
+
+    def record(self, statement, started_at, duration, origin):
+        fp = fingerprint(statement)
+        self.count += 1
+        self.total_time += duration
+        self.fingerprints[fp] += 1
+        if origin:
+            self.origins.setdefault(fp, Counter())[origin] += 1
+        if len(self.statements) < self.MAX_STATEMENTS:
+            self.statements.append((started_at, duration, statement))
+
+    def n_plus_one(self, threshold):
+        """Returns [(fingerprint, count, origin)] for statements repeated at least `threshold` times."""
+        suspects = []
+        for fp, count in self.fingerprints.most_common():
+            if count < threshold:
+                break
+            origins = self.origins.get(fp)
+            origin = origins.most_common(1)[0][0] if origins else None
+            suspects.append((fp, count, origin))
+        return suspects
+
+
+def current_profile():
+    """Returns the RequestProfile for the active request, or None when not profiling."""
+    if not has_request_context():
+        return None
+    return g.get('_sql_profile')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get('_sql_profile') is not None:
+        conn.info.setdefault('_sql_profiler_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_sql_profiler_start')
+    if not starts:
+        return
+    started_at = starts.pop()
+    profile = current_profile()
+    if profile is not None:
+        profile.record(statement, started_at, time.perf_counter() - started_at, _origin())
+
+
+def endpoint_stats():
+    """Returns a snapshot of the per-endpoint aggregates, busiest endpoints first."""
+    with _stats_lock:
+        rows = []
+        for endpoint, stats in _endpoint_stats.items():
+            requests = stats['requests'] or 1
+            rows.append({
+                'endpoint': endpoint,
+                'requests': stats['requests'],
+                'statements': stats['statements'],
+                'avg_statements': stats['statements'] / requests,
+                'max_statements': stats['max_statements'],
+                'avg_time_ms': stats['time'] * 1000 / requests,
+                'n_plus_one': [(origin, fp, hits) for (origin, fp), hits in stats['n_plus_one'].most_common()],
+            })
+    return sorted(rows, key=lambda r: r['statements'], reverse=True)
+
+
+def reset_stats():
+    with _stats_lock:
+        _endpoint_stats.clear()
+
+
+def _aggregate(endpoint, profile, suspects):
+    with _stats_lock:
+        stats = _endpoint_stats.setdefault(endpoint, {
+            'requests': 0, 'statements': 0, 'time': 0.0, 'max_statements': 0, 'n_plus_one': Counter()
+        })
+        stats['requests'] += 1
+        stats['statements'] += profile.count
+        stats['time'] += profile.total_time
+        stats['max_statements'] = max(stats['max_statements'], profile.count)
+        for fp, count, origin in suspects:
+            stats['n_plus_one'][(origin or '?', fp)] += 1
+
+
+def install_listeners(app):
+    """
+    Hooks statement timing into every engine. Statements are only recorded while a request
+    has a RequestProfile in g._sql_profile (see also project.request_profiler).
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def init_sql_profiler(app):
+    """Installs the profiler when SQL_PROFILER_ENABLED is set. Costs nothing when disabled."""
+    if not app.config.get('SQL_PROFILER_ENABLED'):
+        return
+
+    install_listeners(app)
+
+    threshold = app.config.get('SQL_PROFILER_N_PLUS_ONE_THRESHOLD', 5)
+    send_headers = app.config.get('SQL_PROFILER_HEADERS', app.debug)
+
+    @app.before_request
+    def start_sql_profile():
+        if request.endpoint != 'static':
+            g._sql_profile = RequestProfile()
+
+    @app.after_request
+    def finish_sql_profile(response):
+        profile = g.pop('_sql_profile', None)
+        if profile is None:
+            return response
+        suspects = profile.n_plus_one(threshold)
+        _aggregate(request.endpoint or request.path, profile, suspects)
+        for fp, count, origin in suspects:
+            app.logger.warning("Possible N+1 on %s: %dx at %s: %s", request.endpoint, count, origin, fp[:200])
+        if send_headers:
+            response.headers['X-DB-Statements'] = str(profile.count)
+            response.headers['X-DB-Time-Ms'] = f"{profile.total_time * 1000:.1f}"
+            response.headers['X-DB-N-Plus-One'] = str(len(suspects))
+        return response
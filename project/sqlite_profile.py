@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlalchemy import event
+
+from extensions import db
+from project.metrics import set_queue_depth
+
+READ_PRAGMAS = ('busy_timeout', 'mmap_size', 'cache_size')
+
+
+def _apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def init_sqlite_profile(app):
+    """
+    Configures the SQLite engines for concurrent production use:
+    - the primary (writer) engine gets WAL, synchronous, busy_timeout and mmap pragmas,
+      and starts every transaction with BEGIN IMMEDIATE so writers queue on busy_timeout
+      instead of failing with "database is locked" on lock upgrade;
+    - the read bind (if any) opens read-only connections with the read-side pragmas;
+    - a WriteQueue is registered as app.extensions['sqlite_write_queue'].
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS', {})
+
+    with app.app_context():
+        writer = db.engines[None]
+
+        @event.listens_for(writer, 'connect')
+        def _on_writer_connect(dbapi_connection, connection_record):
+            # Take over transaction control from pysqlite so we can issue BEGIN IMMEDIATE
+            dbapi_connection.isolation_level = None
+            _apply_pragmas(dbapi_connection, pragmas)
+
+        @event.listens_for(writer, 'begin')
+        def _on_writer_begin(conn):
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+
+        read_key = app.config.get('SQLALCHEMY_READ_BIND')
+        if read_key and read_key in db.engines:
+            read_pragmas = {k: v for k, v in pragmas.items() if k in READ_PRAGMAS}
+            read_pragmas['query_only'] = 1
+
+            @event.listens_for(db.engines[read_key], 'connect')
+            def _on_reader_connect(dbapi_connection, connection_record):
+                _apply_pragmas(dbapi_connection, read_pragmas)
+
+    app.extensions['sqlite_write_queue'] = WriteQueue(
+        app,
+        batch_size=app.config.get('SQLITE_WRITE_BATCH_SIZE', 50),
+        batch_window=app.config.get('SQLITE_WRITE_BATCH_WINDOW_MS', 5) / 1000.0
+    )
+
+
+class WriteQueue:
+    """
+    Serializes small write jobs through one background worker per process.
+
+    Each job is a callable that works on ``db.session`` and returns a plain value
+    (e.g. a new row id). The worker collects up to ``batch_size`` jobs, or whatever
+    arrives within ``batch_window`` seconds, runs each one inside its own SAVEPOINT and
+    commits the whole batch once. A failing job only rolls back its own savepoint and
+    its exception is raised to the caller of ``submit(...).result()``.
+    """
+
+    def __init__(self, app, batch_size=50, batch_window=0.005):
+        self.app = app
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._jobs = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues a write job and returns a Future resolved after its batch commits."""
+        future = Future()
+        self._jobs.put((fn, args, kwargs, future))
+        set_queue_depth('sqlite_writes', self._jobs.qsize())
+        self._ensure_worker()
+        return future
+
+    def run(self, fn, *args, timeout=30, **kwargs):
+        """Submits a job and waits for its committed result."""
+        return self.submit(fn, *args, **kwargs).result(timeout=timeout)
+
+    def qsize(self):
+        return self._jobs.qsize()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name='sqlite-write-queue', daemon=True)
+                self._worker.start()
+
+    def _next_batch(self):
+        batch = [self._jobs.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            set_queue_depth('sqlite_writes', self._jobs.qsize())
+            with self.app.app_context():
+                self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        results = []
+        for fn, args, kwargs, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            savepoint = db.session.begin_nested()
+            try:
+                value = fn(*args, **kwargs)
+                savepoint.commit()
+                results.append((future, value))
+            except Exception as e:
+                savepoint.rollback()
+                future.set_exception(e)
+
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for future, _ in results:
+                future.set_exception(e)
+        else:
+            for future, value in results:
+                future.set_result(value)
+        finally:
+            db.session.remove()
@@ -0,0 +1,107 @@
+"""
+Worker startup: schema management, the on-disk template bytecode cache and cache warmup.
+
+A fast-booting deployment sets AUTO_CREATE_SCHEMA=false and runs `flask upgrade-schema`
+once per deploy instead of letting every worker run the migrations. It also sets
+JINJA_BYTECODE_CACHE_DIR and runs `flask compile-templates` at build time, so workers
+load compiled templates instead of parsing them on their first requests. gunicorn.conf.py
+then starts warm_caches() in the background once each worker is ready to serve.
+"""
+import logging
+import os
+import threading
+import time
+
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import text
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = 'migrations'
+
+
+def init_template_cache(app):
+    """Points Jinja at the shared bytecode cache directory; call before anything renders."""
+    directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(directory)}
+
+
+def compile_templates(app):
+    """Loads every template once, which writes its bytecode to the cache. Returns the count."""
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def upgrade_schema(app):
+    """Applies Alembic migrations if the project has them, otherwise creates missing tables."""
+    with app.app_context():
+        if os.path.isdir(os.path.join(app.root_path, MIGRATIONS_DIR)):
+            from flask_migrate import Migrate, upgrade
+            if 'migrate' not in app.extensions: # workers only register it for the `flask` CLI
+                Migrate(app, db)
+            upgrade(directory=os.path.join(app.root_path, MIGRATIONS_DIR))
+            return 'migrated'
+        db.create_all()
+        return 'created'
+
+
+def _warm_database(app):
+    # One round trip per bind opens the first pooled connection and loads the dialect
+    for bind_key in [None, *app.config.get('SQLALCHEMY_BINDS', {})]:
+        with db.engines[bind_key].connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+
+def _warm_restaurants(app):
+    from project.identity import restaurant_summary
+    from project.models import Restaurant
+    limit = app.config.get('WARMUP_RESTAURANT_LIMIT', 200)
+    for (restaurant_id,) in db.session.query(Restaurant.id).order_by(Restaurant.id.desc()).limit(limit):
+        restaurant_summary(restaurant_id)
+
+
+WARMERS = {
+    'templates': compile_templates,
+    'database': _warm_database,
+    'restaurants': _warm_restaurants,
+}
+
+
+def warm_caches(app, names=None):
+    """Runs the named warmers (default: WARMUP_CACHES) and returns {name: seconds}; failures are logged, not raised."""
+    if names is None:
+        names = [name.strip() for name in app.config.get('WARMUP_CACHES', '').split(',') if name.strip()]
+    timings = {}
+    for name in names:
+        warmer = WARMERS.get(name)
+        if warmer is None:
+            logger.warning("Unknown cache warmer '%s'", name)
+            continue
+        started = time.perf_counter()
+        with app.app_context():
+            try:
+                warmer(app)
+            except Exception:
+                logger.exception("Cache warmer '%s' failed", name)
+                continue
+            finally:
+                db.session.remove()
+        timings[name] = round(time.perf_counter() - started, 3)
+    if timings:
+        logger.info("Caches warmed in %s seconds", timings)
+    return timings
+
+
+def start_warmup(app):
+    """Warms caches on a background (green, under eventlet) thread so the worker serves right away."""
+    if not app.config.get('WARMUP_CACHES'):
+        return None
+    thread = threading.Thread(target=warm_caches, args=(app,), name='cache-warmup', daemon=True)
+    thread.start()
+    return thread
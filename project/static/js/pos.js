@@ -0,0 +1,269 @@
+// POS tablet mode for the storefront and kitchen pages. Actions are applied to a local
+// replica of the restaurant's active orders at once, queued in localStorage and sent to
+// /pos/sync in batches. Each sync returns the orders that changed on the server; the
+// queue still in flight is re-applied on top of them, so the screen always shows server
+// state plus this tablet's pending actions. Nothing is lost on reload or while offline.
+const Pos = (function() {
+    const MODE_KEY = 'pos-mode';
+    const POLL_INTERVAL = 10000;
+    const MAX_RETRY_DELAY = 30000;
+
+    let config = null;
+    let storeKey = null;
+    let state = null;
+    let inFlight = null;
+    let timer = null;
+    let retryDelay = 0;
+    let online = navigator.onLine !== false;
+    const listeners = [];
+    const clientId = newId();
+
+    function readJSON(key, fallback) {
+        try {
+            const value = JSON.parse(localStorage.getItem(key));
+            return value === null ? fallback : value;
+        } catch (e) {
+            return fallback;
+        }
+    }
+
+    function writeJSON(key, value) {
+        try {
+            localStorage.setItem(key, JSON.stringify(value));
+        } catch (e) {
+            console.warn('Could not save ' + key, e); // Quota exceeded or storage disabled
+        }
+    }
+
+    function newId() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+    }
+
+    // --- Tablet mode ---
+
+    function enabled() {
+        return localStorage.getItem(MODE_KEY) === 'on';
+    }
+
+    function setEnabled(on) {
+        if (on) localStorage.setItem(MODE_KEY, 'on');
+        else localStorage.removeItem(MODE_KEY);
+    }
+
+    // --- State machine (mirrors project/order_state.py) ---
+
+    function rank(flow, status) {
+        const index = flow.indexOf(status);
+        return index === -1 ? flow.length : index;
+    }
+
+    function resolve(transitions, flow, current, expected, target) {
+        if (current === target) return 'noop';
+        if (!(transitions[current] || []).includes(target)) return 'conflict';
+        if (expected === undefined || expected === null || expected === current) return 'apply';
+        return rank(flow, target) > rank(flow, current) ? 'apply' : 'conflict';
+    }
+
+    function derivedOrderStatus(order) {
+        if (!['pending', 'preparing', 'ready'].includes(order.status)) return null;
+        const statuses = new Set(order.items.map(item => item.status));
+        if (!statuses.size) return 'pending';
+        if (statuses.has('preparing')) return 'preparing';
+        if ([...statuses].every(status => status === 'ready' || status === 'served')) return 'ready';
+        return 'pending';
+    }
+
+    // --- Local replica ---
+
+    function findItem(orders, mutation) {
+        for (const order of Object.values(orders)) {
+            const item = order.items.find(item => (mutation.item_id && item.id === mutation.item_id) ||
+                                                  (mutation.item_ref && item.ref === mutation.item_ref));
+            if (item) return { order, item };
+        }
+        return {};
+    }
+
+    function isOpen(order) {
+        return order && config.open_order_statuses.includes(order.status);
+    }
+
+    // Applies one queued mutation to a copy of the replica, following the server's rules
+    function applyLocal(orders, mutation) {
+        const order = orders[mutation.order_id];
+        const found = findItem(orders, mutation);
+        switch (mutation.type) {
+            case 'item_status':
+                if (found.item && resolve(config.item_transitions, config.item_flow, found.item.status, mutation.from, mutation.to) === 'apply') {
+                    found.item.status = mutation.to;
+                    const derived = derivedOrderStatus(found.order);
+                    if (derived) found.order.status = derived;
+                }
+                break;
+            case 'order_status':
+            case 'cancel_order':
+            case 'mark_paid': {
+                const target = { cancel_order: 'cancelled', mark_paid: 'paid' }[mutation.type] || mutation.to;
+                if (order && resolve(config.order_transitions, config.order_flow, order.status, mutation.from, target) === 'apply') {
+                    order.status = target;
+                    if (mutation.payment_method) order.payment_method = mutation.payment_method;
+                }
+                break;
+            }
+            case 'add_item':
+                if (isOpen(order)) {
+                    order.items.push({ id: null, ref: mutation.id, menu_item_id: mutation.menu_item_id, name: mutation.name,
+                                       unit_price: mutation.unit_price || 0, quantity: mutation.quantity || 1, status: 'pending',
+                                       notes: mutation.notes || null, modifiers: mutation.modifier_details || [], pending: true });
+                }
+                break;
+            case 'update_item_quantity':
+                if (found.item && isOpen(found.order)) {
+                    const quantity = mutation.quantity > 0 && mutation.from !== undefined
+                        ? found.item.quantity + mutation.quantity - mutation.from : mutation.quantity;
+                    if (quantity > 0) found.item.quantity = quantity;
+                    else found.order.items.splice(found.order.items.indexOf(found.item), 1);
+                }
+                break;
+            case 'remove_item':
+                if (found.item && isOpen(found.order)) found.order.items.splice(found.order.items.indexOf(found.item), 1);
+                break;
+        }
+    }
+
+    // Server snapshot plus every mutation still queued
+    function view() {
+        const orders = JSON.parse(JSON.stringify(state.orders));
+        state.queue.forEach(mutation => applyLocal(orders, mutation));
+        return orders;
+    }
+
+    function save() {
+        writeJSON(storeKey, state);
+    }
+
+    function pending() {
+        return state ? state.queue.length : 0;
+    }
+
+    // --- Sync ---
+
+    function onChange(listener) {
+        listeners.push(listener);
+    }
+
+    function notify(change) {
+        renderIndicator();
+        listeners.forEach(listener => listener(Object.assign({ local: false, remote: false, refused: [] }, change)));
+    }
+
+    // Queues a mutation, applies it locally and schedules a sync; returns the mutation id
+    function enqueue(mutation) {
+        mutation.id = newId();
+        state.queue.push(mutation);
+        save();
+        notify({ local: true });
+        schedule(300); // Debounced: a burst of taps goes out as one batch
+        return mutation.id;
+    }
+
+    function schedule(delay) {
+        clearTimeout(timer);
+        timer = setTimeout(sync, delay);
+    }
+
+    function known() {
+        const versions = {};
+        Object.values(state.orders).forEach(order => versions[order.id] = order.version);
+        return versions;
+    }
+
+    function setOnline(value) {
+        online = value;
+        renderIndicator();
+    }
+
+    function sync() {
+        if (!state) return Promise.resolve();
+        if (inFlight) return inFlight;
+        clearTimeout(timer);
+        const batch = state.queue.slice(0, config.max_batch);
+        inFlight = fetch(config.sync_url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            credentials: 'same-origin',
+            body: JSON.stringify({ client_id: clientId, mutations: batch, known: known() })
+        })
+        .then(response => {
+            if (!response.ok) throw new Error(`POS sync: ${response.status}`);
+            return response.json();
+        })
+        .then(data => {
+            const done = new Set(data.results.map(result => result.id));
+            const refused = data.results.filter(result => result.status === 'conflict' || result.status === 'rejected');
+            const ownOrders = new Set(data.results.map(result => result.order_id));
+            const remote = state.synced && (data.removed.length > 0 || data.orders.some(order => !ownOrders.has(order.id)));
+
+            // Later mutations on an item added offline can now name it by its real id
+            data.results.forEach(result => { if (result.item_id) state.refs[result.id] = result.item_id; });
+            state.queue = state.queue.filter(mutation => !done.has(mutation.id));
+            state.queue.forEach(mutation => {
+                if (mutation.item_ref && state.refs[mutation.item_ref]) mutation.item_id = state.refs[mutation.item_ref];
+            });
+            const referenced = new Set(state.queue.map(mutation => mutation.item_ref).filter(Boolean));
+            Object.keys(state.refs).forEach(ref => { if (!referenced.has(ref)) delete state.refs[ref]; });
+
+            data.orders.forEach(order => state.orders[order.id] = order);
+            data.removed.forEach(orderId => delete state.orders[orderId]);
+            state.synced = true;
+            save();
+            retryDelay = 0;
+            setOnline(true);
+            notify({ remote, refused });
+            schedule(state.queue.length ? 0 : POLL_INTERVAL);
+        })
+        .catch(error => {
+            console.warn(error);
+            setOnline(false);
+            retryDelay = Math.min((retryDelay || 1000) * 2, MAX_RETRY_DELAY);
+            schedule(retryDelay);
+        })
+        .finally(() => { inFlight = null; });
+        return inFlight;
+    }
+
+    // --- Status badge ---
+
+    function renderIndicator() {
+        const badge = document.getElementById('pos-indicator');
+        if (!badge) return;
+        const count = pending();
+        badge.className = 'badge rounded-pill ' + (online ? (count ? 'bg-warning text-dark' : 'bg-success') : 'bg-danger');
+        badge.textContent = (online ? (count ? 'Syncing' : 'Live') : 'Offline') + (count ? ` · ${count} pending` : '');
+    }
+
+    function toast(message) {
+        const el = document.createElement('div');
+        el.className = 'alert alert-warning shadow-sm position-fixed bottom-0 end-0 m-3 small';
+        el.style.zIndex = 2000;
+        el.textContent = message;
+        document.body.appendChild(el);
+        setTimeout(() => el.remove(), 5000);
+    }
+
+    // Options: the pos_config the page was rendered with, plus restaurant_id and sync_url
+    function init(options) {
+        config = options;
+        storeKey = 'pos:' + options.restaurant_id;
+        state = readJSON(storeKey, null) || { orders: {}, queue: [], refs: {} };
+        state.synced = false; // The page was just rendered from the server: the first delta is not news
+        onChange(change => change.refused.forEach(result => toast(result.message || 'An action could not be applied.')));
+        window.addEventListener('online', () => schedule(0));
+        window.addEventListener('offline', () => setOnline(false));
+        renderIndicator();
+        return sync();
+    }
+
+    return { clientId, enabled, setEnabled, init, enqueue, sync, view, pending, onChange, toast };
+})();
@@ -0,0 +1,194 @@
+// Customer ordering client shared by the qrlink pages: cart, menu bundle sync and the
+// offline order outbox. Everything is kept in localStorage, so it survives reloads and
+// dropped connections.
+const Qrlink = (function() {
+    const CART_KEY = 'cart';
+    const OUTBOX_KEY = 'qrlink-outbox';
+    const BUNDLE_PREFIX = 'qrlink-bundle:';
+
+    function readJSON(key, fallback) {
+        try {
+            const value = JSON.parse(localStorage.getItem(key));
+            return value === null ? fallback : value;
+        } catch (e) {
+            return fallback;
+        }
+    }
+
+    function writeJSON(key, value) {
+        try {
+            localStorage.setItem(key, JSON.stringify(value));
+        } catch (e) {
+            console.warn('Could not save ' + key, e); // Quota exceeded or storage disabled
+        }
+    }
+
+    // --- Cart ---
+
+    function getCart() {
+        const cart = readJSON(CART_KEY, []);
+        return Array.isArray(cart) ? cart : []; // Old object-format carts are discarded
+    }
+
+    function saveCart(cart) {
+        writeJSON(CART_KEY, cart);
+    }
+
+    // Drops cart lines whose item left the menu and reprices the rest from the bundle
+    function reconcileCart(bundle) {
+        const cart = getCart();
+        const reconciled = cart.filter(line => bundle.items[line.id]).map(line => {
+            const item = bundle.items[line.id];
+            const options = {};
+            item.modifiers.forEach(group => group.options.forEach(opt => options[opt.id] = opt));
+            const modifiers = (line.modifiers || []).filter(mod => options[mod.id])
+                .map(mod => ({ ...mod, price: options[mod.id].price_override }));
+            const price = modifiers.reduce((sum, mod) => sum + mod.price, item.price);
+            return { ...line, name: item.name, price, modifiers };
+        });
+        if (JSON.stringify(reconciled) !== JSON.stringify(cart)) {
+            saveCart(reconciled);
+            return true;
+        }
+        return false;
+    }
+
+    // --- Menu bundle ---
+
+    function loadBundle(slug) {
+        return readJSON(BUNDLE_PREFIX + slug, null);
+    }
+
+    function applyBundle(bundle, payload) {
+        if (payload.full || !bundle) {
+            return { version: payload.version, items: payload.items, categories: payload.categories,
+                     active_category_ids: payload.active_category_ids };
+        }
+        const items = { ...bundle.items, ...payload.items };
+        payload.removed_items.forEach(id => delete items[id]);
+        const categories = { ...bundle.categories, ...payload.categories };
+        payload.removed_categories.forEach(id => delete categories[id]);
+        return { version: payload.version, items, categories, active_category_ids: payload.active_category_ids };
+    }
+
+    // Brings the locally stored bundle up to date with one small request; resolves to the bundle
+    function syncMenu(slug, bundleUrl) {
+        const bundle = loadBundle(slug);
+        const url = bundle ? `${bundleUrl}?since=${encodeURIComponent(bundle.version)}` : bundleUrl;
+        return fetch(url, { cache: 'no-cache', headers: { 'Accept': 'application/json' } })
+            .then(response => {
+                if (!response.ok) throw new Error(`Menu bundle: ${response.status}`);
+                return response.json();
+            })
+            .then(payload => {
+                const updated = applyBundle(bundle, payload);
+                writeJSON(BUNDLE_PREFIX + slug, updated);
+                reconcileCart(updated);
+                return updated;
+            })
+            .catch(error => {
+                if (bundle) return bundle; // Offline: keep using the last bundle we saw
+                throw error;
+            });
+    }
+
+    // --- Order outbox ---
+
+    function newToken() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+    }
+
+    function getOutbox() {
+        const outbox = readJSON(OUTBOX_KEY, []);
+        return Array.isArray(outbox) ? outbox : [];
+    }
+
+    function removeFromOutbox(token) {
+        writeJSON(OUTBOX_KEY, getOutbox().filter(entry => entry.token !== token));
+    }
+
+    // Moves the cart into the outbox as an order with a fresh idempotency token
+    function queueOrder(url, thanksUrl, payload, cart) {
+        const token = newToken();
+        const entry = { token, url, thanksUrl, payload: { ...payload, client_token: token }, cart,
+                        queuedAt: new Date().toISOString() };
+        writeJSON(OUTBOX_KEY, getOutbox().concat([entry]));
+        localStorage.removeItem(CART_KEY);
+        return entry;
+    }
+
+    const sending = new Set();
+
+    // Resolves to {status: 'placed', orderId, thanksUrl}, {status: 'queued'} (offline or
+    // server error; retried later with the same token) or {status: 'rejected', message}
+    function sendOrder(entry) {
+        if (sending.has(entry.token)) return Promise.resolve({ status: 'queued' });
+        sending.add(entry.token);
+        return fetch(entry.url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(entry.payload)
+        })
+        .then(response => {
+            if (response.status >= 500) return { status: 'queued' };
+            return response.json().then(data => {
+                removeFromOutbox(entry.token);
+                if (response.ok && data.success) {
+                    return { status: 'placed', orderId: data.order_id, thanksUrl: entry.thanksUrl + data.order_id };
+                }
+                saveCart(getCart().concat(entry.cart || [])); // Give the customer their cart back to fix it
+                return { status: 'rejected', message: data.message || `Server error: ${response.status}` };
+            });
+        })
+        .catch(() => ({ status: 'queued' }))
+        .finally(() => sending.delete(entry.token));
+    }
+
+    // Replays every queued order; the first one placed takes the customer to its thanks page
+    function flushOutbox() {
+        const outbox = getOutbox();
+        return Promise.all(outbox.map(sendOrder)).then(results => {
+            const placed = results.find(result => result.status === 'placed');
+            if (placed) window.location.href = placed.thanksUrl;
+            return results;
+        });
+    }
+
+    // --- Service worker ---
+
+    function registerServiceWorker(url, scope) {
+        if (!('serviceWorker' in navigator)) return;
+        navigator.serviceWorker.register(url, { scope }).catch(error => console.warn('Service worker:', error));
+        // The worker revalidates cached pages in the background and says when one changed
+        navigator.serviceWorker.addEventListener('message', event => {
+            if (event.data && event.data.type === 'page-updated') showUpdateBanner();
+        });
+    }
+
+    function precache(urls) {
+        if (!('serviceWorker' in navigator)) return;
+        navigator.serviceWorker.ready.then(registration => {
+            if (registration.active) registration.active.postMessage({ type: 'precache', urls });
+        });
+    }
+
+    function showUpdateBanner() {
+        if (document.getElementById('qrlink-update-banner')) return;
+        const banner = document.createElement('div');
+        banner.id = 'qrlink-update-banner';
+        banner.className = 'alert alert-info d-flex justify-content-between align-items-center fixed-top m-2 shadow-sm';
+        banner.innerHTML = '<span class="small">This page has been updated.</span>' +
+            '<button type="button" class="btn btn-sm btn-primary rounded-pill">Refresh</button>';
+        banner.querySelector('button').onclick = () => window.location.reload();
+        document.body.appendChild(banner);
+    }
+
+    window.addEventListener('online', flushOutbox);
+    document.addEventListener('DOMContentLoaded', () => {
+        if (getOutbox().length && navigator.onLine !== false) flushOutbox();
+    });
+
+    return { getCart, saveCart, reconcileCart, loadBundle, syncMenu, getOutbox, queueOrder, sendOrder, flushOutbox,
+             registerServiceWorker, precache };
+})();
@@ -0,0 +1,195 @@
+import uuid
+from datetime import datetime, timedelta
+import pytz
+from sqlalchemy import update, insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+
+from project.models import Restaurant, Order, OrderItem, OrderAuditLog, JobLease
+from extensions import db, socketio, scheduler
+from project.pos_sync import purge_mutations
+
+SWEEP_JOB = 'sweep_stale_orders'
+
+DEFAULT_SWEEPER_CONFIG = {
+    'enabled': True,
+    'paid_complete_hours': 2,   # Paid orders are auto-completed after this many hours
+    'ready_close_hours': 4,     # Ready items/orders are closed (served) after this many hours
+    'flag_pending': True,       # Flag pending orders created before the current business day
+}
+
+def get_sweeper_config(restaurant):
+    """Returns the restaurant's sweeper rules merged over the defaults."""
+    return {**DEFAULT_SWEEPER_CONFIG, **(restaurant.sweeper_config or {})}
+
+def business_day_start(restaurant, now):
+    """Returns local midnight of the restaurant's current day as a naive UTC datetime."""
+    try:
+        restaurant_tz = pytz.timezone(restaurant.timezone or 'UTC')
+    except pytz.UnknownTimeZoneError:
+        restaurant_tz = pytz.utc
+    now_local = now.replace(tzinfo=pytz.utc).astimezone(restaurant_tz)
+    midnight_local = restaurant_tz.localize(datetime(now_local.year, now_local.month, now_local.day))
+    return midnight_local.astimezone(pytz.utc).replace(tzinfo=None)
+
+def _audit_rows(order_rows, restaurant_id, action, to_status, now):
+    return [{
+        'order_id': order_id,
+        'restaurant_id': restaurant_id,
+        'action': action,
+        'from_status': from_status,
+        'to_status': to_status,
+        'source': 'sweeper',
+        'created_at': now
+    } for order_id, from_status in order_rows]
+
+def sweep_restaurant(restaurant, now=None):
+    """
+    Applies the restaurant's stale-order rules using bulk UPDATE statements.
+    Returns a summary dict; the caller is responsible for committing.
+    """
+    now = now or datetime.utcnow()
+    rules = get_sweeper_config(restaurant)
+    summary = {'restaurant_id': restaurant.id, 'completed': 0, 'flagged': 0, 'closed_items': 0, 'closed_orders': 0}
+    if not rules.get('enabled'):
+        return summary
+
+    audit = []
+
+    # 1. Auto-complete paid orders
+    paid_hours = rules.get('paid_complete_hours')
+    if paid_hours:
+        cutoff = now - timedelta(hours=float(paid_hours))
+        rows = db.session.query(Order.id, Order.status).filter(
+            Order.restaurant_id == restaurant.id,
+            Order.status == 'paid',
+            Order.created_at < cutoff
+        ).all()
+        if rows:
+            db.session.execute(
+                update(Order).where(Order.id.in_([r[0] for r in rows])).values(status='completed', version=Order.version + 1),
+                execution_options={'synchronize_session': False}
+            )
+            audit += _audit_rows(rows, restaurant.id, 'auto_complete', 'completed', now)
+            summary['completed'] = len(rows)
+
+    # 2. Close stale ready items and orders
+    ready_hours = rules.get('ready_close_hours')
+    if ready_hours:
+        cutoff = now - timedelta(hours=float(ready_hours))
+        item_rows = db.session.query(OrderItem.id, OrderItem.order_id, Order.status).join(Order).filter(
+            Order.restaurant_id == restaurant.id,
+            Order.status.in_(['pending', 'preparing', 'ready', 'served', 'paid']),
+            OrderItem.status == 'ready',
+            OrderItem.created_at < cutoff
+        ).all()
+        if item_rows:
+            db.session.execute(
+                update(OrderItem).where(OrderItem.id.in_([r[0] for r in item_rows])).values(status='served'),
+                execution_options={'synchronize_session': False}
+            )
+            touched = {order_id: status for _, order_id, status in item_rows}
+            db.session.execute(
+                update(Order).where(Order.id.in_(list(touched))).values(version=Order.version + 1),
+                execution_options={'synchronize_session': False}
+            )
+            audit += _audit_rows(touched.items(), restaurant.id, 'close_ready_items', None, now)
+            summary['closed_items'] = len(item_rows)
+
+        rows = db.session.query(Order.id, Order.status).filter(
+            Order.restaurant_id == restaurant.id,
+            Order.status == 'ready',
+            Order.created_at < cutoff
+        ).all()
+        if rows:
+            db.session.execute(
+                update(Order).where(Order.id.in_([r[0] for r in rows])).values(status='served', version=Order.version + 1),
+                execution_options={'synchronize_session': False}
+            )
+            audit += _audit_rows(rows, restaurant.id, 'close_ready', 'served', now)
+            summary['closed_orders'] = len(rows)
+
+    # 3. Flag pending orders left over from a previous business day
+    if rules.get('flag_pending'):
+        cutoff = business_day_start(restaurant, now)
+        rows = db.session.query(Order.id, Order.status).filter(
+            Order.restaurant_id == restaurant.id,
+            Order.status == 'pending',
+            Order.flagged_at.is_(None),
+            Order.created_at < cutoff
+        ).all()
+        if rows:
+            db.session.execute(
+                update(Order).where(Order.id.in_([r[0] for r in rows])).values(flagged_at=now, version=Order.version + 1),
+                execution_options={'synchronize_session': False}
+            )
+            audit += _audit_rows(rows, restaurant.id, 'flag_stale', 'pending', now)
+            summary['flagged'] = len(rows)
+
+    if audit:
+        db.session.execute(insert(OrderAuditLog), audit)
+    return summary
+
+def sweep_stale_orders(now=None):
+    """Sweeps every restaurant, commits once and emits one summary event per touched restaurant."""
+    now = now or datetime.utcnow()
+    summaries = []
+    restaurants = Restaurant.query.options(
+        load_only(Restaurant.id, Restaurant.timezone, Restaurant.sweeper_config)
+    ).all()
+    for restaurant in restaurants:
+        summary = sweep_restaurant(restaurant, now=now)
+        if any(summary[k] for k in ('completed', 'flagged', 'closed_items', 'closed_orders')):
+            summaries.append(summary)
+    purge_mutations(now)
+    db.session.commit()
+
+    for summary in summaries:
+        socketio.emit('orders_swept', summary, room=f"restaurant_{summary['restaurant_id']}")
+    return summaries
+
+def claim_run(name, holder, duration, now=None):
+    """
+    Takes the job's lease for `duration` unless another holder's lease is still live, and
+    commits so other processes see it at once. Returns True if `holder` may run the job.
+    """
+    now = now or datetime.utcnow()
+    claimed = db.session.execute(
+        update(JobLease)
+        .where(JobLease.name == name, or_(JobLease.expires_at <= now, JobLease.holder == holder))
+        .values(holder=holder, expires_at=now + duration)
+    ).rowcount
+    if not claimed:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(JobLease).values(name=name, holder=holder, expires_at=now + duration))
+            claimed = 1
+        except IntegrityError: # Another process created the lease first
+            claimed = 0
+    db.session.commit()
+    return bool(claimed)
+
+def start_sweeper(app):
+    """
+    Schedules the sweep every ORDER_SWEEPER_INTERVAL_MINUTES when ORDER_SWEEPER_ENABLED.
+    Called by serving processes only (gunicorn's post_worker_init, `python app.py`), not by
+    create_app, so CLI commands and scripts never sweep. Every worker schedules the job,
+    but only the one holding the lease runs it; if that worker dies, another takes over
+    once the lease expires.
+    """
+    if not app.config.get('ORDER_SWEEPER_ENABLED') or scheduler.running:
+        return
+    holder = uuid.uuid4().hex # per worker: gunicorn --preload forks after import
+    interval = app.config['ORDER_SWEEPER_INTERVAL_MINUTES']
+
+    def sweep_job():
+        with app.app_context():
+            try:
+                if claim_run(SWEEP_JOB, holder, timedelta(minutes=interval)):
+                    sweep_stale_orders()
+            finally:
+                db.session.remove()
+
+    scheduler.init_app(app)
+    scheduler.add_job(id=SWEEP_JOB, func=sweep_job, trigger='interval', minutes=interval, replace_existing=True)
+    scheduler.start()
@@ -0,0 +1,195 @@
+"""
+Bulk table provisioning for the storefront floor plan.
+
+New tables come from range specs (floor, number prefix, first and last number, seats),
+from a floor-plan CSV (FLOOR_PLAN_FIELDS), or one at a time from auto_create. The
+restaurant's existing table numbers are read once, and every row is checked against
+them and against the rest of the batch. The batch is then inserted with one INSERT.
+Numbers that already exist are skipped and reported, so running the same plan twice
+adds nothing. If any row is invalid, nothing is inserted.
+
+The INSERT bypasses the ORM flush, so the bootstrap tables version and the tenant cache
+generation are bumped here instead of by their after_flush listeners.
+"""
+import csv
+import io
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from extensions import db
+from project.bootstrap import TABLES_SCOPE
+from project.fragment_cache import bump_version
+from project.helpers import natural_sort_key
+from project.models import Table
+from project.tenancy import tables_changed
+
+MAX_BATCH = 1000
+FLOOR_PLAN_FIELDS = ['number', 'floor', 'seating_capacity', 'notes']
+
+
+class ProvisioningError(ValueError):
+    """Invalid ranges or floor-plan rows. Carries every problem found; nothing was inserted."""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def _blank(value):
+    return value is None or not str(value).strip()
+
+
+def _whole(value, label):
+    if _blank(value):
+        return None
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f'{label} must be a whole number, got {value!r}')
+    if number < 0:
+        raise ValueError(f'{label} cannot be negative')
+    return number
+
+
+def _text(value):
+    return None if _blank(value) else str(value).strip()
+
+
+# --- Sources ---
+
+def range_rows(ranges):
+    """
+    Rows for range specs: dicts with floor, prefix, start, end and seating_capacity, as
+    posted by the bulk form. ('Patio', 'P', 1, 3, 4) gives P1, P2 and P3 with four seats.
+    Returns (rows, errors).
+    """
+    rows, errors = [], []
+    for index, spec in enumerate(ranges, 1):
+        if all(_blank(value) for value in spec.values()):
+            continue
+        try:
+            start, end = _whole(spec.get('start'), 'first number'), _whole(spec.get('end'), 'last number')
+            if start is None or end is None:
+                raise ValueError('first and last number are required')
+            if end < start:
+                raise ValueError('the last number is lower than the first')
+            if end - start + 1 > MAX_BATCH:
+                raise ValueError(f'at most {MAX_BATCH} tables at a time')
+            prefix, floor = _text(spec.get('prefix')) or '', _text(spec.get('floor'))
+            seats = _whole(spec.get('seating_capacity'), 'seats')
+        except ValueError as error:
+            errors.append(f'Range {index}: {error}')
+            continue
+        rows.extend({'number': f'{prefix}{number}', 'floor': floor, 'seating_capacity': seats, 'notes': None,
+                     '_where': f'Range {index}'} for number in range(start, end + 1))
+    return rows, errors
+
+
+def floor_plan_rows(content):
+    """Rows for a floor-plan CSV upload (bytes or text). Returns (rows, errors)."""
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return [], ['The file is not UTF-8 text']
+    reader = csv.DictReader(io.StringIO(content))
+    columns = [column.strip().lower() for column in reader.fieldnames or []]
+    unknown = [column for column in columns if column not in FLOOR_PLAN_FIELDS]
+    if unknown or 'number' not in columns:
+        return [], [f"Expected CSV columns {', '.join(FLOOR_PLAN_FIELDS)} (number is required)"
+                    + (f"; unknown: {', '.join(unknown)}" if unknown else '')]
+    reader.fieldnames = columns
+    rows, errors = [], []
+    for line, raw in enumerate(reader, 2):
+        if all(_blank(value) for key, value in raw.items() if key in FLOOR_PLAN_FIELDS):
+            continue
+        try:
+            rows.append({'number': _text(raw.get('number')), 'floor': _text(raw.get('floor')),
+                         'seating_capacity': _whole(raw.get('seating_capacity'), 'seating_capacity'),
+                         'notes': _text(raw.get('notes')), '_where': f'Row {line}'})
+        except ValueError as error:
+            errors.append(f'Row {line}: {error}')
+    return rows, errors
+
+
+def next_table_number(restaurant_id):
+    """One past the highest all-digit table number; no other table can already have it."""
+    numbers = db.session.query(Table.number).filter_by(restaurant_id=restaurant_id)
+    return str(max((int(number) for (number,) in numbers if number and number.isdigit()), default=0) + 1)
+
+
+# --- Insert ---
+
+def provision_tables(restaurant_id, rows, errors=()):
+    """
+    Validates rows against each other and the restaurant's tables, then inserts the new
+    ones in one statement. Returns (created, skipped): the new tables as (id, number) in
+    natural order, and the numbers that already existed. Raises ProvisioningError (and
+    inserts nothing) when `errors` or any row is invalid.
+    """
+    errors = list(errors)
+    if len(rows) > MAX_BATCH:
+        errors.append(f'{len(rows)} tables requested; at most {MAX_BATCH} at a time')
+    seen = set()
+    for row in rows:
+        number = row['number']
+        if not number:
+            errors.append(f"{row['_where']}: number is required")
+        elif len(number) > 10:
+            errors.append(f"{row['_where']}: table number {number!r} is longer than 10 characters")
+        elif number in seen:
+            errors.append(f"{row['_where']}: table {number} is listed more than once")
+        if row['floor'] and len(row['floor']) > 50:
+            errors.append(f"{row['_where']}: floor is longer than 50 characters")
+        seen.add(number)
+    if errors:
+        raise ProvisioningError(errors)
+
+    existing = {number for (number,) in db.session.query(Table.number).filter_by(restaurant_id=restaurant_id)}
+    new_rows = [row for row in rows if row['number'] not in existing]
+    skipped = sorted((row['number'] for row in rows if row['number'] in existing), key=natural_sort_key)
+    if not new_rows:
+        return [], skipped
+
+    now = datetime.utcnow()
+    db.session.execute(insert(Table), [{
+        'restaurant_id': restaurant_id, 'number': row['number'], 'floor': row['floor'],
+        'seating_capacity': row['seating_capacity'], 'notes': row['notes'], 'status': 'available',
+        'qr_identifier': str(uuid.uuid4()), 'reservation_info': {}, 'created_at': now,
+    } for row in new_rows])
+    bump_version(db.session, restaurant_id, TABLES_SCOPE)
+    tables_changed(db.session, restaurant_id)
+
+    numbers = {row['number'] for row in new_rows}
+    created = [(table_id, number) for table_id, number in db.session.query(Table.id, Table.number).filter(
+        Table.restaurant_id == restaurant_id, Table.number.in_(numbers))]
+    return sorted(created, key=lambda table: natural_sort_key(table[1])), skipped
+
+
+# --- QR sheets ---
+
+def compact_ids(ids):
+    """[3, 4, 5, 9] -> '3-5,9', to keep a QR sheet link for hundreds of tables short."""
+    parts, ids = [], sorted(ids)
+    for table_id in ids:
+        if parts and parts[-1][1] == table_id - 1:
+            parts[-1][1] = table_id
+        else:
+            parts.append([table_id, table_id])
+    return ','.join(str(first) if first == last else f'{first}-{last}' for first, last in parts)
+
+
+def expand_ids(value):
+    """'3-5,9' -> [3, 4, 5, 9]; raises ValueError on anything else or more than MAX_BATCH ids."""
+    ids = []
+    for part in (value or '').split(','):
+        if not part.strip():
+            continue
+        first, _, last = part.partition('-')
+        first, last = int(first), int(last or first)
+        if last < first or len(ids) + last - first + 1 > MAX_BATCH:
+            raise ValueError(part)
+        ids.extend(range(first, last + 1))
+    return ids
@@ -0,0 +1,103 @@
+// Service worker for the customer ordering pages (rendered by qrlink.service_worker).
+// The cache name carries the deploy version, so a deploy installs a fresh app shell and
+// the previous one is deleted on activation.
+const CACHE = '{{ cache_name }}';
+const SHELL = [
+    '{{ url_for("static", filename="js/qrlink.js") }}',
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/bootstrap-icons.css',
+    'https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.1/socket.io.js',
+];
+const SCOPE = new URL(self.registration.scope).pathname;
+// Pages that must be fresh when online; the cached copy is only an offline fallback
+const NETWORK_FIRST = /\/thanks\/\d+$/;
+// JSON the pages fetch themselves and handle being offline
+const PASS_THROUGH = /\/(menu\/bundle|orders\/\d+\/status)$/;
+
+function cacheRequest(cache, url) {
+    const request = new Request(url, { mode: url.startsWith(self.location.origin) || url.startsWith('/') ? 'same-origin' : 'no-cors' });
+    return fetch(request).then(response => cache.put(url, response)).catch(() => {});
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil(caches.open(CACHE).then(cache => Promise.all(SHELL.map(url => cacheRequest(cache, url))))
+        .then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(caches.keys()
+        .then(keys => Promise.all(keys.filter(key => key.startsWith('qrlink-') && key !== CACHE).map(key => caches.delete(key))))
+        .then(() => self.clients.claim()));
+});
+
+self.addEventListener('message', event => {
+    if (event.data && event.data.type === 'precache') {
+        event.waitUntil(caches.open(CACHE).then(cache => Promise.all(event.data.urls.map(url =>
+            cache.match(url).then(hit => hit || cacheRequest(cache, url))))));
+    }
+});
+
+function notifyUpdated(clientId) {
+    return self.clients.get(clientId).then(client => client && client.postMessage({ type: 'page-updated' }));
+}
+
+// Answers from the cache at once and refreshes the cached copy in the background. The
+// refresh is a conditional GET, so an unchanged page costs a 304.
+function staleWhileRevalidate(event) {
+    const request = event.request;
+    // ignoreVary: the Vary: Cookie/Accept-Encoding of a page should not turn every visit into a miss
+    return caches.open(CACHE).then(cache => cache.match(request, { ignoreVary: true }).then(cached => {
+        const refresh = fetch(request).then(response => {
+            if (response.ok && response.type === 'basic') {
+                const changed = cached && request.mode === 'navigate' && cached.headers.get('ETag') !== response.headers.get('ETag');
+                return cache.put(request, response.clone()).then(() => {
+                    if (changed) notifyUpdated(event.resultingClientId || event.clientId);
+                    return response;
+                });
+            }
+            return response;
+        });
+        if (cached) {
+            event.waitUntil(refresh.catch(() => {}));
+            return cached;
+        }
+        return refresh;
+    }));
+}
+
+function networkFirst(event) {
+    return fetch(event.request).then(response => {
+        if (response.ok && response.type === 'basic') {
+            const copy = response.clone();
+            event.waitUntil(caches.open(CACHE).then(cache => cache.put(event.request, copy)));
+        }
+        return response;
+    }).catch(() => caches.match(event.request, { ignoreVary: true }).then(cached => cached || Response.error()));
+}
+
+function cacheFirst(event) {
+    return caches.match(event.request).then(cached => cached || fetch(event.request).then(response => {
+        if (response.ok || response.type === 'opaque') {
+            const copy = response.clone();
+            event.waitUntil(caches.open(CACHE).then(cache => cache.put(event.request, copy)));
+        }
+        return response;
+    }));
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return; // Orders go through the page's outbox
+    const url = new URL(request.url);
+    const sameOrigin = url.origin === self.location.origin;
+
+    if (sameOrigin && url.pathname.startsWith(SCOPE)) {
+        if (PASS_THROUGH.test(url.pathname)) return;
+        event.respondWith(NETWORK_FIRST.test(url.pathname) ? networkFirst(event) : staleWhileRevalidate(event));
+    } else if (sameOrigin && url.pathname.includes('/image/')) {
+        event.respondWith(staleWhileRevalidate(event)); // Menu and restaurant images
+    } else if (SHELL.includes(request.url) || (sameOrigin && url.pathname.startsWith('/static/'))) {
+        event.respondWith(cacheFirst(event));
+    }
+});
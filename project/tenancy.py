@@ -0,0 +1,135 @@
+"""
+Tenant resolution for the public qrlink pages.
+
+Maps slug -> RestaurantSummary (shared with project/identity.py), (restaurant id,
+table number) -> TableRef and qr_identifier -> TableRef from per-process caches, so
+a warm page resolves its restaurant and table without a query and never loads the
+logo/banner BLOBs.
+
+Table entries are keyed by the restaurant's generation. A commit that adds, changes or
+deletes one of its tables bumps that generation, which drops all of the restaurant's
+table entries in this process at once. A restaurant change drops the slug map. Other
+workers pick changes up within TENANT_CACHE_TTL seconds. The restaurant summary itself
+is evicted by project/identity.py.
+"""
+import threading
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import event
+
+from extensions import db
+from project.db_routing import RoutingSession
+from project.identity import TTLCache, restaurant_summary
+from project.metrics import record_cache
+from project.models import Restaurant, Table
+
+TableRef = namedtuple('TableRef', ['id', 'restaurant_id', 'number', 'status', 'qr_identifier'])
+
+_slugs = TTLCache()
+_tables = TTLCache(maxsize=50000)
+_generations = {}
+_generations_lock = threading.Lock()
+
+_MISSING = object()
+
+
+def _ttl():
+    return current_app.config.get('TENANT_CACHE_TTL', 30)
+
+
+def _generation(restaurant_id):
+    return _generations.get(restaurant_id, 0)
+
+
+def resolve_restaurant(slug):
+    """The RestaurantSummary for a slug, or None."""
+    if not slug:
+        return None
+    restaurant_id = _slugs.get(slug, _ttl())
+    record_cache('tenant_slug', restaurant_id is not None)
+    if restaurant_id is None:
+        restaurant_id = db.session.query(Restaurant.id).filter_by(slug=slug).scalar()
+        if restaurant_id is None:
+            return None
+        _slugs.set(slug, restaurant_id)
+    return restaurant_summary(restaurant_id)
+
+
+def resolve_table(restaurant_id, number):
+    """The TableRef for a table number in a restaurant, or None (take-away, unknown number)."""
+    if restaurant_id is None or not number:
+        return None
+    key = ('number', restaurant_id, _generation(restaurant_id), number)
+    ref = _tables.get(key, _ttl())
+    record_cache('tenant_table', ref is not None)
+    if ref is None:
+        table = db.session.query(Table.id, Table.restaurant_id, Table.number, Table.status, Table.qr_identifier) \
+            .filter_by(restaurant_id=restaurant_id, number=number).first()
+        ref = TableRef(*table) if table is not None else _MISSING
+        _tables.set(key, ref)
+    return None if ref is _MISSING else ref
+
+
+def resolve_qr(qr_identifier):
+    """(RestaurantSummary, TableRef) for a table's QR identifier, or (None, None)."""
+    if not qr_identifier:
+        return None, None
+    entry = _tables.get(('qr', qr_identifier), _ttl())
+    if entry is not None and entry[0] != _generation(entry[1].restaurant_id):
+        entry = None
+    record_cache('tenant_table', entry is not None)
+    if entry is None:
+        table = db.session.query(Table.id, Table.restaurant_id, Table.number, Table.status, Table.qr_identifier) \
+            .filter_by(qr_identifier=qr_identifier).first()
+        if table is None:
+            return None, None
+        entry = (_generation(table.restaurant_id), TableRef(*table))
+        _tables.set(('qr', qr_identifier), entry)
+    ref = entry[1]
+    return restaurant_summary(ref.restaurant_id), ref
+
+
+def invalidate_tables(restaurant_id):
+    with _generations_lock:
+        _generations[restaurant_id] = _generation(restaurant_id) + 1
+
+
+def tables_changed(db_session, restaurant_id):
+    """Evicts the restaurant's table entries when db_session commits; for bulk INSERTs that skip the flush."""
+    db_session.info.setdefault('tenant_changes', set()).add((Table, restaurant_id))
+
+
+def invalidate_slugs():
+    # Slug changes are rare and entries cheap to rebuild, so any restaurant change drops them all
+    _slugs.clear()
+
+
+def clear():
+    _slugs.clear()
+    _tables.clear()
+    _generations.clear()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_tenant_changes(db_session, flush_context):
+    changed = db_session.info.setdefault('tenant_changes', set())
+    for obj in list(db_session.new) + list(db_session.dirty) + list(db_session.deleted):
+        if isinstance(obj, Table) and obj.restaurant_id is not None:
+            changed.add((Table, obj.restaurant_id))
+        elif isinstance(obj, Restaurant):
+            changed.add((Restaurant, obj.id))
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _evict_tenant_changes(db_session):
+    for model, restaurant_id in db_session.info.pop('tenant_changes', ()):
+        if model is Table:
+            invalidate_tables(restaurant_id)
+        else:
+            invalidate_slugs()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_tenant_changes(db_session):
+    db_session.info.pop('tenant_changes', None)
@@ -0,0 +1,224 @@
+"""
+Lightweight order-path tracing.
+
+A trace starts when place_order ingests an order and gets one span per stage
+(DB insert/flush, commit, Socket.IO emit). The trace context travels in the
+'new_order' payload; kitchen screens acknowledge with 'order_rendered', which adds
+delivery and render spans. Finished spans go to an in-memory ring buffer and,
+when configured, to a Zipkin v2 JSON exporter (a JSON-lines file and/or a
+collector URL) flushed by a background thread.
+"""
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+SERVICE_NAME = 'oda'
+
+_state = {'enabled': False, 'sample_rate': 1.0}
+_buffer = deque(maxlen=2000)
+_exporter = None
+
+
+def _new_id(bits):
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def _now_us():
+    return int(time.time() * 1_000_000)
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'timestamp', 'duration', 'tags')
+
+    def __init__(self, trace_id, name, parent_id=None, timestamp=None, tags=None):
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.timestamp = timestamp if timestamp is not None else _now_us()
+        self.duration = None
+        self.tags = dict(tags or {})
+
+    def finish(self, end_us=None):
+        self.duration = max((end_us if end_us is not None else _now_us()) - self.timestamp, 1)
+        _record(self)
+
+    def to_zipkin(self):
+        data = {
+            'traceId': self.trace_id,
+            'id': self.span_id,
+            'name': self.name,
+            'timestamp': self.timestamp,
+            'duration': self.duration,
+            'localEndpoint': {'serviceName': SERVICE_NAME},
+            'tags': {k: str(v) for k, v in self.tags.items()},
+        }
+        if self.parent_id:
+            data['parentId'] = self.parent_id
+        return data
+
+
+class Trace:
+    """A root span plus helpers to time child stages."""
+
+    def __init__(self, name, **tags):
+        self.root = Span(_new_id(128), name, tags=tags)
+
+    @property
+    def trace_id(self):
+        return self.root.trace_id
+
+    @contextmanager
+    def span(self, name, **tags):
+        child = Span(self.trace_id, name, parent_id=self.root.span_id, tags=tags)
+        try:
+            yield child
+        finally:
+            child.finish()
+
+    def context(self, span=None):
+        """Trace context for a socket payload; `emitted_at` is the server clock in epoch ms."""
+        return {
+            'trace_id': self.trace_id,
+            'span_id': (span or self.root).span_id,
+            'emitted_at': int(time.time() * 1000),
+        }
+
+    def finish(self, **tags):
+        self.root.tags.update(tags)
+        self.root.finish()
+
+
+class _NullTrace:
+    """Stand-in when tracing is disabled or the order was not sampled."""
+    trace_id = None
+
+    @contextmanager
+    def span(self, name, **tags):
+        yield None
+
+    def context(self, span=None):
+        return None
+
+    def finish(self, **tags):
+        pass
+
+
+_NULL_TRACE = _NullTrace()
+
+
+def start_trace(name, **tags):
+    if not _state['enabled'] or random.random() >= _state['sample_rate']:
+        return _NULL_TRACE
+    return Trace(name, **tags)
+
+
+def record_kitchen_ack(data, client_id=None):
+    """
+    Adds delivery and render spans from a kitchen 'order_rendered' ack:
+    {'trace': {trace_id, span_id, emitted_at}, 'received_at': ms, 'rendered_at': ms}.
+    received_at/rendered_at come from the client clock and are only used relative to each
+    other (render time). Delivery is the ack round trip on the server clock minus render time,
+    so it includes the return leg of the ack and never depends on client clock skew.
+    """
+    if not _state['enabled']:
+        return False
+    trace = (data or {}).get('trace') or {}
+    try:
+        trace_id, parent_id = str(trace['trace_id']), str(trace['span_id'])
+        emitted_at_us = int(trace['emitted_at']) * 1000
+        render_us = max(int(data['rendered_at']) - int(data['received_at']), 0) * 1000
+    except (KeyError, TypeError, ValueError):
+        return False
+
+    now_us = _now_us()
+    delivered_us = max(now_us - render_us, emitted_at_us)
+    tags = {'client': client_id} if client_id else {}
+    Span(trace_id, 'socketio.delivery', parent_id, timestamp=emitted_at_us, tags=tags).finish(delivered_us)
+    Span(trace_id, 'kitchen.render', parent_id, timestamp=delivered_us, tags=tags).finish(now_us)
+    return True
+
+
+def recent_spans(trace_id=None):
+    spans = list(_buffer)
+    if trace_id:
+        spans = [s for s in spans if s.trace_id == trace_id]
+    return [s.to_zipkin() for s in spans]
+
+
+def _record(span):
+    _buffer.append(span)
+    if _exporter is not None:
+        _exporter.put(span)
+
+
+class ZipkinExporter:
+    """Background exporter: appends Zipkin v2 spans as JSON lines and/or POSTs batches to a collector."""
+
+    def __init__(self, path=None, url=None, interval=2.0, max_batch=500):
+        self.path = path
+        self.url = url
+        self.interval = interval
+        self.max_batch = max_batch
+        self._spans = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._loop, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def put(self, span):
+        try:
+            self._spans.put_nowait(span)
+        except queue.Full:
+            pass # Tracing must never slow down or break the order path
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._spans.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            batch = self._drain()
+            if batch:
+                self.export([span.to_zipkin() for span in batch])
+
+    def export(self, spans):
+        if self.path:
+            try:
+                with open(self.path, 'a') as f:
+                    for span in spans:
+                        f.write(json.dumps(span) + '\n')
+            except OSError:
+                pass
+        if self.url:
+            try:
+                import requests
+                requests.post(self.url, json=spans, timeout=5)
+            except Exception:
+                pass
+
+
+def init_tracing(app):
+    """Enables order tracing when TRACING_ENABLED is set."""
+    global _buffer, _exporter
+    if not app.config.get('TRACING_ENABLED'):
+        return
+    _state['enabled'] = True
+    _state['sample_rate'] = float(app.config.get('TRACE_SAMPLE_RATE', 1.0))
+    _buffer = deque(maxlen=int(app.config.get('TRACE_BUFFER_SIZE', 2000)))
+
+    path = app.config.get('TRACE_EXPORT_PATH')
+    url = app.config.get('TRACE_COLLECTOR_URL')
+    if path or url:
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _exporter = ZipkinExporter(path=path, url=url)
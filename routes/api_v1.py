@@ -0,0 +1,253 @@
+"""
+/api/v1: read-only JSON over the restaurant's orders, tables, menus and kitchen stations,
+for our POS and kitchen tablets and third-party integrations (session login; a missing
+login is a 401). Every collection takes fields=, fields[<include>]=, include=, cursor=
+and limit=, plus the filters listed on it; see project/api_query.py. Swagger UI is at
+/api/v1/docs.
+"""
+from flask import Blueprint, jsonify, request, url_for
+from flask_login import current_user, login_required
+from flask_restx import Api, Namespace, Resource, abort
+
+from project.bootstrap import SCREENS, parse_known, screen_versions, build_payload
+from project.etags import make_etag, not_modified, with_etag
+from project.api_query import (QueryError, Field, Include, column, resource, list_response, item_response,
+                               DEFAULT_LIMIT, MAX_LIMIT)
+from project.models import (Order, OrderItem, Table, Menu, Category, MenuItem, ModifierGroup, ModifierOption,
+                            Station)
+from project.order_state import ORDER_FLOW, ITEM_FLOW, ACTIVE_ORDER_STATUSES
+
+api_v1_bp = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+api = Api(api_v1_bp, version='1.0', title='Oda API', doc='/docs',
+          description='Orders, tables, menus and kitchen stations of the signed-in restaurant.')
+
+
+@api.errorhandler(QueryError)
+def handle_query_error(error):
+    return {'message': str(error)}, 400
+
+
+# --- Filters ---
+
+def _ids(value):
+    try:
+        return [int(part) for part in value.split(',')]
+    except ValueError:
+        raise QueryError(f'Expected comma-separated ids, got {value!r}')
+
+
+def _flag(value):
+    if value.lower() not in ('true', 'false', '1', '0'):
+        raise QueryError(f'Expected true or false, got {value!r}')
+    return value.lower() in ('true', '1')
+
+
+def _status_filter(attr, allowed):
+    def apply(query, value):
+        statuses = value.split(',')
+        unknown = [status for status in statuses if status not in allowed]
+        if unknown:
+            raise QueryError(f"Unknown status: {', '.join(unknown)}")
+        return query.filter(attr.in_(statuses))
+    return apply
+
+
+def _by_restaurant(model):
+    return lambda query, restaurant_id: query.filter(model.restaurant_id == restaurant_id)
+
+
+# --- Resources ---
+
+resource(
+    'stations', Station, _by_restaurant(Station), version='menu',
+    fields={'id': column(Station.id), 'name': column(Station.name)},
+)
+
+resource(
+    'modifier_options', ModifierOption, None, version='menu',
+    fields={'id': column(ModifierOption.id), 'name': column(ModifierOption.name),
+            'price': Field((ModifierOption.price_override,), lambda option: option.price_override or 0.0)},
+)
+
+resource(
+    'modifier_groups', ModifierGroup, None, version='menu',
+    fields={'id': column(ModifierGroup.id), 'name': column(ModifierGroup.name),
+            'is_required': column(ModifierGroup.is_required), 'selection_type': column(ModifierGroup.selection_type),
+            'min_selection': column(ModifierGroup.min_selection), 'max_selection': column(ModifierGroup.max_selection)},
+    includes={'options': Include('options', 'modifier_options', True, ())},
+)
+
+resource(
+    'menu_items', MenuItem, _by_restaurant(MenuItem), version='menu',
+    fields={
+        'id': column(MenuItem.id), 'sku': column(MenuItem.sku), 'name': column(MenuItem.name),
+        'price': column(MenuItem.price), 'compare_at_price': column(MenuItem.compare_at_price),
+        'description': column(MenuItem.description), 'is_available': column(MenuItem.is_available),
+        'station_id': column(MenuItem.station_id),
+        # image_data itself is never loaded; a set mimetype means there is an image to fetch
+        'image_url': Field((MenuItem.image_mimetype,), lambda item: url_for('admin.serve_menu_image', item_id=item.id)
+                           if item.image_mimetype else None),
+    },
+    default_fields=['id', 'sku', 'name', 'price', 'is_available', 'station_id'],
+    includes={
+        'categories': Include('categories', 'categories', True, ()),
+        'modifiers': Include('modifiers', 'modifier_groups', True, ()),
+    },
+    filters={
+        'category_id': lambda query, value: query.filter(MenuItem.categories.any(Category.id.in_(_ids(value)))),
+        'station_id': lambda query, value: query.filter(MenuItem.station_id.in_(_ids(value))),
+        'available': lambda query, value: query.filter(MenuItem.is_available.is_(_flag(value))),
+    },
+)
+
+resource(
+    'categories', Category, _by_restaurant(Category), version='menu',
+    fields={'id': column(Category.id), 'name': column(Category.name), 'is_active': column(Category.is_active)},
+    includes={'items': Include('items', 'menu_items', True, ())},
+    filters={'active': lambda query, value: query.filter(Category.is_active.is_(_flag(value)))},
+)
+
+resource(
+    'menus', Menu, _by_restaurant(Menu), version='menu',
+    fields={
+        'id': column(Menu.id), 'name': column(Menu.name), 'description': column(Menu.description),
+        'is_active': column(Menu.is_active), 'start_time': column(Menu.start_time), 'end_time': column(Menu.end_time),
+        'start_date': column(Menu.start_date), 'end_date': column(Menu.end_date),
+        'active_days': Field((Menu.active_days,), lambda menu: [int(day) for day in menu.active_days.split(',') if day]
+                             if menu.active_days else None),
+    },
+    includes={'categories': Include('categories', 'categories', True, ())},
+    filters={'active': lambda query, value: query.filter(Menu.is_active.is_(_flag(value)))},
+)
+
+resource(
+    'tables', Table, _by_restaurant(Table),
+    fields={
+        'id': column(Table.id), 'number': column(Table.number), 'status': column(Table.status),
+        'floor': column(Table.floor), 'seating_capacity': column(Table.seating_capacity), 'notes': column(Table.notes),
+        'qr_identifier': column(Table.qr_identifier), 'reservation_info': column(Table.reservation_info),
+    },
+    default_fields=['id', 'number', 'status', 'floor', 'seating_capacity'],
+    filters={
+        'status': lambda query, value: query.filter(Table.status.in_(value.split(','))),
+        'floor': lambda query, value: query.filter(Table.floor == value),
+    },
+)
+
+resource(
+    'order_items', OrderItem, lambda query, restaurant_id: query.join(Order, OrderItem.order).filter(
+        Order.restaurant_id == restaurant_id),
+    version='row', version_column=Order.version,
+    fields={
+        'id': column(OrderItem.id), 'order_id': column(OrderItem.order_id),
+        'menu_item_id': column(OrderItem.menu_item_id), 'quantity': column(OrderItem.quantity),
+        'status': column(OrderItem.status), 'notes': column(OrderItem.notes), 'created_at': column(OrderItem.created_at),
+    },
+    includes={
+        'menu_item': Include('menu_item', 'menu_items', False, (OrderItem.menu_item_id,)),
+        'modifiers': Include('selected_modifiers', 'modifier_options', True, ()),
+    },
+    filters={
+        'status': _status_filter(OrderItem.status, ITEM_FLOW),
+        'order_id': lambda query, value: query.filter(OrderItem.order_id.in_(_ids(value))),
+        'station_id': lambda query, value: query.filter(OrderItem.menu_item.has(MenuItem.station_id.in_(_ids(value)))),
+    },
+)
+
+resource(
+    'orders', Order, _by_restaurant(Order), version='row', version_column=Order.version,
+    fields={
+        'id': column(Order.id), 'status': column(Order.status), 'table_id': column(Order.table_id),
+        'payment_method': column(Order.payment_method), 'created_at': column(Order.created_at),
+        'version': column(Order.version), 'flagged_at': column(Order.flagged_at),
+    },
+    includes={
+        'items': Include('items', 'order_items', True, ()),
+        'table': Include('table', 'tables', False, (Order.table_id,)),
+    },
+    filters={
+        'status': _status_filter(Order.status, ORDER_FLOW + ['cancelled']),
+        'active': lambda query, value: query.filter(Order.status.in_(ACTIVE_ORDER_STATUSES)) if _flag(value) else query,
+        'table_id': lambda query, value: query.filter(Order.table_id.in_(_ids(value))),
+    },
+)
+
+
+# --- Endpoints ---
+
+LIST_PARAMS = {
+    'fields': 'Comma-separated fields to return (default: the common ones)',
+    'include': 'Comma-separated relationships to embed, dotted for nested ones (items.menu_item)',
+    'cursor': 'next_cursor from the previous page',
+    'limit': f'Page size, {DEFAULT_LIMIT} by default, at most {MAX_LIMIT}',
+}
+
+
+class ApiResource(Resource):
+    method_decorators = [login_required]
+
+
+class CollectionResource(ApiResource):
+    resource_name = None
+
+    def get(self):
+        return list_response(self.resource_name, current_user.restaurant_id)
+
+
+class ItemResource(ApiResource):
+    resource_name = None
+
+    def get(self, object_id):
+        response = item_response(self.resource_name, current_user.restaurant_id, object_id)
+        if response is None:
+            abort(404, 'Not found')
+        return response
+
+
+def _register(path, resource_name, description, filters):
+    ns = Namespace(path, description=description)
+    params = {**LIST_PARAMS, **filters}
+    ns.route('')(ns.doc(params=params)(type(f'{resource_name}_list', (CollectionResource,),
+                                            {'resource_name': resource_name})))
+    ns.route('/<int:object_id>')(ns.doc(params={k: LIST_PARAMS[k] for k in ('fields', 'include')})(
+        type(f'{resource_name}_item', (ItemResource,), {'resource_name': resource_name})))
+    api.add_namespace(ns, path=f'/{path}')
+
+
+_register('orders', 'orders', 'Orders; include=items,items.menu_item,table', {
+    'status': 'Comma-separated order statuses', 'active': 'true: only orders still on the floor',
+    'table_id': 'Comma-separated table ids'})
+_register('order-items', 'order_items', 'Order items; include=menu_item,modifiers', {
+    'status': 'Comma-separated item statuses', 'order_id': 'Comma-separated order ids',
+    'station_id': 'Comma-separated kitchen station ids'})
+_register('tables', 'tables', 'Tables', {'status': 'Comma-separated table statuses', 'floor': 'Floor name'})
+_register('menus', 'menus', 'Menus; include=categories,categories.items', {'active': 'true or false'})
+_register('categories', 'categories', 'Categories; include=items,items.modifiers', {'active': 'true or false'})
+_register('menu-items', 'menu_items', 'Menu items; include=categories,modifiers,modifiers.options', {
+    'category_id': 'Comma-separated category ids', 'station_id': 'Comma-separated station ids',
+    'available': 'true or false'})
+_register('stations', 'stations', 'Kitchen stations', {})
+
+
+bootstrap_ns = Namespace('bootstrap', description='Everything an operational screen needs, in one request')
+
+
+@bootstrap_ns.route('/<string:screen>')
+@bootstrap_ns.doc(params={'screen': ', '.join(SCREENS),
+                          'known': 'Section versions the client already holds, e.g. menu:12,orders:9f2c'})
+class ScreenBootstrap(ApiResource):
+    def get(self, screen):
+        """Sections for a screen; those named in known= with a current version come back without data."""
+        if screen not in SCREENS:
+            abort(404, 'Unknown screen')
+        restaurant_id = current_user.restaurant_id
+        known = parse_known(request.args.get('known'))
+        versions, context = screen_versions(restaurant_id, screen)
+        etag = make_etag('bootstrap', screen, restaurant_id, sorted(versions.items()), sorted(known.items()))
+        response = not_modified(etag)
+        if response is not None:
+            return response
+        return with_etag(jsonify(build_payload(restaurant_id, screen, versions, context, known)), etag)
+
+
+api.add_namespace(bootstrap_ns, path='/bootstrap')
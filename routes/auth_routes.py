@@ -2,6 +2,7 @@ from flask import Blueprint, redirect, url_for, request, flash, render_template,
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from datetime import datetime
+import logging
 import random
 import string
 from project.models import User, Restaurant, Table, Menu, Category, MenuItem, Station
@@ -9,6 +10,7 @@ from extensions import db
 from .email import send_email
 
 auth_bp = Blueprint('auth', __name__)
+logger = logging.getLogger(__name__)
 
 def preload_restaurant_data(restaurant_id):
     """Preloads initial data for a new restaurant."""
@@ -59,7 +61,7 @@ def login():
         
         if user and user.is_active and user.password and check_password_hash(user.password, password):
             login_user(user)
-            print(f"DEBUG: User '{user.email}' logged in with role: '{user.role}'")
+            logger.info("User %s logged in with role %s", user.id, user.role)
             if user.role == 'kitchen':
                 session['current_view'] = 'kitchen'
                 return redirect(url_for('admin.kitchen_orders'))
@@ -90,13 +92,15 @@ def change_password():
         current_password = request.form.get('current_password')
         new_password = request.form.get('new_password')
         
-        if not check_password_hash(current_user.password, current_password):
+        user = current_user.load()
+        if not check_password_hash(user.password, current_password):
             flash('Incorrect current password.')
             return redirect(url_for('auth.change_password'))
             
-        current_user.password = generate_password_hash(new_password)
-        current_user.password_version += 1
+        user.password = generate_password_hash(new_password)
+        user.password_version += 1
         db.session.commit()
+        login_user(user) # Keep this session; its id carries the new password version
         flash('Password updated successfully.')
         if current_user.role == 'kitchen':
             return redirect(url_for('admin.kitchen_orders'))
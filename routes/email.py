@@ -1,18 +1,14 @@
-from flask_mail import Message
+import logging
 from flask import current_app, render_template
-from extensions import mail
+from project import outbox
+
+logger = logging.getLogger(__name__)
 
 def send_email(to, subject, template, **kwargs):
+    """Renders the email now and queues it in the outbox; delivery happens in the background."""
     app = current_app._get_current_object()
-    msg = Message(
-        subject,
-        sender=app.config['MAIL_USERNAME'],
-        recipients=[to]
-    )
-    msg.body = render_template(template + '.txt', **kwargs)
-    msg.html = render_template(template + '.html', **kwargs)
-    try:
-        mail.send(msg)
-        print(f"Email successfully sent to {to}")
-    except Exception as e:
-        print(f"Error sending email to {to}: {e}")
\ No newline at end of file
+    body_text = render_template(template + '.txt', **kwargs)
+    body_html = render_template(template + '.html', **kwargs)
+    message_id = outbox.enqueue(to, subject, app.config['MAIL_USERNAME'], body_text, body_html)
+    logger.info("Email %r to %s queued as outbox message %s", subject, to, message_id)
+    return message_id
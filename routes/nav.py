@@ -1,5 +1,11 @@
-from flask import session
-import copy
+from collections import namedtuple
+from types import MappingProxyType
+from flask import session, g, request, current_app, has_request_context
+
+# Source definition of the admin shell navigation. Items may carry an optional
+# 'roles' list to hide them from other roles. compile_navigation() turns this into
+# frozen structures once at startup (and once per other SCRIPT_NAME the app is served
+# under); nothing here is read or copied per request.
 
 MENU_STRUCTURE = {
     'kitchen': {
@@ -27,6 +33,7 @@ MENU_STRUCTURE = {
             {'label': 'Menu Items', 'endpoint': 'admin.menu_manage_menu', 'icon': 'bi-journal-text'},
             {'label': 'Menus', 'endpoint': 'admin.menu_menus', 'icon': 'bi-journal-album'},            
             {'label': 'Categories', 'endpoint': 'admin.menu_categories', 'icon': 'bi-tags'},
+            {'label': 'Import / Export', 'endpoint': 'admin.menu_import', 'icon': 'bi-arrow-down-up', 'roles': ['admin']},
         ]
     },
     'online_store': {
@@ -51,12 +58,90 @@ MENU_STRUCTURE = {
     }
 }
 
-def get_current_menu():
+NavItem = namedtuple('NavItem', ['label', 'endpoint', 'icon', 'url'])
+NavView = namedtuple('NavView', ['key', 'label', 'description', 'items'])
+
+ROLES = ('admin', 'staff', 'kitchen')
+DEFAULT_VIEW = 'kitchen'
+
+# Footer links shared by every view; the Sysadmin link is added for superadmins
+FOOTER_ITEMS = [
+    {'label': 'Profile', 'endpoint': 'auth.change_password', 'icon': 'bi-person-circle'},
+    {'label': 'Logout', 'endpoint': 'auth.logout', 'icon': 'bi-box-arrow-right'},
+]
+SYSADMIN_ITEM = {'label': 'Sysadmin', 'endpoint': 'sysadmin.dashboard', 'icon': 'bi-shield-lock'}
+
+class Navigation:
+    """
+    Immutable, precompiled navigation shared by all requests.
+    views[view] is the full NavView, by_role[(view, role)] the role-filtered variant,
+    and footer[is_superadmin] the footer links. URLs are resolved at compile time.
     """
-    Returns the menu list for the current view stored in session.
+
+    def __init__(self, build_url):
+        def item(spec):
+            return NavItem(spec['label'], spec['endpoint'], spec['icon'], build_url(spec['endpoint']))
+
+        def view(key, spec, role=None):
+            items = tuple(item(i) for i in spec['items'] if role is None or role in i.get('roles', ROLES))
+            return NavView(key, spec['label'], spec['description'], items)
+
+        self.views = MappingProxyType({key: view(key, spec) for key, spec in MENU_STRUCTURE.items()})
+        self.by_role = MappingProxyType({
+            (key, role): view(key, spec, role) for key, spec in MENU_STRUCTURE.items() for role in ROLES
+        })
+        self.view_keys = tuple(MENU_STRUCTURE)
+        self.single_view = MappingProxyType({key: (key,) for key in MENU_STRUCTURE})
+        footer = tuple(item(i) for i in FOOTER_ITEMS)
+        self.footer = MappingProxyType({False: footer, True: (item(SYSADMIN_ITEM),) + footer})
+
+    def menu(self, view, role=None):
+        """The (role-filtered) menu for a view, defaulting to kitchen for unknown views."""
+        if view not in self.views:
+            view = DEFAULT_VIEW
+        return self.by_role.get((view, role)) or self.views[view]
+
+_navigation = None
+# Script root (SCRIPT_NAME) -> Navigation with URLs under it; bounded, as proxies can set the prefix per request
+_by_script_root = {}
+MAX_SCRIPT_ROOTS = 16
+
+def _compile(app, script_root):
+    with app.test_request_context(environ_overrides={'SCRIPT_NAME': script_root}):
+        from flask import url_for
+        return Navigation(url_for)
+
+def compile_navigation(app):
+    """Builds the shared Navigation under APPLICATION_ROOT; call after all blueprints are registered."""
+    global _navigation
+    script_root = (app.config.get('APPLICATION_ROOT') or '/').rstrip('/')
+    _navigation = _compile(app, script_root)
+    _by_script_root.clear()
+    _by_script_root[script_root] = _navigation
+    app.extensions['navigation'] = _navigation
+    return _navigation
+
+def navigation():
+    """The Navigation for the current request's script root, compiled on first use."""
+    if not has_request_context():
+        return _navigation
+    nav = _by_script_root.get(request.script_root)
+    if nav is None:
+        nav = _compile(current_app._get_current_object(), request.script_root)
+        if len(_by_script_root) < MAX_SCRIPT_ROOTS:
+            _by_script_root[request.script_root] = nav
+    return nav
+
+def get_current_menu(role=None):
+    """
+    Returns the shared menu for the current view stored in session.
     Defaults to 'kitchen' if not set.
     """
-    view = session.get('current_view', 'kitchen')
-    # Return the specific menu or default to kitchen if key not found
-    # Return a deep copy to allow modification (e.g. appending Logout) without affecting global state
-    return copy.deepcopy(MENU_STRUCTURE.get(view, MENU_STRUCTURE['kitchen']))
\ No newline at end of file
+    return navigation().menu(session.get('current_view', DEFAULT_VIEW), role)
+
+def add_nav_item(label, url, icon):
+    """Adds a sidebar footer link for the current request only (e.g. context-specific actions)."""
+    g.setdefault('extra_nav_items', []).append(NavItem(label, None, icon, url))
+
+def extra_nav_items():
+    return g.get('extra_nav_items', ())
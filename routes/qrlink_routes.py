@@ -1,33 +1,52 @@
-from flask import Blueprint, render_template, request, jsonify, abort
+from flask import Blueprint, render_template, request, jsonify, abort, current_app, make_response, url_for
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
 import pytz
+import logging
 
-from project.models import Restaurant, Table, Category, Order, OrderItem, Menu, MenuItem, ModifierGroup, ModifierOption
+from project.models import Table, Category, Order, OrderItem, MenuItem, ModifierGroup, ModifierOption
 from extensions import db, socketio
+from project.helpers import scheduled_menus, serialize_menu_items
+from project.metrics import observe_order_placed
+from project.tracing import start_trace
+from project.tenancy import resolve_restaurant, resolve_table, resolve_qr
+from project.fragment_cache import menu_version
+from project.etags import make_etag, not_modified, with_etag, conditional_allowed, menu_schedule, order_version, deploy_version
+from project.menu_bundle import bundle_payload
+from project.realtime import order_room_token
 
 qrlink_bp = Blueprint('qrlink', __name__, url_prefix='/qrlink')
+logger = logging.getLogger(__name__)
 
 @qrlink_bp.route('/')
 def index():
     """Generic landing for users who navigate to /qrlink/ directly."""
     return render_template('qrlink_index.html')
 
+def _tenant(slug):
+    """The restaurant summary for the slug (404 if unknown) and the ?table= table, if any."""
+    restaurant = resolve_restaurant(slug)
+    if restaurant is None:
+        abort(404)
+    return restaurant, resolve_table(restaurant.id, request.args.get('table'))
+
 @qrlink_bp.route('/<slug>')
 def customer_view(slug):
     """Displays the customer ordering flow, starting with a welcome screen."""
-    restaurant = Restaurant.query.filter_by(slug=slug).first_or_404()
-    table_number = request.args.get('table')
-    table = Table.query.filter_by(restaurant_id=restaurant.id, number=table_number).first()
+    restaurant, table = _tenant(slug)
     return render_template('qrlink_landing.html', restaurant=restaurant, table=table)
 
-@qrlink_bp.route('/<slug>/menu')
-def customer_menu(slug):
-    """Displays the menu and categories for ordering."""
-    restaurant = Restaurant.query.filter_by(slug=slug).first_or_404()
-    table_number = request.args.get('table')
-    table = Table.query.filter_by(restaurant_id=restaurant.id, number=table_number).first()
+@qrlink_bp.route('/t/<qr_identifier>')
+def table_entry(qr_identifier):
+    """Welcome screen for a table's printed QR code, resolved by its qr_identifier."""
+    restaurant, table = resolve_qr(qr_identifier)
+    if restaurant is None:
+        abort(404)
+    return render_template('qrlink_landing.html', restaurant=restaurant, table=table)
 
+def _scheduled_category_ids(restaurant, version):
+    """Ids of the active categories on the restaurant's menus scheduled right now (local time)."""
     # 1. Get current time and day in the restaurant's local timezone
     try:
         restaurant_tz = pytz.timezone(restaurant.timezone or 'UTC')
@@ -35,41 +54,34 @@ def customer_menu(slug):
         restaurant_tz = pytz.timezone('UTC')
 
     now_local = datetime.utcnow().replace(tzinfo=pytz.utc).astimezone(restaurant_tz)
-    current_time = now_local.time()
-    current_day_index = str(now_local.weekday()) # Monday is 0, Sunday is 6
-    
-    print(f"\n--- DEBUG: customer_menu for slug: {slug} ---")
-    print(f"Restaurant Timezone: {restaurant_tz}")
-    print(f"Current Local Time: {current_time}, Day Index: {current_day_index} (Mon=0)")
 
-    # 2. Find all potentially active menus
-    all_menus = Menu.query.filter_by(restaurant_id=restaurant.id, is_active=True).options(selectinload(Menu.categories)).all()
-    
-    active_menus = []
-    print(f"Checking {len(all_menus)} active menus for schedule...")
-    for menu in all_menus:
-        # Corrected logic: An empty string for active_days should mean it's inactive.
-        # `None` means it has no day-based restrictions.
-        day_match = menu.active_days and current_day_index in menu.active_days.split(',')
-        
-        time_match = False
-        if not menu.start_time or not menu.end_time:
-            time_match = True # No time restriction
-        elif menu.start_time <= menu.end_time: # Same day schedule
-            if menu.start_time <= current_time <= menu.end_time:
-                time_match = True
-        else: # Overnight schedule (e.g., 10pm - 2am)
-            if current_time >= menu.start_time or current_time <= menu.end_time:
-                time_match = True
-        
-        print(f"  - Menu: '{menu.name}' (Active Days: '{menu.active_days}') -> Day Match: {day_match}, Time Match: {time_match}")
-        if day_match and time_match:
-            active_menus.append(menu)
-
-    print(f"Found {len(active_menus)} currently scheduled menus.")
+    # 2. Find all potentially active menus (a snapshot cached per menu version)
+    all_menus = menu_schedule(restaurant.id, version)
+
+    active_menus = scheduled_menus(all_menus, now_local)
+    if logger.isEnabledFor(logging.DEBUG):
+        # Customer menu views are the busiest page, so only a sample of these is kept
+        logger.debug("customer_menu %s: %d of %d active menus scheduled at %s (day %s, %s)",
+                     restaurant.slug, len(active_menus), len(all_menus), now_local.time(), now_local.weekday(), restaurant_tz,
+                     extra={'sample_rate': 0.01, 'restaurant_id': restaurant.id,
+                            'scheduled_menu_ids': [menu.id for menu in active_menus]})
 
     # 3. Get a unique set of active category IDs from the active menus
-    active_category_ids = {cat.id for menu in active_menus for cat in menu.categories if cat.is_active}
+    return {category_id for menu in active_menus for category_id in menu.category_ids}
+
+@qrlink_bp.route('/<slug>/menu')
+def customer_menu(slug):
+    """Displays the menu and categories for ordering."""
+    restaurant, table = _tenant(slug)
+    version = menu_version(restaurant.id)
+    active_category_ids = _scheduled_category_ids(restaurant, version)
+
+    # The page is fully determined by these, so a client holding it gets a 304 without any menu query
+    etag = make_etag('menu', restaurant, table, version, sorted(active_category_ids), request.args.get('type'))
+    if conditional_allowed():
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
 
     # 4. Fetch the final list of categories to display
     categories = Category.query.filter(
@@ -79,43 +91,111 @@ def customer_menu(slug):
     ).order_by(Category.name).all()
 
     # Serialize data for JavaScript
-    menu_data = {}
     all_items = [item for cat in categories for item in cat.items]
-    for item in all_items:
-        menu_data[item.id] = {
-            'id': item.id,
-            'name': item.name,
-            'price': item.price,
-            'description': item.description,
-            'modifiers': [{
-                'id': group.id,
-                'name': group.name,
-                'selection_type': group.selection_type,
-                'is_required': group.is_required,
-                'options': [{
-                    'id': opt.id,
-                    'name': opt.name,
-                    'price_override': opt.price_override
-                } for opt in group.options]
-            } for group in item.modifiers]
-        }
-
-    return render_template('qrlink_store.html', restaurant=restaurant, table=table, categories=categories, menu_data_json=menu_data)
+    menu_data = serialize_menu_items(all_items, include_description=True)
+
+    response = make_response(render_template('qrlink_store.html', restaurant=restaurant, table=table, categories=categories,
+                                             menu_data_json=menu_data, menu_data_version=version))
+    return with_etag(response, etag) if conditional_allowed() else response
+
+@qrlink_bp.route('/<slug>/menu/bundle')
+def menu_bundle(slug):
+    """Menu bundle JSON for the offline client; ?since=<version> returns only what changed since then."""
+    restaurant = resolve_restaurant(slug)
+    if restaurant is None:
+        abort(404)
+    since = request.args.get('since', type=int)
+    version = menu_version(restaurant.id)
+    active_category_ids = sorted(_scheduled_category_ids(restaurant, version))
+    etag = make_etag('bundle', restaurant.id, version, since, active_category_ids)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    payload = bundle_payload(restaurant.id, version, since)
+    payload['active_category_ids'] = active_category_ids
+    return with_etag(jsonify(payload), etag)
+
+@qrlink_bp.route('/sw.js')
+def service_worker():
+    """The customer client's service worker, served from /qrlink/ so its scope covers every qrlink page."""
+    response = make_response(render_template('qrlink_sw.js', cache_name=f'qrlink-{deploy_version()}'))
+    response.mimetype = 'application/javascript'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@qrlink_bp.route('/<slug>/manifest.webmanifest')
+def web_manifest(slug):
+    """Web app manifest, so customers can install the restaurant's ordering page."""
+    restaurant = resolve_restaurant(slug)
+    if restaurant is None:
+        abort(404)
+    manifest = {
+        'name': restaurant.name,
+        'short_name': restaurant.name[:12],
+        'start_url': url_for('qrlink.customer_view', slug=restaurant.slug),
+        'scope': url_for('qrlink.index'),
+        'display': 'standalone',
+        'theme_color': restaurant.brand_color or '#2d3436',
+        'background_color': '#ffffff',
+    }
+    if restaurant.has_logo:
+        manifest['icons'] = [{'src': url_for('admin.serve_restaurant_image', restaurant_id=restaurant.id, image_type='logo'),
+                              'sizes': 'any', 'purpose': 'any'}]
+    response = jsonify(manifest)
+    response.mimetype = 'application/manifest+json'
+    return response
 
 @qrlink_bp.route('/<slug>/checkout')
 def customer_checkout(slug):
     """Displays the checkout page with the cart summary."""
-    restaurant = Restaurant.query.filter_by(slug=slug).first_or_404()
-    table_number = request.args.get('table')
-    table = Table.query.filter_by(restaurant_id=restaurant.id, number=table_number).first()
+    restaurant, table = _tenant(slug)
     return render_template('qrlink_checkout.html', restaurant=restaurant, table=table)
 
 @qrlink_bp.route('/<slug>/thanks/<int:order_id>')
 def customer_thanks(slug, order_id):
     """Displays the thank you page after an order is placed."""
-    restaurant = Restaurant.query.filter_by(slug=slug).first_or_404()
+    restaurant = resolve_restaurant(slug)
+    if restaurant is None:
+        abort(404)
+    version = order_version(order_id, restaurant.id)
+    if version is None:
+        abort(404)
+    etag = make_etag('thanks', restaurant, order_id, version)
+    if conditional_allowed():
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
     order = Order.query.filter_by(id=order_id, restaurant_id=restaurant.id).first_or_404()
-    return render_template('qrlink_thanks.html', restaurant=restaurant, order=order)
+    response = make_response(render_template('qrlink_thanks.html', restaurant=restaurant, order=order))
+    return with_etag(response, etag) if conditional_allowed() else response
+
+@qrlink_bp.route('/<slug>/orders/<int:order_id>/status')
+def order_status(slug, order_id):
+    """JSON status of a customer's order; the thanks page polls this with If-None-Match."""
+    restaurant = resolve_restaurant(slug)
+    if restaurant is None:
+        abort(404)
+    version = order_version(order_id, restaurant.id)
+    if version is None:
+        abort(404)
+    etag = make_etag('order-status', order_id, version)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    order = Order.query.filter_by(id=order_id, restaurant_id=restaurant.id).options(
+        selectinload(Order.items).joinedload(OrderItem.menu_item)
+    ).first_or_404()
+    return with_etag(jsonify({
+        'order_id': order.id,
+        'status': order.status,
+        'version': order.version,
+        'items': [{
+            'id': item.id,
+            'name': item.menu_item.name if item.menu_item else None,
+            'quantity': item.quantity,
+            'status': item.status,
+        } for item in order.items],
+    }), etag)
 
 @qrlink_bp.route('/place-order', methods=['POST'])
 def place_order():
@@ -135,17 +215,65 @@ def place_order():
     elif not restaurant_id:
         return jsonify({'success': False, 'message': 'Restaurant not identified for take-away order.'}), 400
 
+    # Orders replayed from the client's offline outbox carry the token of the first attempt
+    client_token = data.get('client_token') or None
+    if client_token is not None and (not isinstance(client_token, str) or len(client_token) > 64):
+        return jsonify({'success': False, 'message': 'Invalid client token.'}), 400
+    if client_token is not None:
+        existing_id = _order_for_token(client_token, restaurant_id)
+        if existing_id is not None:
+            return jsonify({'success': True, 'order_id': existing_id, 'order_token': order_room_token(existing_id),
+                            'replayed': True})
+
+    trace = start_trace('place_order', restaurant_id=restaurant_id, items=len(data['items']))
+    write_queue = current_app.extensions.get('sqlite_write_queue')
+    try:
+        if write_queue:
+            # SQLite profile: batch the insert with other in-flight orders on the single writer
+            with trace.span('db.write_queue'):
+                order_id = write_queue.run(_insert_order, table_id, restaurant_id, data['items'], client_token)
+        else:
+            with trace.span('db.flush'):
+                order_id = _insert_order(table_id, restaurant_id, data['items'], client_token)
+            with trace.span('db.commit'):
+                db.session.commit()
+    except IntegrityError:
+        # A concurrent replay of the same token got there first
+        db.session.rollback()
+        existing_id = _order_for_token(client_token, restaurant_id) if client_token else None
+        if existing_id is None:
+            raise
+        trace.finish(order_id=existing_id)
+        return jsonify({'success': True, 'order_id': existing_id, 'order_token': order_room_token(existing_id),
+                        'replayed': True})
+
+    observe_order_placed(restaurant_id)
+    payload = {'order_id': order_id}
+    with trace.span('socketio.emit') as emit_span:
+        context = trace.context(emit_span)
+        if context:
+            payload['trace'] = context
+        socketio.emit('new_order', payload, room=f'restaurant_{restaurant_id}')
+    trace.finish(order_id=order_id)
+    return jsonify({'success': True, 'order_id': order_id, 'order_token': order_room_token(order_id)})
+
+def _order_for_token(client_token, restaurant_id):
+    return db.session.query(Order.id).filter_by(client_token=client_token, restaurant_id=restaurant_id).scalar()
+
+def _insert_order(table_id, restaurant_id, items, client_token=None):
+    """Adds a new order with its items to the session and returns the order id (uncommitted)."""
     new_order = Order(
         table_id=table_id,
         restaurant_id=restaurant_id,
         status='pending',
+        client_token=client_token,
         # order_type=data.get('order_type', 'dine-in'), # NOTE: This attribute needs to be added to the Order model to track dine-in vs take-away.
         created_at=datetime.utcnow()
     )
     db.session.add(new_order)
     db.session.flush() # Flush to get the new_order.id
 
-    for item_data in data['items']:
+    for item_data in items:
         modifier_ids = item_data.get('modifiers', [])
         order_item = OrderItem(
             order_id=new_order.id, 
@@ -160,6 +288,5 @@ def place_order():
 
         db.session.add(order_item)
 
-    db.session.commit()
-    socketio.emit('new_order', {'order_id': new_order.id}, room=f'restaurant_{new_order.restaurant_id}')
-    return jsonify({'success': True, 'order_id': new_order.id})
\ No newline at end of file
+    db.session.flush()
+    return new_order.id
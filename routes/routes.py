@@ -1,13 +1,15 @@
 from functools import wraps
-from flask import Blueprint, abort, request, redirect, url_for, render_template, flash, current_app, send_file, session, jsonify, Response
+from flask import Blueprint, abort, request, redirect, url_for, render_template, flash, current_app, send_file, session, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
+from markupsafe import Markup, escape
 import os
-import re
 import pytz
+import logging
 import csv
 import io
+import json
 from io import BytesIO, StringIO
 from datetime import datetime, date, timedelta
 from sqlalchemy.orm import selectinload
@@ -17,8 +19,18 @@ from sqlalchemy.orm.attributes import flag_modified
 from project.models import User, Restaurant, Order, MenuItem, Table, Category, OrderItem, Menu, ModifierGroup, ModifierOption, Station
 from extensions import db, socketio
 from .email import send_email
+from project.sweeper import get_sweeper_config
+from project.helpers import order_totals, serialize_menu_items, sort_tables, derive_table_state
+from project.metrics import observe_kitchen_pickup
+from project.pos_sync import apply_batch, replica_delta, client_config as pos_client_config
+from project.menu_io import MenuImportError, export_menu, export_csv, load_document, import_menu, next_sku
+from project.table_provisioning import (ProvisioningError, range_rows, floor_plan_rows, provision_tables, next_table_number,
+                                        compact_ids, expand_ids)
 
 admin_bp = Blueprint('admin', __name__)
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 500 # Orders loaded and CSV rows flushed per batch in office_export_history
 
 # UPLOAD_FOLDER is now accessed via current_app.config['UPLOAD_FOLDER']
 
@@ -66,7 +78,8 @@ def kitchen_orders():
         else:
             uncategorized_items.append(item)
 
-    return render_template('kitchen_orders.html', stations=stations, station_items=station_items, uncategorized_items=uncategorized_items, active_items=active_items)
+    return render_template('kitchen_orders.html', stations=stations, station_items=station_items, uncategorized_items=uncategorized_items, active_items=active_items,
+                           pos_config=pos_client_config())
 
 @admin_bp.route('/office/users')
 @login_required
@@ -158,45 +171,46 @@ def office_settings():
         except (ValueError, TypeError):
             restaurant.tax_rate = 0.0
         restaurant.timezone = request.form.get('timezone', 'UTC')
+
+        # Stale-order sweeper rules
+        sweeper_config = get_sweeper_config(restaurant)
+        sweeper_config['enabled'] = 'sweeper_enabled' in request.form
+        sweeper_config['flag_pending'] = 'sweeper_flag_pending' in request.form
+        for key in ['paid_complete_hours', 'ready_close_hours']:
+            try:
+                sweeper_config[key] = max(float(request.form.get(key, sweeper_config[key])), 0)
+            except (ValueError, TypeError):
+                pass
+        restaurant.sweeper_config = sweeper_config
+        flag_modified(restaurant, "sweeper_config")
         
         db.session.commit()
         flash('Business settings updated.')
         return redirect(url_for('admin.office_settings'))
         
-    return render_template('office_settings.html', restaurant=restaurant, timezones=timezones)
+    return render_template('office_settings.html', restaurant=restaurant, timezones=timezones, sweeper_config=get_sweeper_config(restaurant))
 
 @admin_bp.route('/menu/menu')
 @login_required
 def menu_manage_menu():
-    print(f"\n--- DEBUG: menu_manage_menu for user: {current_user.email} ---")
     restaurant = db.session.get(Restaurant, current_user.restaurant_id)
-    print(f"DEBUG: Restaurant: {restaurant.name}")
-
     items = MenuItem.query.filter_by(restaurant_id=current_user.restaurant_id).all()
-    print(f"DEBUG: Found {len(items)} total menu items.")
-    for item in items:
-        category_names = [c.name for c in item.categories]
-        print(f"  - Item: '{item.name}' (ID: {item.id}), Available: {item.is_available}, Categories: {category_names}")
-
     categories = Category.query.filter_by(restaurant_id=current_user.restaurant_id).all()
-    print(f"DEBUG: Found {len(categories)} total categories.")
-
     menus = Menu.query.filter_by(restaurant_id=current_user.restaurant_id).all()
-    print(f"DEBUG: Found {len(menus)} total menus.")
-
     stations = Station.query.filter_by(restaurant_id=current_user.restaurant_id).all()
-    print(f"DEBUG: Found {len(stations)} total stations.")
     
     selected_item = None
     item_id = request.args.get('item_id')
-    print(f"DEBUG: Requested item_id from URL: {item_id}")
     if item_id:
         selected_item = next((i for i in items if str(i.id) == str(item_id)), None)
     
     if not selected_item and items:
         selected_item = items[0]
 
-    print(f"DEBUG: Selected item for display: {selected_item.name if selected_item else 'None'}")
+    logger.debug("menu_manage_menu: %d items, %d categories, %d menus, %d stations",
+                 len(items), len(categories), len(menus), len(stations),
+                 extra={'restaurant_id': restaurant.id, 'requested_item_id': item_id,
+                        'selected_item_id': selected_item.id if selected_item else None})
     return render_template('menu_items.html', items=items, restaurant=restaurant, selected_item=selected_item, categories=categories, menus=menus, stations=stations)
 
 @admin_bp.route('/menu/menu/add', methods=['POST'])
@@ -204,10 +218,9 @@ def menu_manage_menu():
 def menu_add_menu_item():
     if request.form.get('quick_add'):
         category_id = request.form.get('category_id')
-        count = MenuItem.query.filter_by(restaurant_id=current_user.restaurant_id).count()
         new_item = MenuItem(
             name="New Item",
-            sku=f"ITEM-{count + 1:03d}",
+            sku=next_sku(db.session, current_user.restaurant_id),
             price=0.0,
             restaurant_id=current_user.restaurant_id,
             is_available=True
@@ -365,6 +378,65 @@ def menu_delete_modifier_option(option_id):
         return redirect(url_for('admin.menu_manage_menu', item_id=group.menu_item_id))
     return redirect(url_for('admin.menu_manage_menu'))
 
+@admin_bp.route('/menu/export.<string:fmt>')
+@login_required
+@admin_required
+def menu_export(fmt):
+    if fmt not in ('json', 'csv'):
+        abort(404)
+    document = export_menu(current_user.restaurant_id)
+    body = export_csv(document) if fmt == 'csv' else json.dumps(document, indent=2)
+    filename = f"menu_export_{datetime.now().strftime('%Y%m%d')}.{fmt}"
+    return Response(body, mimetype='text/csv' if fmt == 'csv' else 'application/json',
+                    headers={"Content-Disposition": f"attachment;filename={filename}"})
+
+@admin_bp.route('/menu/import', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def menu_import():
+    """
+    Bulk menu import (project/menu_io.py). Uploads are previewed first: the dry-run report
+    is rendered with the document in a hidden field, and 'apply' posts it back to be written.
+    A JSON body is imported directly (?dry_run=true to only diff) and answered with the report.
+    """
+    restaurant_id = current_user.restaurant_id
+    if request.is_json:
+        try:
+            report = import_menu(restaurant_id, request.get_json(silent=True),
+                                 dry_run=request.args.get('dry_run', '').lower() in ('1', 'true'))
+        except MenuImportError as error:
+            return jsonify({'error': str(error)}), 400
+        if report['applied']:
+            db.session.commit()
+        return jsonify(report), 400 if report['errors'] else 200
+
+    if request.method == 'GET':
+        return render_template('menu_import.html', report=None)
+
+    upload = request.files.get('file')
+    if upload and upload.filename:
+        content = upload.read()
+        fmt = 'csv' if upload.filename.lower().endswith('.csv') else 'json'
+    else:
+        content = request.form.get('document', '')
+        fmt = request.form.get('format', 'json')
+    apply = 'apply' in request.form
+    try:
+        document = load_document(content, fmt)
+        report = import_menu(restaurant_id, document, dry_run=not apply)
+    except MenuImportError as error:
+        flash(escape(str(error))) # Flashes render as markup and the message quotes the upload
+        return redirect(url_for('admin.menu_import'))
+
+    if report['applied']:
+        db.session.commit()
+        flash(f"Menu imported: {len(report['items']['created'])} items created, "
+              f"{len(report['items']['updated'])} updated.")
+        return redirect(url_for('admin.menu_manage_menu'))
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    return render_template('menu_import.html', report=report, document=content, fmt=fmt)
+
 @admin_bp.route('/storefront/order-item/status/<int:item_id>', methods=['POST'])
 @login_required
 def storefront_update_order_item_status(item_id):
@@ -372,8 +444,10 @@ def storefront_update_order_item_status(item_id):
     if item and item.order.restaurant_id == current_user.restaurant_id:
         new_status = request.json.get('status')
         if new_status in ['pending', 'preparing', 'ready']:
+            previous_status = item.status
             item.status = new_status
             db.session.commit()
+            observe_kitchen_pickup(item.order, previous_status, new_status)
             
             order = item.order
             all_ready = all(i.status == 'ready' for i in order.items)
@@ -388,11 +462,9 @@ def storefront_update_order_item_status(item_id):
 @admin_bp.route('/kitchen/item/<int:item_id>/<string:status>', methods=['POST'])
 @login_required
 def kitchen_update_item_status(item_id, status):
-    print(f"DEBUG: Kitchen update request - Item: {item_id}, Status: {status}")
-    
     item = db.session.get(OrderItem, item_id)
     if not item:
-        print(f"DEBUG: Item {item_id} not found")
+        logger.info("Kitchen update for missing order item %s", item_id)
         return jsonify({'success': False, 'message': 'Item not found'}), 404
         
     if item.order.restaurant_id != current_user.restaurant_id:
@@ -402,9 +474,11 @@ def kitchen_update_item_status(item_id, status):
     db_status = 'ready' if status == 'complete' else status
     
     if db_status in ['preparing', 'ready', 'served']:
+        previous_status = item.status
         item.status = db_status
         db.session.commit()
-        print(f"DEBUG: Item {item_id} updated to {db_status}")
+        observe_kitchen_pickup(item.order, previous_status, db_status)
+        logger.debug("Order item %s: %s -> %s", item_id, previous_status, db_status, extra={'order_id': item.order_id})
         
         # Check if entire order is ready
         # Re-calculate and update the aggregate order status
@@ -413,7 +487,7 @@ def kitchen_update_item_status(item_id, status):
             if order.status != 'ready':
                 order.status = 'ready'
                 db.session.commit()
-                print(f"DEBUG: Order {order.id} is now fully READY")
+                logger.debug("Order %s is now fully ready", order.id)
                 socketio.emit('status_change', {'order_id': order.id, 'new_status': 'ready'}, room=f"order_{order.id}")
         current_item_statuses = {i.status for i in order.items}
         original_order_status = order.status
@@ -433,7 +507,7 @@ def kitchen_update_item_status(item_id, status):
         if original_order_status != new_order_status:
             order.status = new_order_status
             db.session.commit()
-            print(f"DEBUG: Order {order.id} status changed from '{original_order_status}' to '{new_order_status}'")
+            logger.debug("Order %s status changed from %s to %s", order.id, original_order_status, new_order_status)
             socketio.emit('status_change', {'order_id': order.id, 'new_status': new_order_status}, room=f"order_{order.id}")
 
         return jsonify({'success': True})
@@ -482,6 +556,26 @@ def kitchen_update_order_status(order_id):
     socketio.emit('status_change', {'order_id': order.id, 'new_status': new_status}, room=f"order_{order.id}")
     return {"message": "Updated"}, 200
 
+@admin_bp.route('/pos/sync', methods=['POST'])
+@login_required
+def pos_sync():
+    """Applies a POS tablet's queued mutations and returns the active orders that changed since its replica."""
+    data = request.get_json(silent=True) or {}
+    mutations = data.get('mutations') or []
+    known = data.get('known') or {}
+    if not isinstance(mutations, list) or not isinstance(known, dict):
+        return jsonify({'success': False, 'message': 'Invalid sync request.'}), 400
+
+    results, status_changes = apply_batch(current_user.restaurant_id, current_user.id, mutations)
+    for order_id, new_status in status_changes.items():
+        socketio.emit('status_change', {'order_id': order_id, 'new_status': new_status}, room=f"order_{order_id}")
+    if any(result['status'] == 'applied' for result in results):
+        # Other tablets pull the change right away instead of at their next poll
+        socketio.emit('pos_changed', {'client_id': data.get('client_id')}, room=f"restaurant_{current_user.restaurant_id}")
+
+    orders, removed = replica_delta(current_user.restaurant_id, known)
+    return jsonify({'success': True, 'results': results, 'orders': orders, 'removed': removed})
+
 @admin_bp.route('/menu/image/<int:item_id>')
 def serve_menu_image(item_id):
     item = MenuItem.query.get_or_404(item_id)
@@ -512,8 +606,7 @@ def serve_restaurant_image(restaurant_id, image_type):
 @admin_bp.route('/kitchen/tables')
 @login_required
 def kitchen_tables():
-    tables = Table.query.filter_by(restaurant_id=current_user.restaurant_id).all()
-    tables.sort(key=lambda x: [int(c) if c.isdigit() else c.lower() for c in re.split('([0-9]+)', x.number)])
+    tables = sort_tables(Table.query.filter_by(restaurant_id=current_user.restaurant_id).all())
 
     active_orders = Order.query.filter_by(
         restaurant_id=current_user.restaurant_id
@@ -522,6 +615,7 @@ def kitchen_tables():
     ).options(
         selectinload(Order.items).selectinload(OrderItem.menu_item)
     ).all()
+    active_orders.sort(key=lambda order: order.flagged_at is not None) # Today's order before a flagged stale one
 
     for table in tables:
         # Attach active order directly to table for easy access in template
@@ -608,14 +702,9 @@ def history():
     ).order_by(Order.created_at.desc()).all()
 
     # Calculate totals for display
+    tax_rate = current_user.restaurant.tax_rate or 0.0
     for order in orders:
-        subtotal = 0
-        for item in order.items:
-            modifier_price = sum(mod.price_override for mod in item.selected_modifiers)
-            subtotal += (item.menu_item.price + modifier_price) * item.quantity
-        
-        tax_rate = current_user.restaurant.tax_rate or 0.0
-        order.calculated_total = subtotal * (1 + tax_rate)
+        order.calculated_total = order_totals(order, tax_rate)[2]
         order.item_count = sum(item.quantity for item in order.items)
 
     return render_template('office_history.html', orders=orders, date_filter=date_filter)
@@ -646,42 +735,41 @@ def office_export_history():
         selectinload(Order.items).selectinload(OrderItem.menu_item),
         selectinload(Order.items).selectinload(OrderItem.selected_modifiers),
         selectinload(Order.table)
-    ).order_by(Order.created_at.desc()).all()
-
-    output = StringIO()
-    writer = csv.writer(output)
-    # Enhanced CSV Headers
-    writer.writerow(['Order ID', 'Date', 'Time', 'Table', 'Status', 'Payment Method', 'Items Summary', 'Subtotal', 'Tax', 'Total'])
+    ).order_by(Order.created_at.desc()).yield_per(EXPORT_BATCH_SIZE)
 
     tax_rate = current_user.restaurant.tax_rate or 0.0
 
-    for order in orders:
-        subtotal = 0
-        item_summaries = []
-        for item in order.items:
-            modifier_price = sum(mod.price_override for mod in item.selected_modifiers)
-            subtotal += (item.menu_item.price + modifier_price) * item.quantity
-            item_summaries.append(f"{item.quantity}x {item.menu_item.name}")
-        
-        total = subtotal * (1 + tax_rate)
-        tax_amount = subtotal * tax_rate
-        
-        writer.writerow([
-            order.id,
-            order.created_at.strftime('%Y-%m-%d'),
-            order.created_at.strftime('%H:%M:%S'),
-            f"Table {order.table.number}" if order.table else "Takeaway",
-            order.status.title(),
-            (order.payment_method or '-').title(),
-            "; ".join(item_summaries),
-            f"{subtotal:.2f}",
-            f"{tax_amount:.2f}",
-            f"{total:.2f}"
-        ])
-
-    output.seek(0)
+    def generate():
+        # Streams the file in batches so large exports neither buffer in memory nor delay the first byte
+        output = StringIO()
+        writer = csv.writer(output)
+        # Enhanced CSV Headers
+        writer.writerow(['Order ID', 'Date', 'Time', 'Table', 'Status', 'Payment Method', 'Items Summary', 'Subtotal', 'Tax', 'Total'])
+
+        for index, order in enumerate(orders, 1):
+            subtotal, tax_amount, total = order_totals(order, tax_rate)
+            item_summaries = [f"{item.quantity}x {item.menu_item.name}" for item in order.items]
+
+            writer.writerow([
+                order.id,
+                order.created_at.strftime('%Y-%m-%d'),
+                order.created_at.strftime('%H:%M:%S'),
+                f"Table {order.table.number}" if order.table else "Takeaway",
+                order.status.title(),
+                (order.payment_method or '-').title(),
+                "; ".join(item_summaries),
+                f"{subtotal:.2f}",
+                f"{tax_amount:.2f}",
+                f"{total:.2f}"
+            ])
+            if index % EXPORT_BATCH_SIZE == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+        yield output.getvalue()
+
     filename = f"orders_export_{date_filter}_{datetime.now().strftime('%Y%m%d')}.csv"
-    return Response(output, mimetype="text/csv", headers={"Content-Disposition": f"attachment;filename={filename}"})
+    return Response(stream_with_context(generate()), mimetype="text/csv", headers={"Content-Disposition": f"attachment;filename={filename}"})
 
 @admin_bp.route('/office/payments')
 @login_required
@@ -910,10 +998,9 @@ def menu_add_item_to_category():
     
     if not item:
         # Create new item
-        count = MenuItem.query.filter_by(restaurant_id=current_user.restaurant_id).count()
         item = MenuItem(
             name=item_name,
-            sku=f"ITEM-{count + 1:03d}",
+            sku=next_sku(db.session, current_user.restaurant_id),
             price=0.0,
             restaurant_id=current_user.restaurant_id,
             is_available=True
@@ -1184,17 +1271,8 @@ def storefront_tables():
             return redirect(url_for('admin.storefront_tables'))
             
         elif action == 'auto_create':
-            tables = Table.query.filter_by(restaurant_id=current_user.restaurant_id).all()
-            existing_numbers = [int(t.number) for t in tables if t.number.isdigit()]
-            next_num = 1
-            if existing_numbers:
-                next_num = max(existing_numbers) + 1
-            
-            # Ensure uniqueness
-            while Table.query.filter_by(restaurant_id=current_user.restaurant_id, number=str(next_num)).first():
-                next_num += 1
-                
-            new_table = Table(number=str(next_num), restaurant_id=current_user.restaurant_id)
+            next_num = next_table_number(current_user.restaurant_id)
+            new_table = Table(number=next_num, restaurant_id=current_user.restaurant_id)
             db.session.add(new_table)
             db.session.commit()
             flash(f'Table {next_num} created.')
@@ -1229,45 +1307,20 @@ def storefront_tables():
                 flash('Table updated.')
             return redirect(url_for('admin.storefront_tables', table_id=table_id))
 
-    tables = Table.query.filter_by(restaurant_id=current_user.restaurant_id).all()
-    # Sort numerically if possible, otherwise alphabetically
-
     # Sort tables using natural sort order for alphanumeric numbers
-    tables.sort(key=lambda x: [int(c) if c.isdigit() else c.lower() for c in re.split('([0-9]+)', x.number)])
+    tables = sort_tables(Table.query.filter_by(restaurant_id=current_user.restaurant_id).all())
     # Fetch active orders for status display
     active_orders = Order.query.filter_by(restaurant_id=current_user.restaurant_id).filter(
         Order.status.in_(['pending', 'preparing', 'ready', 'served', 'paid'])
     ).all()
     
-    table_data = {}
-    for table in tables:
-        # Find active order for this table
-        order = next((o for o in active_orders if o.table_id == table.id), None)
-        
-        state = {}
-        
-        # Determine table status based on a priority system
-        if table.status == 'maintenance':
-            state['status'] = 'Not Available'
-            state['color'] = 'dark'
-        elif table.reservation_info and table.reservation_info.get('name'):
-            state['status'] = 'Not Available'
-            state['color'] = 'info' # Reserved
-        elif order:
-            if order.status in ['paid', 'completed']:
-                state['status'] = 'Not Available' # Needs clearing
-                state['color'] = 'primary'
-            else:
-                state['status'] = 'Occupied'
-                state['color'] = 'warning'
-        elif table.status == 'occupied':
-            state['status'] = 'Occupied'
-            state['color'] = 'secondary'
-        else:
-            state['status'] = 'Available'
-            state['color'] = 'success' # Green
-        
-        table_data[table.id] = state
+    # First active order per table; an order the sweeper flagged only shows if the table has no other
+    orders_by_table = {}
+    for order in sorted(active_orders, key=lambda order: order.flagged_at is not None):
+        orders_by_table.setdefault(order.table_id, order)
+
+    # Determine table status based on a priority system
+    table_data = {table.id: derive_table_state(table, orders_by_table.get(table.id)) for table in tables}
     
     selected_table = None
     selected_id = request.args.get('table_id')
@@ -1280,14 +1333,62 @@ def storefront_tables():
     
     return render_template('storefront_tables.html', tables=tables, restaurant=restaurant, selected_table=selected_table, table_data=table_data)
 
+@admin_bp.route('/storefront/tables/provision', methods=['POST'])
+@login_required
+@admin_required
+def storefront_provision_tables():
+    """Bulk-adds tables from the range rows or an uploaded floor-plan CSV (project/table_provisioning.py)."""
+    upload = request.files.get('floor_plan')
+    if upload and upload.filename:
+        rows, errors = floor_plan_rows(upload.read())
+    else:
+        fields = ('floor', 'prefix', 'start', 'end', 'seating_capacity')
+        columns = [request.form.getlist(f'{field}[]') for field in fields]
+        rows, errors = range_rows([dict(zip(fields, values)) for values in zip(*columns)])
+    try:
+        created, skipped = provision_tables(current_user.restaurant_id, rows, errors)
+    except ProvisioningError as error:
+        shown = error.errors[:10] + ([f'… and {len(error.errors) - 10} more'] if len(error.errors) > 10 else [])
+        flash(escape('No tables were added. ') + Markup('<br>').join(shown), 'danger')
+        return redirect(url_for('admin.storefront_tables'))
+    db.session.commit()
+
+    if skipped:
+        flash(escape(f"Skipped {len(skipped)} existing table(s): {', '.join(skipped[:20])}"
+                     f"{'…' if len(skipped) > 20 else ''}"), 'warning')
+    if not created:
+        flash('No new tables to add.')
+        return redirect(url_for('admin.storefront_tables'))
+    sheet_url = url_for('admin.storefront_tables_qr_sheet', ids=compact_ids(table_id for table_id, number in created))
+    flash(f"{len(created)} tables added. <a href='{sheet_url}' target='_blank' class='fw-bold text-decoration-underline'>"
+          f"Print their QR codes</a>")
+    return redirect(url_for('admin.storefront_tables', table_id=created[0][0]))
+
+@admin_bp.route('/storefront/tables/qr-sheet')
+@login_required
+@admin_required
+def storefront_tables_qr_sheet():
+    """Printable QR codes for ?ids=3-40,52 (compact_ids), ?floor=, or every table."""
+    restaurant = db.session.get(Restaurant, current_user.restaurant_id)
+    query = Table.query.filter_by(restaurant_id=restaurant.id)
+    if request.args.get('ids'):
+        try:
+            query = query.filter(Table.id.in_(expand_ids(request.args['ids'])))
+        except ValueError:
+            abort(400)
+    if request.args.get('floor'):
+        query = query.filter(Table.floor == request.args['floor'])
+    tables = sort_tables(query.all())
+    qr_config = {'color': '000000', 'bgcolor': 'FFFFFF', **(restaurant.qr_config or {})}
+    return render_template('storefront_qr_sheet.html', restaurant=restaurant, tables=tables, qr_config=qr_config)
+
 @admin_bp.route('/storefront/tables/delete/<int:table_id>', methods=['POST'])
 @login_required
 def storefront_delete_table(table_id):
     table = Table.query.filter_by(id=table_id, restaurant_id=current_user.restaurant_id).first_or_404()
     
     # Determine next table to highlight
-    all_tables = Table.query.filter_by(restaurant_id=current_user.restaurant_id).all()
-    all_tables.sort(key=lambda x: [int(c) if c.isdigit() else c.lower() for c in re.split('([0-9]+)', x.number)])
+    all_tables = sort_tables(Table.query.filter_by(restaurant_id=current_user.restaurant_id).all())
     
     next_id = None
     try:
@@ -1615,14 +1716,7 @@ def storefront_orders():
                 'preparing': sum(1 for item in order.items if item.status == 'preparing'),
                 'ready': sum(1 for item in order.items if item.status == 'ready')
             }
-            subtotal = 0
-            for item in order.items:
-                modifier_price = sum(mod.price_override for mod in item.selected_modifiers)
-                subtotal += (item.menu_item.price + modifier_price) * item.quantity
-            tax_rate = restaurant.tax_rate or 0.0
-            order.subtotal = subtotal
-            order.tax_amount = subtotal * tax_rate
-            order.total_price = subtotal + order.tax_amount
+            order.subtotal, order.tax_amount, order.total_price = order_totals(order, restaurant.tax_rate)
         else:
             order.item_counts = None
             order.subtotal = 0
@@ -1657,32 +1751,16 @@ def storefront_orders():
     ).order_by(Category.name).all()
 
     # Serialize menu data for JS
-    menu_data_json = {}
-    for item in menu_items:
-        menu_data_json[item.id] = {
-            'id': item.id,
-            'name': item.name,
-            'price': item.price,
-            'modifiers': [{
-                'id': group.id,
-                'name': group.name,
-                'selection_type': group.selection_type,
-                'is_required': group.is_required,
-                'options': [{'id': opt.id, 'name': opt.name, 'price_override': opt.price_override} for opt in group.options]
-            } for group in item.modifiers]
-        }
-
+    menu_data_json = serialize_menu_items(menu_items)
 
     return render_template('storefront_orders.html', orders=orders, selected_order=selected_order, 
                            menu_items=menu_items, available_tables=available_tables, categories=categories, 
-                           payment_filter=payment_filter, date_filter=date_filter, menu_data_json=menu_data_json)
+                           payment_filter=payment_filter, date_filter=date_filter, menu_data_json=menu_data_json,
+                           pos_config=pos_client_config())
 
 @admin_bp.route('/storefront/payment/<int:order_id>', methods=['GET', 'POST'])
 @login_required
 def storefront_payment(order_id):
-
-    print("in storefront payment route")
-
     order = Order.query.filter_by(id=order_id, restaurant_id=current_user.restaurant_id).first_or_404()
 
     if request.method == 'POST':
@@ -1697,13 +1775,10 @@ def storefront_payment(order_id):
             flash(f'Order #{order.id} for {target} marked as paid.')
             
             # Calculate total for success page display
-            subtotal = sum(item.menu_item.price * item.quantity for item in order.items)
-            tax_rate = current_user.restaurant.tax_rate or 0.0
-            total = subtotal * (1 + tax_rate)
+            total = order_totals(order, current_user.restaurant.tax_rate)[2]
             
-            return render_template('storefront_payment.html', order=order, total=total, success=True)
+            return render_template('storefront_payment.html', order=order, total=total, success=True,
+                                   pos_config=pos_client_config())
 
-    subtotal = sum(item.menu_item.price * item.quantity for item in order.items)
-    tax_rate = current_user.restaurant.tax_rate or 0.0
-    total = subtotal * (1 + tax_rate)
-    return render_template('storefront_payment.html', order=order, total=total)
\ No newline at end of file
+    total = order_totals(order, current_user.restaurant.tax_rate)[2]
+    return render_template('storefront_payment.html', order=order, total=total, pos_config=pos_client_config())
\ No newline at end of file
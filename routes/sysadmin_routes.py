@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import Blueprint, abort, render_template, request, redirect, url_for, flash, current_app, session
+from flask import Blueprint, abort, render_template, request, redirect, url_for, flash, current_app, session, jsonify, send_file
 from flask_login import login_required, current_user, login_user, logout_user
 from datetime import datetime
 import random
@@ -7,6 +7,7 @@ import string
 from project.models import Restaurant, User, Order
 from extensions import db
 from .email import send_email
+from project import sql_profiler, tracing, request_profiler
 
 sysadmin_bp = Blueprint('sysadmin', __name__, url_prefix='/sysadmin')
 
@@ -46,6 +47,88 @@ def dashboard():
                            total_users=total_users,
                            total_orders=total_orders)
 
+@sysadmin_bp.route('/sql-profile', methods=['GET', 'POST'])
+@login_required
+@superadmin_required
+def sql_profile():
+    """Per-endpoint SQL statistics and N+1 suspects collected by this worker process."""
+    if not session.get('mfa_verified_this_session'):
+        return redirect(url_for('sysadmin.dashboard'))
+
+    if request.method == 'POST':
+        sql_profiler.reset_stats()
+        flash("SQL profile statistics reset.", "info")
+        return redirect(url_for('sysadmin.sql_profile'))
+
+    return render_template('sysadmin_sql_profile.html',
+                           enabled=current_app.config.get('SQL_PROFILER_ENABLED'),
+                           stats=sql_profiler.endpoint_stats(),
+                           threshold=current_app.config.get('SQL_PROFILER_N_PLUS_ONE_THRESHOLD'))
+
+@sysadmin_bp.route('/profiler', methods=['GET', 'POST'])
+@login_required
+@superadmin_required
+def profiler():
+    """Arms the sampling profiler for the next N requests matching an endpoint and/or restaurant."""
+    if not session.get('mfa_verified_this_session'):
+        return redirect(url_for('sysadmin.dashboard'))
+
+    if request.method == 'POST':
+        if request.form.get('action') == 'disarm':
+            request_profiler.disarm(current_app)
+            flash("Profiler disarmed.", "info")
+            return redirect(url_for('sysadmin.profiler'))
+
+        endpoint = request.form.get('endpoint') or None
+        restaurant = db.session.get(Restaurant, int(request.form['restaurant_id'])) if request.form.get('restaurant_id') else None
+        count = min(max(int(request.form.get('count') or 1), 1), 100)
+        if not endpoint and not restaurant:
+            flash("Choose an endpoint, a restaurant or both.", "danger")
+            return redirect(url_for('sysadmin.profiler'))
+        request_profiler.arm(
+            current_app, count,
+            endpoint=endpoint,
+            restaurant_id=restaurant.id if restaurant else None,
+            restaurant_slug=restaurant.slug if restaurant else None,
+            interval_ms=request.form.get('interval_ms') or None,
+            armed_by=current_user.email
+        )
+        flash(f"Profiler armed for the next {count} matching request(s).", "success")
+        return redirect(url_for('sysadmin.profiler'))
+
+    endpoints = sorted({rule.endpoint for rule in current_app.url_map.iter_rules()
+                        if rule.endpoint != 'static' and not rule.endpoint.startswith('sysadmin.')})
+    return render_template('sysadmin_profiler.html',
+                           enabled=current_app.config.get('REQUEST_PROFILER_ENABLED'),
+                           armed=request_profiler.armed_state(current_app),
+                           endpoints=endpoints,
+                           restaurants=Restaurant.query.order_by(Restaurant.name).all(),
+                           results=request_profiler.list_results(current_app))
+
+@sysadmin_bp.route('/profiler/<name>')
+@login_required
+@superadmin_required
+def profiler_download(name):
+    if not session.get('mfa_verified_this_session'):
+        return redirect(url_for('sysadmin.dashboard'))
+
+    path = request_profiler.result_path(current_app, name)
+    if not path:
+        abort(404)
+    return send_file(path, mimetype='application/json', as_attachment=True, download_name=name)
+
+@sysadmin_bp.route('/traces.json')
+@login_required
+@superadmin_required
+def traces():
+    """Recent order-path spans from this worker's ring buffer, as a Zipkin v2 span list."""
+    if not session.get('mfa_verified_this_session'):
+        return redirect(url_for('sysadmin.dashboard'))
+
+    response = jsonify(tracing.recent_spans(request.args.get('trace_id')))
+    response.headers['Content-Disposition'] = 'attachment; filename=traces.json'
+    return response
+
 @sysadmin_bp.route('/impersonate/<int:user_id>')
 @login_required
 @superadmin_required
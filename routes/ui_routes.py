@@ -1,6 +1,6 @@
 from flask import Blueprint, session, jsonify, request, url_for
 from flask_login import current_user
-from routes.nav import get_current_menu, MENU_STRUCTURE
+from routes.nav import get_current_menu, navigation, extra_nav_items, MENU_STRUCTURE
 
 ui_bp = Blueprint('ui', __name__)
 
@@ -12,36 +12,43 @@ def switch_view():
     if view and view in MENU_STRUCTURE:
         session['current_view'] = view
         
-        # Get the default endpoint (first item in the menu)
-        menu_items = MENU_STRUCTURE[view]['items']
-        default_endpoint = menu_items[0]['endpoint'] if menu_items else 'customer.landing'
+        # Redirect to the first item in the menu
+        menu_items = navigation().views[view].items
+        redirect_url = menu_items[0].url if menu_items else url_for('admin.landing')
         
-        return jsonify({'status': 'success', 'view': view, 'redirect_url': url_for(default_endpoint)})
+        return jsonify({'status': 'success', 'view': view, 'redirect_url': redirect_url})
     
     return jsonify({'status': 'error', 'message': 'Invalid view requested'}), 400
 
 @ui_bp.app_context_processor
 def inject_admin_nav():
-    """Injects sidebar_menu and current_view into all templates."""
-    
-    sidebar_menu = []
-    available_views = []
+    """
+    Injects the shared, precompiled navigation into all templates.
+    Only lookups happen here; nothing is copied or resolved per render.
+    """
+    nav = navigation()
+    sidebar_menu = None
+    available_views = ()
+    footer_items = ()
     current_view = session.get('current_view', 'kitchen')
     
     if current_user.is_authenticated:
-        # 1. Get the menu structure for the current view (for ALL roles)
-        sidebar_menu = get_current_menu()
+        # 1. Get the menu for the current view, filtered for the user's role
+        sidebar_menu = get_current_menu(current_user.role)
+        footer_items = nav.footer[bool(current_user.is_superadmin)]
         
         if current_user.role == 'admin':
             # Admins can switch between all views
-            available_views = list(MENU_STRUCTURE.keys())
+            available_views = nav.view_keys
         else:
             # Non-admins are locked to their current view
-            available_views = [current_view] if current_view else []
+            available_views = nav.single_view.get(current_view, ())
 
     return dict(
         current_view=current_view,
         sidebar_menu=sidebar_menu,
         available_views=available_views,
-        MENU_STRUCTURE=MENU_STRUCTURE
+        footer_items=footer_items,
+        extra_nav_items=extra_nav_items(),
+        NAV_VIEWS=nav.views
     )
\ No newline at end of file
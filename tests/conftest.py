@@ -0,0 +1,57 @@
+"""
+Shared fixtures. The app module builds its app at import, so the environment is pointed
+at a throwaway SQLite file first; AUTO_CREATE_SCHEMA then migrates it to the current schema.
+"""
+import os
+import tempfile
+
+import pytest
+
+_db_dir = tempfile.mkdtemp(prefix='oda-tests-')
+os.environ['DEV_DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+os.environ['ORDER_SWEEPER_ENABLED'] = 'false'
+
+from app import app as flask_app  # noqa: E402
+from extensions import db  # noqa: E402
+from project.models import MenuItem, Order, OrderItem, Restaurant, Table, User  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        yield flask_app
+        db.session.remove()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+
+
+@pytest.fixture
+def restaurant(app):
+    """A restaurant with one staff user, one table and one menu item."""
+    restaurant = Restaurant(name='Test Bistro', slug='test-bistro')
+    db.session.add(restaurant)
+    db.session.flush()
+    user = User(email='staff@example.com', role='staff', restaurant_id=restaurant.id, is_active=True)
+    table = Table(number='1', restaurant_id=restaurant.id)
+    menu_item = MenuItem(name='Soup', price=5.0, restaurant_id=restaurant.id)
+    db.session.add_all([user, table, menu_item])
+    db.session.commit()
+    restaurant.user, restaurant.table, restaurant.menu_item = user, table, menu_item
+    return restaurant
+
+
+@pytest.fixture
+def make_order(restaurant):
+    """make_order('preparing', ['preparing', 'ready']) -> an Order with items in those statuses."""
+    def make(status='pending', item_statuses=()):
+        order = Order(restaurant_id=restaurant.id, table_id=restaurant.table.id, status=status)
+        db.session.add(order)
+        db.session.flush()
+        for item_status in item_statuses:
+            db.session.add(OrderItem(order_id=order.id, menu_item_id=restaurant.menu_item.id, quantity=1,
+                                     status=item_status))
+        db.session.commit()
+        return order
+    return make
@@ -0,0 +1,25 @@
+from extensions import db
+from project.models import Order
+
+
+def _client(app, restaurant):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(restaurant.user.id)
+        session['_fresh'] = True
+    return client
+
+
+def test_full_page_etag_changes_when_a_row_arrives_past_it(app, restaurant, make_order):
+    make_order('pending')
+    client = _client(app, restaurant)
+    first = client.get('/api/v1/orders?limit=1')
+    assert first.status_code == 200
+    assert first.get_json()['next_cursor'] is None
+
+    db.session.add(Order(restaurant_id=restaurant.id, table_id=restaurant.table.id, status='pending'))
+    db.session.commit()
+    second = client.get('/api/v1/orders?limit=1', headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 200
+    assert second.get_json()['next_cursor'] is not None
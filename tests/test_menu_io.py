@@ -0,0 +1,60 @@
+import json
+
+from extensions import db
+from project.menu_io import export_csv, export_menu, import_menu, load_document
+from project.models import MenuItem
+
+
+def _add_items(restaurant, *items):
+    db.session.add_all([MenuItem(restaurant_id=restaurant.id, **values) for values in items])
+    db.session.commit()
+
+
+def _counts(report):
+    return {section: (len(report[section]['created']), len(report[section]['updated']))
+            for section in ('stations', 'categories', 'menus', 'items')}
+
+
+def test_unchanged_export_reimports_without_changes(restaurant):
+    restaurant.menu_item.sku = ''  # Added through the menu form before SKUs were assigned
+    _add_items(restaurant, {'name': 'Bread', 'price': 2.5, 'sku': 'ITEM-001'})
+    document = json.loads(json.dumps(export_menu(restaurant.id)))
+
+    report = import_menu(restaurant.id, document)
+    db.session.commit()
+
+    assert report['errors'] == []
+    assert report['applied'] is True
+    assert set(_counts(report).values()) == {(0, 0)}
+    assert report['items']['unchanged'] == 2
+    assert MenuItem.query.filter_by(restaurant_id=restaurant.id).count() == 2
+
+
+def test_unchanged_csv_export_dry_run_reports_no_changes(restaurant):
+    _add_items(restaurant, {'name': 'Bread', 'price': 2.5, 'sku': 'ITEM-001'})
+    content = export_csv(export_menu(restaurant.id))
+
+    report = import_menu(restaurant.id, load_document(content, 'csv'), dry_run=True)
+
+    assert report['errors'] == []
+    assert set(_counts(report).values()) == {(0, 0)}
+    assert report['items']['unchanged'] == 2
+
+
+def test_row_without_sku_updates_the_item_of_that_name(restaurant):
+    report = import_menu(restaurant.id, {'items': [{'name': 'Soup', 'price': 6}]})
+    db.session.commit()
+
+    assert report['items']['updated'][0]['changes'] == {'price': [5.0, 6.0]}
+    assert report['items']['created'] == []
+    assert db.session.get(MenuItem, restaurant.menu_item.id).price == 6.0
+
+
+def test_row_without_sku_matching_several_items_is_an_error(restaurant):
+    _add_items(restaurant, {'name': 'Soup', 'price': 7.0})
+
+    report = import_menu(restaurant.id, {'items': [{'name': 'Soup', 'price': 6}]})
+
+    assert report['applied'] is False
+    assert report['errors'] == ["items: name 'Soup' matches 2 items without a SKU; give them SKUs"]
+    assert MenuItem.query.filter_by(restaurant_id=restaurant.id).count() == 2
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+from project.order_state import (APPLY, CONFLICT, NOOP, ITEM_FLOW, ITEM_TRANSITIONS, ORDER_FLOW,
+                                 ORDER_TRANSITIONS, derived_order_status, resolve_item_transition,
+                                 resolve_order_transition, resolve_transition)
+
+
+def _order(status, *item_statuses):
+    return SimpleNamespace(status=status, items=[SimpleNamespace(status=s) for s in item_statuses])
+
+
+@pytest.mark.parametrize('current, expected, target, decision', [
+    # Nothing changed since the client queued the move
+    ('pending', 'pending', 'preparing', APPLY),
+    ('pending', None, 'preparing', APPLY),
+    ('preparing', 'preparing', 'pending', APPLY),
+    # Already where the client wanted it
+    ('ready', 'preparing', 'ready', NOOP),
+    ('cancelled', 'pending', 'cancelled', NOOP),
+    # Not a transition the state machine allows
+    ('paid', 'paid', 'preparing', CONFLICT),
+    ('completed', None, 'paid', CONFLICT),
+    ('pending', 'pending', 'completed', CONFLICT),
+    ('pending', 'pending', 'bogus', CONFLICT),
+    ('bogus', 'bogus', 'pending', CONFLICT),
+    # Changed on another device: only moves further along the flow still apply
+    ('preparing', 'pending', 'ready', APPLY),
+    ('ready', 'pending', 'served', APPLY),
+    ('served', 'ready', 'preparing', CONFLICT),
+    ('ready', 'preparing', 'preparing', CONFLICT),
+    ('ready', 'pending', 'preparing', CONFLICT),
+    # Cancelling always goes forward, except from a terminal status
+    ('ready', 'pending', 'cancelled', APPLY),
+])
+def test_resolve_order_transition(current, expected, target, decision):
+    assert resolve_order_transition(current, expected, target) == decision
+    assert resolve_transition(ORDER_TRANSITIONS, ORDER_FLOW, current, expected, target) == decision
+
+
+@pytest.mark.parametrize('current, expected, target, decision', [
+    ('pending', 'pending', 'preparing', APPLY),
+    ('preparing', 'pending', 'ready', APPLY),
+    ('ready', 'pending', 'preparing', CONFLICT),
+    ('ready', 'ready', 'preparing', APPLY),
+    ('served', 'ready', 'preparing', CONFLICT),
+    ('served', 'ready', 'served', NOOP),
+])
+def test_resolve_item_transition(current, expected, target, decision):
+    assert resolve_item_transition(current, expected, target) == decision
+    assert resolve_transition(ITEM_TRANSITIONS, ITEM_FLOW, current, expected, target) == decision
+
+
+def test_every_transition_target_is_a_known_status():
+    for transitions, statuses in ((ORDER_TRANSITIONS, set(ORDER_FLOW) | {'cancelled'}), (ITEM_TRANSITIONS, set(ITEM_FLOW))):
+        assert set(transitions) == statuses
+        for targets in transitions.values():
+            assert set(targets) <= statuses
+
+
+@pytest.mark.parametrize('order, derived', [
+    (_order('pending'), 'pending'),
+    (_order('pending', 'pending', 'pending'), 'pending'),
+    (_order('pending', 'pending', 'preparing'), 'preparing'),
+    (_order('ready', 'ready', 'preparing'), 'preparing'),
+    (_order('preparing', 'ready', 'served'), 'ready'),
+    (_order('preparing', 'ready', 'pending'), 'pending'),
+    (_order('ready', 'pending'), 'pending'),
+    # Orders past the kitchen keep their status whatever their items say
+    (_order('served', 'preparing'), None),
+    (_order('paid', 'pending'), None),
+    (_order('cancelled'), None),
+])
+def test_derived_order_status(order, derived):
+    assert derived_order_status(order) == derived
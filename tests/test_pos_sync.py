@@ -0,0 +1,179 @@
+import pytest
+
+from extensions import db
+from project import pos_sync
+from project.models import Order, OrderItem, PosMutation, Restaurant
+from project.pos_sync import apply_batch, replica_delta
+
+
+def _apply(restaurant, *mutations):
+    results, status_changes = apply_batch(restaurant.id, restaurant.user.id, list(mutations))
+    return results, status_changes
+
+
+def _status(result):
+    return result['status']
+
+
+def test_applies_mutations_in_order(restaurant, make_order):
+    order = make_order('pending')
+    results, changes = _apply(
+        restaurant,
+        {'id': 'm1', 'type': 'add_item', 'order_id': order.id, 'menu_item_id': restaurant.menu_item.id, 'quantity': 2},
+        {'id': 'm2', 'type': 'item_status', 'item_ref': 'm1', 'from': 'pending', 'to': 'preparing'},
+    )
+    assert [_status(r) for r in results] == ['applied', 'applied']
+    item = db.session.get(OrderItem, results[0]['item_id'])
+    assert (item.quantity, item.status) == (2, 'preparing')
+    assert changes == {order.id: 'preparing'}
+    assert db.session.get(Order, order.id).status == 'preparing'
+
+
+def test_replayed_batch_is_answered_from_the_record(restaurant, make_order):
+    order = make_order('pending')
+    batch = [{'id': 'add-1', 'type': 'add_item', 'order_id': order.id, 'menu_item_id': restaurant.menu_item.id}]
+    first, _ = _apply(restaurant, *batch)
+    second, changes = _apply(restaurant, *batch)
+    assert second[0]['duplicate'] is True
+    assert second[0]['item_id'] == first[0]['item_id']
+    assert changes == {}
+    assert OrderItem.query.filter_by(order_id=order.id).count() == 1
+
+
+def test_item_ref_resolves_across_batches(restaurant, make_order):
+    order = make_order('pending')
+    _apply(restaurant, {'id': 'add-1', 'type': 'add_item', 'order_id': order.id, 'menu_item_id': restaurant.menu_item.id})
+    results, _ = _apply(restaurant, {'id': 'qty-1', 'type': 'update_item_quantity', 'item_ref': 'add-1', 'quantity': 3})
+    assert _status(results[0]) == 'applied'
+    assert db.session.get(OrderItem, results[0]['item_id']).quantity == 3
+
+
+def test_stale_move_conflicts_and_the_conflict_is_recorded(restaurant, make_order):
+    order = make_order('paid', ['served'])
+    mutation = {'id': 'serve-1', 'type': 'order_status', 'order_id': order.id, 'from': 'ready', 'to': 'served'}
+    results, changes = _apply(restaurant, mutation)
+    assert _status(results[0]) == 'conflict'
+    assert changes == {}
+    assert db.session.get(Order, order.id).status == 'paid'
+    # Even once the move would be allowed, the resent mutation gets its recorded answer
+    db.session.get(Order, order.id).status = 'ready'
+    db.session.commit()
+    replay, _ = _apply(restaurant, mutation)
+    assert replay[0]['status'] == 'conflict' and replay[0]['duplicate'] is True
+    assert db.session.get(Order, order.id).status == 'ready'
+
+
+def test_stale_backward_move_conflicts(restaurant, make_order):
+    order = make_order('ready', ['ready'])
+    results, _ = _apply(restaurant, {'id': 'back-1', 'type': 'order_status', 'order_id': order.id,
+                                     'from': 'preparing', 'to': 'preparing'})
+    assert _status(results[0]) == 'conflict'
+    assert db.session.get(Order, order.id).status == 'ready'
+
+
+def test_forward_move_applies_over_a_concurrent_change(restaurant, make_order):
+    order = make_order('preparing')
+    results, changes = _apply(restaurant, {'id': 'pay-1', 'type': 'mark_paid', 'order_id': order.id, 'from': 'pending',
+                                           'payment_method': 'cash'})
+    assert _status(results[0]) == 'applied'
+    assert changes == {order.id: 'paid'}
+    assert (order.status, order.payment_method) == ('paid', 'cash')
+
+
+def test_noop_when_already_in_the_target_status(restaurant, make_order):
+    order = make_order('cancelled')
+    results, changes = _apply(restaurant, {'id': 'c-1', 'type': 'cancel_order', 'order_id': order.id, 'from': 'pending'})
+    assert _status(results[0]) == 'noop'
+    assert changes == {}
+
+
+def test_items_cannot_change_on_a_closed_order(restaurant, make_order):
+    order = make_order('paid', ['served'])
+    item = order.items[0]
+    results, _ = _apply(restaurant, {'id': 'rm-1', 'type': 'remove_item', 'item_id': item.id})
+    assert _status(results[0]) == 'conflict'
+    assert db.session.get(OrderItem, item.id) is not None
+
+
+def test_other_restaurants_orders_are_not_found(restaurant, make_order):
+    other = Restaurant(name='Elsewhere', slug='elsewhere')
+    db.session.add(other)
+    db.session.commit()
+    order = Order(restaurant_id=other.id, status='pending')
+    db.session.add(order)
+    db.session.commit()
+    results, _ = _apply(restaurant, {'id': 'x-1', 'type': 'cancel_order', 'order_id': order.id})
+    assert _status(results[0]) == 'conflict'
+    assert db.session.get(Order, order.id).status == 'pending'
+
+
+def test_mutation_id_of_another_restaurant_is_rejected(restaurant, make_order):
+    other = Restaurant(name='Elsewhere', slug='elsewhere')
+    db.session.add(other)
+    db.session.flush()
+    db.session.add(PosMutation(id='shared-id', restaurant_id=other.id, type='cancel_order', result={'status': 'applied'}))
+    db.session.commit()
+    order = make_order('pending')
+    results, _ = _apply(restaurant, {'id': 'shared-id', 'type': 'cancel_order', 'order_id': order.id})
+    assert _status(results[0]) == 'rejected'
+    assert db.session.get(Order, order.id).status == 'pending'
+
+
+@pytest.mark.parametrize('mutation', [
+    {'type': 'cancel_order', 'order_id': 1},
+    {'id': '', 'type': 'cancel_order', 'order_id': 1},
+    {'id': 'x' * 65, 'type': 'cancel_order', 'order_id': 1},
+    {'id': 'bad-1', 'type': 'drop_tables'},
+    {'id': 'bad-2', 'type': 'cancel_order', 'order_id': {'id': 1}},
+    {'id': 'bad-3', 'type': 'cancel_order', 'order_id': True},
+    {'id': 'bad-4', 'type': 'cancel_order', 'order_id': 2 ** 70},
+    {'id': 'bad-5', 'type': 'add_item', 'order_id': 'ORDER', 'menu_item_id': 'MENU_ITEM', 'modifiers': 'abc'},
+    {'id': 'bad-6', 'type': 'add_item', 'order_id': 'ORDER', 'menu_item_id': 'MENU_ITEM', 'modifiers': [{'id': 1}]},
+    {'id': 'bad-7', 'type': 'add_item', 'order_id': 'ORDER', 'menu_item_id': [1]},
+    {'id': 'bad-8', 'type': 'add_item', 'order_id': 'ORDER', 'menu_item_id': 'MENU_ITEM', 'quantity': 1e300},
+    {'id': 'bad-9', 'type': 'add_item', 'order_id': 'ORDER', 'menu_item_id': 'MENU_ITEM', 'notes': ['x']},
+    {'id': 'bad-10', 'type': 'order_status', 'order_id': 'ORDER', 'to': {'status': 'ready'}},
+    {'id': 'bad-11', 'type': 'order_status', 'order_id': 'ORDER', 'to': 'ready', 'from': ['pending']},
+    {'id': 'bad-12', 'type': 'mark_paid', 'order_id': 'ORDER', 'payment_method': ['card']},
+    {'id': 'bad-13', 'type': 'item_status', 'item_ref': {'id': 'm1'}, 'to': 'ready'},
+    'not a mutation',
+])
+def test_malformed_mutations_are_rejected_without_failing_the_batch(restaurant, make_order, mutation):
+    order = make_order('pending')
+    if isinstance(mutation, dict):
+        mutation = {key: {'ORDER': order.id, 'MENU_ITEM': restaurant.menu_item.id}.get(value, value)
+                    if isinstance(value, str) else value for key, value in mutation.items()}
+    results, _ = _apply(restaurant, mutation, {'id': 'ok-1', 'type': 'cancel_order', 'order_id': order.id})
+    assert [_status(r) for r in results] == ['rejected', 'applied']
+    assert OrderItem.query.filter_by(order_id=order.id).count() == 0
+    assert db.session.get(Order, order.id).status == 'cancelled'
+
+
+def test_unexpected_errors_are_recorded_as_rejected(restaurant, make_order, monkeypatch):
+    order = make_order('pending')
+
+    def broken(restaurant_id, mutation, refs, status_changes):
+        db.session.get(Order, order.id).status = 'preparing'
+        raise RuntimeError('boom')
+    monkeypatch.setitem(pos_sync.HANDLERS, 'cancel_order', broken)
+
+    results, changes = _apply(restaurant, {'id': 'boom-1', 'type': 'cancel_order', 'order_id': order.id})
+    assert _status(results[0]) == 'rejected'
+    assert changes == {}
+    db.session.expire_all()
+    assert db.session.get(Order, order.id).status == 'pending' # The savepoint was rolled back
+    assert db.session.get(PosMutation, 'boom-1').result['status'] == 'rejected'
+
+
+def test_replica_delta(restaurant, make_order):
+    kept, changed, closed = make_order('pending'), make_order('preparing'), make_order('pending')
+    known = {str(kept.id): kept.version, str(changed.id): changed.version, str(closed.id): closed.version, 'junk': 1}
+    changed.status = 'ready'
+    changed.version += 1
+    closed.status = 'completed'
+    new = make_order('pending')
+    db.session.commit()
+
+    orders, removed = replica_delta(restaurant.id, known)
+    assert sorted(order['id'] for order in orders) == sorted([changed.id, new.id])
+    assert removed == [closed.id]
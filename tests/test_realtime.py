@@ -0,0 +1,36 @@
+import pytest
+
+from extensions import socketio
+from project.realtime import order_room_token
+
+
+@pytest.fixture
+def staff_socket(app, restaurant):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(restaurant.user.id)
+        session['_fresh'] = True
+    socket = socketio.test_client(app, flask_test_client=client)
+    yield socket
+    socket.disconnect()
+
+
+def test_staff_join_their_restaurant_room(staff_socket, restaurant):
+    assert staff_socket.emit('join', {'restaurant_id': restaurant.id}, callback=True) == {'success': True}
+    assert staff_socket.emit('join', {'restaurant_id': str(restaurant.id)}, callback=True) == {'success': True}
+    assert staff_socket.emit('join', {'restaurant_id': restaurant.id + 1}, callback=True) == {'success': False}
+
+
+@pytest.mark.parametrize('data', [None, 'restaurant_1', [1], {}, {'restaurant_id': 'abc'}, {'restaurant_id': [1]},
+                                  {'restaurant_id': True}, {'restaurant_id': '-1'}, {'order_id': 'x', 'token': 1}])
+def test_malformed_join_is_refused(staff_socket, data):
+    assert staff_socket.emit('join', data, callback=True) == {'success': False}
+
+
+def test_customer_joins_the_room_of_their_order(app, make_order):
+    order = make_order('pending')
+    socket = socketio.test_client(app)
+    token = order_room_token(order.id)
+    assert socket.emit('join', {'order_id': order.id, 'token': token}, callback=True) == {'success': True}
+    assert socket.emit('join', {'order_id': order.id + 1, 'token': token}, callback=True) == {'success': False}
+    socket.disconnect()